@@ -0,0 +1,76 @@
+"""
+Outbound notification calls for a busy multi-camera scene: per-camera alerts vs AlertDigest.
+
+Replays --cameras cameras raising alerts at random intervals (mean --interval
+seconds) for --duration seconds in accelerated time (--speed). "per-camera" is
+what every CameraPipeline's Notifier does: one message per alert and channel,
+with each camera's 30 s per-channel rate limit dropping the rest. "digest"
+routes all alerts through one AlertDigest. Prints the outbound calls per channel
+and how many alerts are represented in what was sent.
+
+    python benchmarks/bench_alert_digest.py [--cameras 8] [--duration 600] [--window 30]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import random
+import time
+from motion_detector.alert_digest import AlertDigest
+
+
+def scenario(cameras, duration, interval, seed=1):
+    rng = random.Random(seed)
+    events = []
+    for c in range(cameras):
+        t = rng.uniform(0, interval)
+        while t < duration:
+            label = rng.choice(['person', 'person', 'person', 'car'])
+            events.append((t, f'Cam{c}', {label: rng.randint(1, 3)}))
+            t += rng.expovariate(1.0 / interval)
+    return sorted(events)
+
+
+def per_camera(events, rate_limit=30):
+    last = {}
+    sent = 0
+    for t, camera, _ in events:
+        if t - last.get(camera, -rate_limit) >= rate_limit:
+            last[camera] = t
+            sent += 1
+    return sent, sent
+
+
+def digest(events, window, speed):
+    messages = []
+    agg = AlertDigest(lambda subject, message, image: messages.append(subject), window=window / speed)
+    agg.start()
+    start = time.time()
+    for t, camera, classes in events:
+        delay = start + t / speed - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        agg.add(camera, {'classes': classes})
+    agg.stop()
+    stats = agg.get_stats()
+    return stats['messages'], stats['immediate'] + stats['merged_events']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cameras', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=600, help='simulated seconds')
+    parser.add_argument('--interval', type=float, default=5, help='mean seconds between alerts per camera')
+    parser.add_argument('--window', type=float, default=30)
+    parser.add_argument('--speed', type=float, default=100, help='simulated seconds per real second')
+    args = parser.parse_args()
+
+    events = scenario(args.cameras, args.duration, args.interval)
+    print(f"{len(events)} alerts from {args.cameras} cameras over {args.duration:.0f} s")
+    for name, (calls, represented) in (('per-camera', per_camera(events)),
+                                       ('digest', digest(events, args.window, args.speed))):
+        print(f"{name:>10}: {calls:5d} calls per channel, {represented:5d}/{len(events)} alerts represented")
+
+
+if __name__ == '__main__':
+    main()
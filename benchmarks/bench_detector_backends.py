@@ -0,0 +1,81 @@
+"""
+Benchmark YOLOv5/v8 detector backends: torch (ultralytics) vs ONNX via OpenCV DNN / ONNX Runtime.
+
+Each backend runs in a fresh process so its resident memory is measured in isolation.
+
+    python benchmarks/bench_detector_backends.py --model models/yolov5s.pt [--image frame.jpg]
+        [--input-size 640] [--iterations 50] [--backends torch,opencv,onnxruntime,onnxruntime-int8]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+import argparse
+import multiprocessing
+import time
+import numpy as np
+import cv2
+import psutil
+
+
+def build(backend, model, input_size):
+    if backend == 'torch':
+        from advanced_yolo import AdvancedYOLODetector
+        return AdvancedYOLODetector(model_path=model, conf_threshold=0.25, target_classes=None)
+    from onnx_yolo import ONNXYOLODetector
+    name, _, variant = backend.partition('-')
+    return ONNXYOLODetector(model_path=model, conf_threshold=0.25, input_size=input_size,
+                            backend=name, quantize=(variant == 'int8'))
+
+
+def run_backend(backend, model, image, input_size, iterations, results):
+    proc = psutil.Process()
+    rss_before = proc.memory_info().rss
+    try:
+        detector = build(backend, model, input_size)
+    except Exception as e:
+        results.put((backend, {'error': str(e)}))
+        return
+    frame = cv2.imread(image) if image else np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    for _ in range(3):  # warm-up
+        detector.detect(frame)
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        detections = detector.detect(frame)
+        times.append((time.perf_counter() - start) * 1000)
+    results.put((backend, {
+        'mean_ms': float(np.mean(times)),
+        'p95_ms': float(np.percentile(times, 95)),
+        'rss_mb': (proc.memory_info().rss - rss_before) / 1e6,
+        'detections': len(detections),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detector backend benchmark')
+    parser.add_argument('--model', required=True, help='.pt weights (exported to ONNX on first use) or .onnx')
+    parser.add_argument('--image', default=None, help='Frame to run on (default: random 1280x720 noise)')
+    parser.add_argument('--input-size', type=int, default=640)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--backends', default='torch,opencv,onnxruntime,onnxruntime-int8')
+    args = parser.parse_args()
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    print(f"{'backend':<18}{'mean ms':>10}{'p95 ms':>10}{'RSS MB':>10}{'dets':>6}")
+    for backend in args.backends.split(','):
+        if backend == 'torch' and args.model.endswith('.onnx'):
+            continue
+        p = ctx.Process(target=run_backend,
+                        args=(backend, args.model, args.image, args.input_size, args.iterations, results))
+        p.start()
+        name, r = results.get()
+        p.join()
+        if 'error' in r:
+            print(f"{name:<18}skipped: {r['error']}")
+        else:
+            print(f"{name:<18}{r['mean_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['rss_mb']:>10.0f}{r['detections']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Dashboard query cost: scraping the text detection log vs the indexed EventStore.
+
+Writes --rows detections (8 cameras) to a camera_log-style text file and to an
+EventStore, then times what the dashboard does for "last 20 detections of one
+camera": the old ``readlines()`` + substring filter, and ``query_events``. Also
+prints the cost of ``EventStore.record`` on the capture loop.
+
+    python benchmarks/bench_event_store.py [--rows 200000 500000 1000000]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import tempfile
+import time
+from motion_detector.event_store import EventStore, query_events, format_event
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def run(rows, tmp):
+    log_path = os.path.join(tmp, f'camera_log_{rows}.txt')
+    db_path = os.path.join(tmp, f'events_{rows}.db')
+    store = EventStore(db_path, batch_size=5000, max_queue=rows + 1)
+    t0 = time.time() - rows * 0.1
+    start = time.perf_counter()
+    for i in range(rows):
+        store.record(f'Cam{i % 8}', [(100, 100, 200, 300, 0.9, 'person')], ts=t0 + i * 0.1, track_ids=[i // 40])
+    record_us = (time.perf_counter() - start) / rows * 1e6
+    store.stop()
+    with open(log_path, 'w') as f:
+        for i in range(rows):
+            f.write(format_event({'ts': t0 + i * 0.1, 'camera': f'Cam{i % 8}', 'class': 'person', 'confidence': 0.9,
+                                  'x1': 100, 'y1': 100, 'x2': 200, 'y2': 300, 'track_id': i // 40}))
+
+    def scrape():
+        with open(log_path) as f:
+            return [l for l in f.readlines() if 'Cam3' in l][-20:]
+
+    scrape_ms, _ = timed(scrape, repeat=3)
+    query_ms, _ = timed(lambda: query_events(db_path, camera='Cam3', limit=20))
+    print(f"{rows:>9} rows: text log {scrape_ms:8.1f} ms   event store {query_ms:6.2f} ms   "
+          f"record() {record_us:.1f} us/detection")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 300000, 1000000])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            run(rows, tmp)
+
+
+if __name__ == '__main__':
+    main()
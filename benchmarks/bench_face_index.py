@@ -0,0 +1,62 @@
+"""
+Microbenchmark: known-face lookup, list-based compare_faces/face_distance style scan vs FaceIndex
+(exact vectorised search and IVF), over growing synthetic galleries of 128-d encodings.
+
+    python benchmarks/bench_face_index.py [--sizes 1000 10000 100000] [--queries 200]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import time
+import numpy as np
+from motion_detector.face_index import FaceIndex
+
+
+def legacy_lookup(known_encodings, enc, tolerance=0.6):
+    """What FaceRecognizer.recognize used to do per face: distances against a Python list of encodings."""
+    distances = np.linalg.norm(np.array(known_encodings) - enc, axis=1)
+    matches = list(distances <= tolerance)
+    if any(matches):
+        return int(distances.argmin())
+    return None
+
+
+def bench(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Face index lookup microbenchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>8} {'legacy ms':>10} {'exact ms':>9} {'ivf ms':>7} {'ivf recall':>10}")
+    for size in args.sizes:
+        # Identities clustered like real face embeddings (several photos per person)
+        people = rng.normal(scale=0.3, size=(max(size // 4, 1), 128))
+        gallery = (people[rng.integers(0, len(people), size)] +
+                   rng.normal(scale=0.05, size=(size, 128))).astype(np.float32)
+        names = [str(i) for i in range(size)]
+        picks = rng.integers(0, size, args.queries)
+        queries = gallery[picks] + rng.normal(scale=0.01, size=(args.queries, 128)).astype(np.float32)
+
+        known = list(gallery)
+        legacy_ms = bench(lambda q: legacy_lookup(known, q), queries[:20])
+        exact = FaceIndex(ivf_threshold=0)
+        exact.add(names, gallery)
+        exact_ms = bench(lambda q: exact.search(q), queries)
+        ivf = FaceIndex(ivf_threshold=1)
+        ivf.add(names, gallery)
+        ivf_ms = bench(lambda q: ivf.search(q), queries)
+        truth = [exact.search(q)[0][0][1] for q in queries]
+        recall = np.mean([abs(ivf.search(q)[0][0][1] - d) < 1e-4 for q, d in zip(queries, truth)])
+        print(f"{size:>8} {legacy_ms:>10.3f} {exact_ms:>9.3f} {ivf_ms:>7.3f} {recall:>10.2%}")
+
+
+if __name__ == '__main__':
+    main()
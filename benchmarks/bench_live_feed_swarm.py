@@ -0,0 +1,119 @@
+"""
+Load test: a local swarm of MJPEG viewers against the asyncio live feed server.
+
+A publisher thread pushes real JPEG frames (encoded once) at --fps; every viewer
+is an asyncio client that parses the multipart stream and measures the delay from
+publish to receipt (the publish time is embedded in a JPEG comment segment). A
+share of the viewers can be made slow to check that they only lose frames and
+do not grow server memory. Prints delivered FPS, latency percentiles and the RSS
+of this process (server + clients) at the start and end of the run.
+
+    python benchmarks/bench_live_feed_swarm.py [--clients 200] [--seconds 20] [--fps 15] [--slow 0.1]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+import argparse
+import asyncio
+import socket
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+import psutil
+from live_feed import LiveFeedManager
+
+
+def stamped_jpeg(base, ts):
+    """Insert a COM segment holding the publish time right after the SOI marker."""
+    payload = struct.pack('!d', ts)
+    return base[:2] + b'\xff\xfe' + struct.pack('!H', len(payload) + 2) + payload + base[2:]
+
+
+def publisher(feed, base, fps, stop):
+    while not stop.is_set():
+        feed.update_jpeg(stamped_jpeg(base, time.time()), 'Bench')
+        time.sleep(1.0 / fps)
+
+
+async def viewer(port, seconds, slow, results):
+    sock = socket.socket()
+    if slow:
+        # A constrained link: small receive window, so the backlog has to sit on the server side
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=2 ** 16)
+    writer.write(b'GET /video_feed/Bench HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    await writer.drain()
+    frames, latencies = 0, []
+    deadline = time.time() + seconds
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        while time.time() < deadline:
+            headers = await reader.readuntil(b'\r\n\r\n')
+            length = int(headers.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            jpeg = await reader.readexactly(length + 2)
+            latencies.append(time.time() - struct.unpack('!d', jpeg[6:14])[0])
+            frames += 1
+            if slow:
+                await asyncio.sleep(0.5)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+    results.append((slow, frames, latencies))
+
+
+async def swarm(port, clients, seconds, slow_share):
+    results = []
+    n_slow = int(clients * slow_share)
+    await asyncio.gather(*(viewer(port, seconds, i < n_slow, results) for i in range(clients)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live feed viewer swarm load test')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--fps', type=float, default=15)
+    parser.add_argument('--slow', type=float, default=0.1, help='share of viewers reading 2 frames/s')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (15, 15), 0)
+    base = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+    proc = psutil.Process()
+    feed = LiveFeedManager(max_clients=args.clients + 10)
+    feed.start(host='127.0.0.1', port=0)
+    stop = threading.Event()
+    pub = threading.Thread(target=publisher, args=(feed, base, args.fps, stop), daemon=True)
+    pub.start()
+    time.sleep(0.5)
+    rss_start = proc.memory_info().rss
+    results = asyncio.run(swarm(feed.server.port, args.clients, args.seconds, args.slow))
+    rss_end = proc.memory_info().rss
+    stop.set()
+    stats = feed.get_stats()
+    feed.stop()
+
+    for label, slow in (('normal', False), ('slow', True)):
+        group = [r for r in results if r[0] == slow]
+        if not group:
+            continue
+        lat = np.array([l for r in group for l in r[2]]) * 1000
+        fps = np.mean([r[1] for r in group]) / args.seconds
+        print(f"{label:>6} viewers: {len(group):4d}  fps/viewer {fps:5.1f}  "
+              f"latency p50 {np.percentile(lat, 50):6.1f} ms  p99 {np.percentile(lat, 99):6.1f} ms")
+    print(f"frame size      : {len(base) / 1024:.0f} KiB, published {stats['published']}, encoded {stats['encoded']}")
+    print(f"server          : {stats['server']}")
+    print(f"RSS             : {rss_start / 2**20:.1f} MiB -> {rss_end / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
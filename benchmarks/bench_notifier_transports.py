@@ -0,0 +1,90 @@
+"""
+Notification send latency and CPU: per-alert connections vs pooled transports.
+
+Sends --alerts Discord/Telegram/WhatsApp messages and emails to local stand-ins
+(plain HTTP and SMTP, so TLS handshakes - the larger saving on real providers -
+are not even counted). The "per-alert" mode does what Notifier used to do: a bare
+``requests.post``/``requests.get`` per message and a new SMTP connection plus
+login per email. Prints per-channel latency, process CPU time and the number of
+connections the stand-ins accepted.
+
+    python benchmarks/bench_notifier_transports.py [--alerts 200] [--latency 0.002]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import smtplib
+import tempfile
+import time
+import numpy as np
+import requests
+from notify_standin import HTTPStandIn, SMTPStandIn
+from motion_detector.notifier import Notifier
+
+
+def per_alert(http_url, smtp_port, n):
+    latencies = {'discord': [], 'telegram': [], 'whatsapp': [], 'email': []}
+    for i in range(n):
+        for channel, call in (('discord', lambda: requests.post(f'{http_url}/webhook', json={'content': 'x'}, timeout=5)),
+                              ('telegram', lambda: requests.post(f'{http_url}/bot1/sendMessage',
+                                                                 data={'chat_id': 1, 'text': 'x'}, timeout=5)),
+                              ('whatsapp', lambda: requests.get(f'{http_url}/whatsapp.php',
+                                                                params={'text': 'x'}, timeout=5))):
+            start = time.perf_counter()
+            call()
+            latencies[channel].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        with smtplib.SMTP('127.0.0.1', smtp_port) as server:
+            server.login('bench', 'bench')
+            server.sendmail('a@example.com', ['b@example.com'], 'Subject: x\r\n\r\nx')
+        latencies['email'].append(time.perf_counter() - start)
+    return {c: (np.mean(l) * 1000, np.percentile(l, 95) * 1000) for c, l in latencies.items()}
+
+
+def pooled(http_url, smtp_port, n, log_file):
+    notifier = Notifier({
+        'email': {'enabled': True, 'from': 'a@example.com', 'to': 'b@example.com', 'smtp_server': '127.0.0.1',
+                  'smtp_port': smtp_port, 'smtp_ssl': False, 'username': 'bench', 'password': 'bench'},
+        'telegram': {'enabled': True, 'bot_token': '1', 'chat_id': 1, 'api_url': http_url},
+        'whatsapp': {'enabled': True, 'phone': '1', 'apikey': 'k', 'api_url': f'{http_url}/whatsapp.php'},
+        'discord': {'enabled': True, 'webhook_url': f'{http_url}/webhook'},
+    }, log_file=log_file)
+    notifier.rate_limit_seconds = 0
+    for i in range(n):
+        notifier.send_discord('x')
+        notifier.send_telegram('x')
+        notifier.send_whatsapp('x')
+        notifier.send_email('x', 'x')
+    notifier.close()
+    return {c: (m['avg_ms'], m['p95_ms']) for c, m in notifier.get_stats().items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-alert vs pooled notification transports')
+    parser.add_argument('--alerts', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.002, help='seconds per stand-in reply')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ('per-alert', 'pooled'):
+            http = HTTPStandIn(args.latency).start()
+            smtp = SMTPStandIn(args.latency).start()
+            cpu = time.process_time()
+            start = time.perf_counter()
+            if label == 'per-alert':
+                result = per_alert(http.url, smtp.port, args.alerts)
+            else:
+                result = pooled(http.url, smtp.port, args.alerts, os.path.join(tmp, 'notify.log'))
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu
+            http.stop()
+            smtp.stop()
+            print(f"{label}: wall {wall:.2f} s  cpu {cpu:.2f} s  "
+                  f"connections http {http.stats['connections']} smtp {smtp.stats['connections']}")
+            for channel, (avg, p95) in sorted(result.items()):
+                print(f"  {channel:>8}: avg {avg:6.2f} ms  p95 {p95:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Upload throughput: per-file FTP connections vs the pooled UploadService.
+
+Uploads --files files of --size KiB to a local FTP stand-in whose control
+replies are delayed by --latency seconds (login + cwd + PASV + STOR is several
+round trips, so per-file connections pay the WAN cost on every file). Prints
+files/s and the number of logins the server saw for each mode.
+
+    python benchmarks/bench_upload_pool.py [--files 200] [--size 256] [--latency 0.01] [--workers 4]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+import argparse
+import tempfile
+import time
+from ftp_standin import FTPStandIn
+from upload_service import FTPConnection, UploadService
+
+
+def per_file(config, paths):
+    # What upload_via_ftp used to do: connect, log in and cwd for every file
+    for path in paths:
+        conn = FTPConnection(config)
+        conn.upload(path, os.path.basename(path))
+        conn.close()
+
+
+def pooled(config, paths, workers, state_file):
+    service = UploadService(config, state_file, workers=workers, backoff_base=0.1)
+    service.start()
+    for path in paths:
+        service.submit(path)
+    service.join()
+    service.stop()
+    return service.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pooled vs per-file FTP upload throughput')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--size', type=int, default=256, help='KiB per file')
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds per control reply')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'src')
+        os.makedirs(src)
+        payload = os.urandom(args.size * 1024)
+        paths = []
+        for i in range(args.files):
+            paths.append(os.path.join(src, f'clip_{i:05d}.mp4'))
+            with open(paths[-1], 'wb') as f:
+                f.write(payload)
+
+        for label in ('per-file', 'pooled'):
+            server = FTPStandIn(os.path.join(tmp, label), latency=args.latency).start()
+            os.makedirs(server.root)
+            config = {'host': '127.0.0.1', 'port': server.port, 'user': 'bench', 'password': 'bench',
+                      'remote_dir': '/clips', 'sftp': False}
+            start = time.perf_counter()
+            if label == 'per-file':
+                per_file(config, paths)
+            else:
+                stats = pooled(config, paths, args.workers, os.path.join(tmp, 'queue.json'))
+            elapsed = time.perf_counter() - start
+            server.stop()
+            print(f"{label:>8}: {args.files / elapsed:7.1f} files/s  {args.files * args.size / 1024 / elapsed:6.1f} MiB/s  "
+                  f"logins {server.stats['logins']:4d}  commands {server.stats['commands']:5d}")
+        print(f"pool    : {stats['pool']}  avg upload {stats['avg_upload_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
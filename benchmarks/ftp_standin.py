@@ -0,0 +1,153 @@
+"""
+Minimal local FTP server used as a stand-in by the upload benchmarks (stdlib only).
+
+Supports what ftplib's uploads need: USER/PASS, PWD/CWD/MKD, TYPE, PASV, STOR,
+APPE, REST, SIZE, NOOP and QUIT. Files are stored under ``root``. ``latency``
+adds a delay to every control reply to model a remote server (a login then
+costs several round trips, as it does over a WAN).
+"""
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.cwd = '/'
+        self.passive = None
+        self.rest = 0
+        self.server.count('connections')
+        self.reply('220 stand-in ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd, _, arg = line.decode().strip().partition(' ')
+            cmd = cmd.upper()
+            self.server.count('commands')
+            handler = getattr(self, 'cmd_' + cmd, None)
+            if handler is None:
+                self.reply('502 not implemented')
+            elif handler(arg) is False:
+                return
+
+    def path(self, name):
+        remote = os.path.normpath(os.path.join(self.cwd, name))
+        return os.path.join(self.server.root, remote.lstrip('/'))
+
+    def cmd_USER(self, arg):
+        self.reply('331 password required')
+
+    def cmd_PASS(self, arg):
+        self.server.count('logins')
+        self.reply('230 logged in')
+
+    def cmd_PWD(self, arg):
+        self.reply(f'257 "{self.cwd}"')
+
+    def cmd_CWD(self, arg):
+        target = os.path.normpath(os.path.join(self.cwd, arg))
+        if os.path.isdir(self.path(arg)):
+            self.cwd = target
+            self.reply('250 ok')
+        else:
+            self.reply('550 no such directory')
+
+    def cmd_MKD(self, arg):
+        os.makedirs(self.path(arg), exist_ok=True)
+        self.reply(f'257 "{arg}" created')
+
+    def cmd_TYPE(self, arg):
+        self.reply('200 type set')
+
+    def cmd_NOOP(self, arg):
+        self.reply('200 ok')
+
+    def cmd_SIZE(self, arg):
+        path = self.path(arg)
+        if os.path.isfile(path):
+            self.reply(f'213 {os.path.getsize(path)}')
+        else:
+            self.reply('550 no such file')
+
+    def cmd_REST(self, arg):
+        self.rest = int(arg)
+        self.reply(f'350 restarting at {self.rest}')
+
+    def cmd_PASV(self, arg):
+        self.passive = socket.socket()
+        self.passive.bind(('127.0.0.1', 0))
+        self.passive.listen(1)
+        port = self.passive.getsockname()[1]
+        self.reply(f'227 Entering Passive Mode (127,0,0,1,{port >> 8},{port & 255})')
+
+    def _receive(self, path, mode):
+        if self.passive is None:
+            self.reply('425 use PASV first')
+            return
+        self.reply('150 ok to send data')
+        data_sock, _ = self.passive.accept()
+        self.passive.close()
+        self.passive = None
+        with data_sock, open(path, mode) as f:
+            if mode == 'r+b':
+                f.seek(self.rest)
+                f.truncate()
+            while True:
+                chunk = data_sock.recv(65536)
+                if not chunk:
+                    break
+                f.write(chunk)
+                self.server.count('bytes', len(chunk))
+        self.rest = 0
+        self.server.count('files')
+        self.reply('226 transfer complete')
+
+    def cmd_STOR(self, arg):
+        path = self.path(arg)
+        mode = 'r+b' if self.rest and os.path.exists(path) else 'wb'
+        self._receive(path, mode)
+
+    def cmd_APPE(self, arg):
+        self._receive(self.path(arg), 'ab')
+
+    def cmd_QUIT(self, arg):
+        self.reply('221 bye')
+        return False
+
+
+class FTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    Args:
+        root (str): Directory holding the uploaded files.
+        latency (float): Seconds added before every control reply (default 0).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, latency=0.0):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.root = root
+        self.latency = latency
+        self.port = self.server_address[1]
+        self.lock = threading.Lock()
+        self.stats = {'connections': 0, 'logins': 0, 'commands': 0, 'files': 0, 'bytes': 0}
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
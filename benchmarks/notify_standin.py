@@ -0,0 +1,116 @@
+"""
+Local HTTP and SMTP stand-ins for the notification benchmarks (stdlib only).
+
+HTTPStandIn answers every request with ``200 {"ok": true}`` over HTTP/1.1
+keep-alive; SMTPStandIn speaks enough ESMTP for smtplib (EHLO, AUTH PLAIN/LOGIN,
+MAIL, RCPT, DATA, RSET, NOOP, QUIT). Both count connections and requests, and
+``latency`` delays every reply to model a remote provider.
+"""
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Counting:
+    def init_counters(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.stats = {'connections': 0, 'requests': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; like real servers, don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        self.server.count('requests')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPStandIn(_Counting, ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), _HTTPHandler)
+        self.init_counters(latency)
+        self.port = self.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.server.count('connections')
+        self.reply('220 stand-in ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode().strip().split(' ')[0].upper()
+            if cmd == 'EHLO':
+                self.wfile.write(b'250-stand-in\r\n250-AUTH PLAIN LOGIN\r\n')
+                self.reply('250 OK')
+            elif cmd == 'HELO':
+                self.reply('250 stand-in')
+            elif cmd == 'AUTH':
+                self.reply('235 authenticated')
+            elif cmd == 'DATA':
+                self.reply('354 end with .')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.count('requests')
+                self.reply('250 queued')
+            elif cmd == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStandIn(_Counting, socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.0):
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), _SMTPHandler)
+        self.init_counters(latency)
+        self.port = self.server_address[1]
@@ -1,69 +1,71 @@
 import os
-from ftplib import FTP
-try:
-    import paramiko
-except ImportError:
-    paramiko = None
+import threading
+import time
+from motion_detector.upload_service import ConnectionPool, FTPConnection, SFTPConnection, ftp_config_from_env
 
-def upload_via_ftp(local_path, remote_filename=None, log_path=None, retries=2):
+# FTP settings are read once and connections are kept open between uploads
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = ftp_config_from_env()
+            cls = SFTPConnection if config['sftp'] else FTPConnection
+            _pool = ConnectionPool(lambda: cls(config), size=2)
+        return _pool
+
+
+def reset_ftp_connections():
+    """Close the pooled connections and re-read the FTP settings on the next upload."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
+
+
+def upload_via_ftp(local_path, remote_filename=None, log_path=None, retries=2, backoff=1.0):
     """
     Upload a file to an FTP or SFTP server using environment variables for configuration.
     Optionally log the result to a log file.
-    """
-    from dotenv import load_dotenv
-    import time
-    load_dotenv()
-    host = os.getenv('FTP_HOST')
-    port = int(os.getenv('FTP_PORT', 21))
-    user = os.getenv('FTP_USER')
-    passwd = os.getenv('FTP_PASS')
-    remote_dir = os.getenv('FTP_REMOTE_DIR', '/')
-    use_sftp = os.getenv('FTP_USE_SFTP', 'false').lower() == 'true'
 
+    The connection is taken from a shared pool (re-used across calls) and failed
+    attempts are retried after ``backoff * 2**attempt`` seconds on a fresh connection,
+    resuming from the bytes the server already holds.
+    """
     if not remote_filename:
         remote_filename = os.path.basename(local_path)
 
+    pool = _get_pool()
     attempt = 0
     while attempt <= retries:
+        conn = None
         try:
-            if use_sftp:
-                if paramiko is None:
-                    raise ImportError("paramiko is required for SFTP support. Please install it via 'pip install paramiko'.")
-                transport = paramiko.Transport((host, port if port else 22))
-                transport.connect(username=user, password=passwd)
-                sftp = paramiko.SFTPClient.from_transport(transport)
-                try:
-                    sftp.chdir(remote_dir)
-                except IOError:
-                    sftp.mkdir(remote_dir)
-                    sftp.chdir(remote_dir)
-                sftp.put(local_path, os.path.join(remote_dir, remote_filename))
-                sftp.close()
-                transport.close()
-            else:
-                ftp = FTP()
-                ftp.connect(host, port)
-                ftp.login(user, passwd)
-                try:
-                    ftp.cwd(remote_dir)
-                except Exception:
-                    ftp.mkd(remote_dir)
-                    ftp.cwd(remote_dir)
-                with open(local_path, 'rb') as f:
-                    ftp.storbinary(f'STOR {remote_filename}', f)
-                ftp.quit()
+            conn = pool.acquire(timeout=60)
+            offset = 0
+            if attempt:
+                remote = conn.size(remote_filename)
+                if remote is not None and remote <= os.path.getsize(local_path):
+                    offset = remote
+            conn.upload(local_path, remote_filename, offset=offset)
+            pool.release(conn)
             msg = f"[FTP_UPLOAD] {time.strftime('%Y-%m-%d %H:%M:%S')} SUCCESS {local_path} -> {remote_filename}"
             if log_path:
                 with open(log_path, 'a') as logf:
                     logf.write(msg + '\n')
             return True
         except Exception as e:
+            if conn is not None:
+                pool.release(conn, broken=True)
             msg = f"[FTP_UPLOAD] {time.strftime('%Y-%m-%d %H:%M:%S')} FAIL {local_path} -> {remote_filename} : {e}"
             if log_path:
                 with open(log_path, 'a') as logf:
                     logf.write(msg + '\n')
             if attempt == retries:
                 raise
-            time.sleep(2)
+            time.sleep(backoff * 2 ** attempt)
             attempt += 1
     return False
@@ -14,9 +14,11 @@ class AdvancedYOLODetector:
         conf_threshold (float): Confidence threshold for detections.
         target_classes (list): List of class names to filter (e.g., ['person','car']).
         device (str or None): PyTorch device (e.g., 'cpu' or 'cuda:0').
+        input_size (int or None): Inference image size; None uses the model default.
     """
-    def __init__(self, model_path='yolov5s.pt', conf_threshold=0.5, target_classes=None, device=None):
+    def __init__(self, model_path='yolov5s.pt', conf_threshold=0.5, target_classes=None, device=None, input_size=None):
         self.model = YOLO(model_path)
+        self.input_size = input_size
         if device:
             self.model.to(device)
         self.conf_threshold = conf_threshold
@@ -36,7 +38,29 @@ class AdvancedYOLODetector:
             List of tuples: (x1, y1, x2, y2, confidence, class_name)
         """
         # Inference (returns a list of Results, one per image)
-        results = self.model(frame)[0]
+        results = self.model(frame, **self._predict_args())[0]
+        return self._parse(results)
+
+    def set_input_size(self, size):
+        self.input_size = int(size) if size else None
+
+    def _predict_args(self):
+        return {'imgsz': self.input_size} if self.input_size else {}
+
+    def detect_batch(self, frames):
+        """
+        Run inference on several frames in one forward pass.
+
+        Args:
+            frames (list): BGR images (may differ in size; the model letterboxes each one).
+        Returns:
+            List of detection lists, one per input frame, in the same format as detect().
+        """
+        if not frames:
+            return []
+        return [self._parse(results) for results in self.model(list(frames), **self._predict_args())]
+
+    def _parse(self, results):
         # Extract boxes, confidences, and class IDs
         xyxy = results.boxes.xyxy.cpu().numpy()  # shape (N,4)
         confidences = results.boxes.conf.cpu().numpy()  # shape (N,)
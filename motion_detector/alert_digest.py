@@ -0,0 +1,165 @@
+import threading
+import time
+
+
+def _plural(count, label):
+    return label if count == 1 else f"{count} {label}s"
+
+
+class AlertDigest:
+    """
+    Merges alerts from all cameras into one message per window.
+
+    Events are keyed by (camera, class). Within a window the largest count seen,
+    the number of events, the recognised names and the first/last time are kept
+    per key, and a single digest such as "FrontDoor: 2 persons (Alice), Garage: car"
+    is handed to ``notify`` when the window closes, so every event is represented
+    while a busy scene costs one call per channel per window instead of one per
+    alert. With ``immediate_first`` the first alert after a quiet window is sent
+    on its own right away, so a new incident is not delayed by the window. The
+    snapshot of the most recent event in a digest is attached to it.
+
+    Args:
+        notify (callable): Called as ``notify(subject, message, image)`` for every message sent
+            (``image``: JPEG bytes or None).
+        window (float): Seconds alerts are collected into one digest (default 30).
+        immediate_first (bool): Send the first alert after a quiet window at once (default True).
+    """
+    def __init__(self, notify, window=30.0, immediate_first=True):
+        self.notify = notify
+        self.window = window
+        self.immediate_first = immediate_first
+        self.pending = {}  # (camera, class) -> {'count', 'events', 'names', 'first', 'last'}
+        self.window_end = None  # Time the current window closes, None while quiet
+        self.image = None  # Latest snapshot of the pending events
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.stats = {'events': 0, 'messages': 0, 'immediate': 0, 'digests': 0, 'merged_events': 0}
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='alert-digest', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the timer thread and send whatever is still collected."""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.flush()
+
+    def add(self, camera, event):
+        """
+        Record an alert.
+
+        Args:
+            camera (str): Camera name.
+            event (dict): {'classes': {label: count}, 'names': [recognised names], 'ts': time,
+                'image': JPEG bytes or None}.
+        """
+        ts = event.get('ts') or time.time()
+        classes = event.get('classes') or {'person': 1}
+        with self.cond:
+            self.stats['events'] += 1
+            if self.immediate_first and self.window_end is None:
+                # Quiet until now: report this incident at once and collect what follows
+                self.window_end = ts + self.window
+                self.stats['immediate'] += 1
+                entries = {(camera, label): {'count': count, 'events': 1, 'names': set(event.get('names') or []),
+                                             'first': ts, 'last': ts}
+                           for label, count in classes.items()}
+                image = event.get('image')
+                send = True
+            else:
+                if event.get('image'):
+                    self.image = event['image']
+                for label, count in classes.items():
+                    entry = self.pending.setdefault((camera, label), {'count': 0, 'events': 0, 'names': set(),
+                                                                      'first': ts, 'last': ts})
+                    entry['count'] = max(entry['count'], count)
+                    entry['events'] += 1
+                    entry['names'].update(event.get('names') or [])
+                    entry['last'] = ts
+                if self.window_end is None:
+                    self.window_end = ts + self.window
+                send = False
+            self.cond.notify_all()
+        if send:
+            self._send(entries, image, digest=False)
+
+    def _run(self):
+        with self.cond:
+            while self.running:
+                if self.window_end is None:
+                    self.cond.wait()
+                    continue
+                remaining = self.window_end - time.time()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+                entries, self.pending = self.pending, {}
+                image, self.image = self.image, None
+                # Keep the window open after a digest so a steady stream stays at one message per window
+                self.window_end = time.time() + self.window if entries else None
+                if entries:
+                    self.cond.release()
+                    try:
+                        self._send(entries, image, digest=True)
+                    finally:
+                        self.cond.acquire()
+
+    def flush(self):
+        """Send the collected alerts now."""
+        with self.cond:
+            entries, self.pending = self.pending, {}
+            image, self.image = self.image, None
+            self.window_end = None
+        if entries:
+            self._send(entries, image, digest=True)
+
+    def _send(self, entries, image, digest):
+        subject, message = self.format(entries)
+        with self.cond:
+            self.stats['messages'] += 1
+            if digest:
+                self.stats['digests'] += 1
+                self.stats['merged_events'] += sum(e['events'] for e in entries.values())
+        try:
+            self.notify(subject, message, image)
+        except Exception as e:
+            print(f"[ERROR] Sending alert digest failed: {e}")
+
+    @staticmethod
+    def format(entries):
+        """
+        Build (subject, message) from collected entries, cameras in first-seen order.
+
+        Returns:
+            tuple: ("ALERT: FrontDoor: 2 persons (Alice), Garage: car", one line per camera and class)
+        """
+        cameras = {}
+        for (camera, label), entry in sorted(entries.items(), key=lambda kv: kv[1]['first']):
+            cameras.setdefault(camera, []).append((label, entry))
+        parts, lines = [], []
+        for camera, items in cameras.items():
+            descriptions = []
+            for label, entry in items:
+                text = _plural(entry['count'], label)
+                if entry['names']:
+                    text += f" ({', '.join(sorted(entry['names']))})"
+                descriptions.append(text)
+                first = time.strftime('%H:%M:%S', time.localtime(entry['first']))
+                last = time.strftime('%H:%M:%S', time.localtime(entry['last']))
+                span = first if first == last else f"{first}-{last}"
+                events = '1 event' if entry['events'] == 1 else f"{entry['events']} events"
+                lines.append(f"{camera}: {text} - {events}, {span}")
+            parts.append(f"{camera}: {', '.join(descriptions)}")
+        return f"ALERT: {', '.join(parts)}", '\n'.join(lines)
+
+    def get_stats(self):
+        """Return event/message counters and the number of (camera, class) keys waiting for the window to close."""
+        with self.cond:
+            return dict(self.stats, pending=len(self.pending), window=self.window)
@@ -2,16 +2,36 @@ import os
 from flask import Flask, jsonify, request, redirect, url_for
 from threading import Thread
 import time
+import cv2
+import numpy as np
 from dashboard import dashboard_bp
+from event_store import query_events
+from transcode_queue import PRIORITIES
 
 class APIServer(Thread):
-    def __init__(self, detector, notifier, live_feed, stop_flag, host='0.0.0.0', port=3001):
+    def __init__(self, detector, notifier, live_feed, stop_flag, host='0.0.0.0', port=3001, orchestrator=None,
+                 load_controller=None, transcoder=None, uploader=None,
+                 alert_digest=None, event_db=None, clip_dirs=None):
         # host, port now configurable via config.yaml
         super().__init__(daemon=True)
         self.detector = detector
         self.notifier = notifier
         self.live_feed = live_feed
         self.stop_flag = stop_flag
+        # MultiCameraOrchestrator running the camera pipelines (None for single-pipeline use)
+        self.orchestrator = orchestrator
+        # LoadController adjusting per-camera quality (None when load control is disabled)
+        self.load_controller = load_controller
+        # TranscodeQueue compressing event clips (None when transcoding is disabled)
+        self.transcoder = transcoder
+        # Directories POST /transcode may read from (real paths); inputs anywhere else are rejected
+        self.clip_dirs = [os.path.realpath(d) for d in clip_dirs or []]
+        # UploadService sending clips to the FTP/SFTP server (None when uploading is disabled)
+        self.uploader = uploader
+        # AlertDigest merging alerts of all cameras (None when alert_digest is disabled)
+        self.alert_digest = alert_digest
+        # Detection event store database (None when event_store is disabled)
+        self.event_db = event_db
         # Configure server host/port and templates
         self.host = host
         self.port = port
@@ -36,6 +56,139 @@ class APIServer(Thread):
                 'detection_active': not self.stop_flag.is_set()
             })
 
+        @self.app.route('/cameras')
+        def cameras():
+            if self.orchestrator is None:
+                return jsonify({'mode': None, 'aggregate_fps': 0.0, 'cameras': {}})
+            return jsonify(self.orchestrator.get_stats())
+
+        @self.app.route('/load')
+        def load():
+            if self.load_controller is None:
+                return jsonify({'enabled': False, 'cameras': {}})
+            return jsonify(dict(self.load_controller.get_decisions(), enabled=True))
+
+        @self.app.route('/transcode', methods=['GET'])
+        def transcode_queue():
+            if self.transcoder is None:
+                return jsonify({'enabled': False, 'jobs': []})
+            return jsonify(dict(self.transcoder.get_stats(), enabled=True))
+
+        @self.app.route('/transcode', methods=['POST'])
+        def transcode_submit():
+            if self.transcoder is None:
+                return jsonify({'error': 'transcoding disabled'}), 503
+            data = request.get_json(silent=True) or {}
+            if not data.get('input') or not isinstance(data['input'], str):
+                return jsonify({'error': 'missing input'}), 400
+            # ffmpeg overwrites its output and delete_source removes the input, so both stay inside the
+            # clip directories: the input must resolve into one and the output is always <input>_x264.mp4
+            input_path = os.path.realpath(data['input'])
+            if not any(os.path.commonpath([input_path, d]) == d for d in self.clip_dirs):
+                return jsonify({'error': 'input must be inside a clip directory'}), 400
+            if not os.path.isfile(input_path):
+                return jsonify({'error': 'input not found'}), 400
+            priority = data.get('priority', 'archive')
+            if priority not in PRIORITIES:
+                return jsonify({'error': f"priority must be one of {', '.join(PRIORITIES)}"}), 400
+            crf = data.get('crf')
+            if crf is not None and (isinstance(crf, bool) or not isinstance(crf, int) or not 0 <= crf <= 51):
+                return jsonify({'error': 'crf must be an integer between 0 and 51'}), 400
+            job_id = self.transcoder.submit(input_path, priority=priority, crf=crf)
+            return jsonify({'id': job_id, 'status': 'queued'})
+
+        @self.app.route('/transcode/<job_id>', methods=['GET'])
+        def transcode_job(job_id):
+            job = self.transcoder.get_job(job_id) if self.transcoder else None
+            if job is None:
+                return jsonify({'error': 'unknown job'}), 404
+            return jsonify(job)
+
+        @self.app.route('/transcode/<job_id>', methods=['DELETE'])
+        def transcode_cancel(job_id):
+            if self.transcoder is None or not self.transcoder.cancel(job_id):
+                return jsonify({'error': 'unknown or finished job'}), 404
+            return jsonify({'id': job_id, 'status': 'cancelled'})
+
+        @self.app.route('/notifications')
+        def notifications():
+            cameras = {}
+            if self.orchestrator is not None:
+                cameras = {name: cam.get('notifications', {})
+                           for name, cam in self.orchestrator.get_stats()['cameras'].items()}
+            digest = self.alert_digest.get_stats() if self.alert_digest is not None else None
+            return jsonify({'system': self.notifier.get_stats(), 'cameras': cameras, 'digest': digest})
+
+        @self.app.route('/events')
+        def events():
+            # ?camera=&class=&start=&end=&limit=&cursor= (timestamps in epoch seconds, newest first)
+            if self.event_db is None:
+                return jsonify({'error': 'event store disabled'}), 503
+            try:
+                return jsonify(query_events(self.event_db, start=request.args.get('start', type=float),
+                                            end=request.args.get('end', type=float),
+                                            camera=request.args.get('camera'), cls=request.args.get('class'),
+                                            limit=request.args.get('limit', 100, type=int),
+                                            cursor=request.args.get('cursor')))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        @self.app.route('/uploads', methods=['GET'])
+        def uploads():
+            if self.uploader is None:
+                return jsonify({'enabled': False})
+            return jsonify(dict(self.uploader.get_stats(), enabled=True))
+
+        @self.app.route('/uploads/retry', methods=['POST'])
+        def uploads_retry():
+            if self.uploader is None:
+                return jsonify({'error': 'uploading disabled'}), 503
+            return jsonify({'requeued': self.uploader.retry_failed()})
+
+        @self.app.route('/faces', methods=['GET'])
+        def faces():
+            if self.orchestrator is None:
+                return jsonify({'faces': {}})
+            return jsonify({'faces': self.orchestrator.face_identities()})
+
+        @self.app.route('/faces', methods=['POST'])
+        def enroll_face():
+            # multipart/form-data: name=<label>, image=<file>
+            if self.orchestrator is None:
+                return jsonify({'error': 'face enrollment not available'}), 503
+            name = request.form.get('name', '')
+            try:
+                self.orchestrator.check_face_name(name)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except RuntimeError as e:
+                return jsonify({'error': str(e)}), 503
+            upload = request.files.get('image')
+            if upload is None:
+                return jsonify({'error': 'missing image'}), 400
+            frame = cv2.imdecode(np.frombuffer(upload.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                return jsonify({'error': 'unreadable image'}), 400
+            try:
+                result = self.orchestrator.enroll_face(name, frame)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except RuntimeError as e:
+                return jsonify({'error': str(e)}), 503
+            return jsonify(dict(result, status='enrolled'))
+
+        @self.app.route('/faces/<name>', methods=['DELETE'])
+        def remove_face(name):
+            if self.orchestrator is None:
+                return jsonify({'error': 'face enrollment not available'}), 503
+            try:
+                deleted = self.orchestrator.remove_face(name)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except RuntimeError as e:
+                return jsonify({'error': str(e)}), 503
+            return jsonify({'name': name, 'status': 'removed', 'images_deleted': deleted})
+
         @self.app.route('/notify', methods=['POST'])
         def notify():
             data = request.get_json()
@@ -0,0 +1,164 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+
+class BatchInferenceServer:
+    """
+    Central inference service that batches frames from several cameras.
+
+    Cameras submit frames; a single worker thread collects whatever is pending
+    within ``max_wait_ms`` of the oldest request (up to ``max_batch`` frames),
+    runs them through ``detector.detect_batch`` in one call and resolves each
+    camera's Future with its own detections.
+
+    Args:
+        detector: Object with ``detect_batch(frames) -> list of detection lists`` (e.g. AdvancedYOLODetector).
+        max_batch (int): Maximum frames per batch (default 8).
+        max_wait_ms (float): How long the first frame of a batch may wait for others (default 10 ms).
+    """
+    def __init__(self, detector, max_batch=8, max_wait_ms=10):
+        self.detector = detector
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.stats = {'batches': 0, 'frames': 0, 'failed_batches': 0, 'failed_frames': 0, 'timeouts': 0,
+                      'last_error': None, 'last_batch_size': 0, 'max_batch_size': 0,
+                      'queue_wait_ms_total': 0.0, 'batch_latency_ms_total': 0.0, 'last_batch_latency_ms': 0.0}
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self._loop, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+    def submit(self, frame):
+        """
+        Queue a frame for the next batch.
+
+        Returns:
+            Future: Resolves to the detections for this frame.
+        """
+        future = Future()
+        self.requests.put((frame, time.time(), future))
+        return future
+
+    def _collect(self):
+        try:
+            first = self.requests.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[1] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.time()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while self.running:
+            batch = self._collect()
+            if not batch:
+                continue
+            start = time.time()
+            try:
+                results = self.detector.detect_batch([frame for frame, _, _ in batch])
+            except Exception as e:
+                print(f"[ERROR] Batch inference of {len(batch)} frames failed: {e}")
+                with self.lock:
+                    self.stats['failed_batches'] += 1
+                    self.stats['last_error'] = str(e)
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            latency_ms = (time.time() - start) * 1000
+            for (_, _, future), detections in zip(batch, results):
+                future.set_result(detections)
+            with self.lock:
+                self.stats['batches'] += 1
+                self.stats['frames'] += len(batch)
+                self.stats['last_batch_size'] = len(batch)
+                self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+                self.stats['queue_wait_ms_total'] += sum((start - ts) * 1000 for _, ts, _ in batch)
+                self.stats['batch_latency_ms_total'] += latency_ms
+                self.stats['last_batch_latency_ms'] = round(latency_ms, 2)
+
+    def record_failure(self, timeout=False):
+        """Count a frame whose result never reached its camera (model error or ``timeout``)."""
+        with self.lock:
+            self.stats['timeouts' if timeout else 'failed_frames'] += 1
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: batches, frames, average/last/max batch size, average queue wait and per-batch latency (ms),
+            failed batches/frames, timeouts and the last model error.
+        """
+        with self.lock:
+            s = dict(self.stats)
+        batches = s['batches'] or 1
+        frames = s['frames'] or 1
+        return {
+            'batches': s['batches'],
+            'frames': s['frames'],
+            'avg_batch_size': round(s['frames'] / batches, 2),
+            'last_batch_size': s['last_batch_size'],
+            'max_batch_size': s['max_batch_size'],
+            'avg_queue_wait_ms': round(s['queue_wait_ms_total'] / frames, 2),
+            'avg_batch_latency_ms': round(s['batch_latency_ms_total'] / batches, 2),
+            'last_batch_latency_ms': s['last_batch_latency_ms'],
+            'pending': self.requests.qsize(),
+            'failed_batches': s['failed_batches'],
+            'failed_frames': s['failed_frames'],
+            'timeouts': s['timeouts'],
+            'last_error': s['last_error'],
+        }
+
+
+class BatchedDetector:
+    """
+    Per-camera detector facade over a shared BatchInferenceServer.
+
+    Has the same ``detect(frame)`` interface as the other detectors; the shared
+    model runs with the lowest threshold of its cameras and each camera applies
+    its own confidence threshold and target classes here, so a camera threshold
+    below the shared model's (the lowest configured when the server was built)
+    has no effect. A batch that fails or does not finish within ``timeout``
+    yields no detections for that frame (counted in the server stats) instead
+    of stopping the camera.
+
+    Args:
+        server (BatchInferenceServer): Shared server.
+        conf_threshold (float): This camera's confidence threshold.
+        target_classes (list, optional): Class names to keep (None keeps all).
+        timeout (float): Seconds to wait for a batch result (default 5).
+    """
+    def __init__(self, server, conf_threshold=0.5, target_classes=None, timeout=5.0):
+        self.server = server
+        self.conf_threshold = conf_threshold
+        self.target_classes = set(target_classes) if target_classes else None
+        self.timeout = timeout
+
+    def detect(self, frame):
+        try:
+            detections = self.server.submit(frame).result(timeout=self.timeout)
+        except FutureTimeout:
+            self.server.record_failure(timeout=True)
+            return []
+        except Exception:
+            self.server.record_failure()
+            return []
+        return [d for d in detections
+                if d[4] >= self.conf_threshold and (self.target_classes is None or d[5] in self.target_classes)]
@@ -0,0 +1,466 @@
+import os
+import time
+from collections import Counter
+import cv2
+from frame_grabber import FrameGrabber
+from detection_gate import DetectionGate
+from tracker import MultiObjectTracker
+
+KNOWN_FACES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../known_faces'))
+
+
+class CameraPipeline:
+    """
+    Capture -> motion -> person detection loop for a single camera.
+
+    One pipeline is created per entry in ``config['cameras']``. It owns the
+    camera's MotionDetector, person detector, Notifier and (optional)
+    FaceRecognizer; everything shared between cameras (live feed, API server)
+    is reached through the ``publish_frame`` callback so the same pipeline can
+    run in a thread or in a separate process.
+
+    Args:
+        cam_cfg (dict): Camera section from config.yaml.
+        config (dict): Full configuration (global options such as headless).
+        stop_flag (Event): threading/multiprocessing Event; set to stop the loop.
+        publish_frame (callable): Called as ``publish_frame(camera, frame)`` with the annotated
+            frame while a person is present, and ``publish_frame(camera, None)`` once the live
+            feed timeout expires.
+        video_path (str, optional): Video file to use instead of the camera.
+        report_stats (callable, optional): Called as ``report_stats(camera, stats)`` about once
+            per second (used by the process orchestrator to ship stats to the parent).
+        person_detector (optional): Pre-built detector (e.g. a BatchedDetector sharing one model
+            between cameras); built from ``cam_cfg['detector']`` when omitted.
+        control_queue (Queue, optional): Quality settings pushed by the LoadController, face
+            gallery updates (``{'face': (op, name, encoding)}``) and edited camera settings
+            (``{'config': cam_cfg}``) from the parent process (process mode); applied between frames.
+        on_clip (callable, optional): Called as ``on_clip(camera, path, info)`` when an event clip
+            has been written (e.g. to queue it for transcoding).
+        on_alert (callable, optional): Called as ``on_alert(camera, event)`` instead of notifying
+            from this camera, with ``event = {'classes': {label: count}, 'names': [...], 'ts': time}``
+            (used to merge alerts of all cameras into one digest).
+        face_gallery (tuple, optional): Known faces ``(names, encodings)`` loaded once by the
+            orchestrator; each camera then builds its index without refreshing the cache itself.
+        show_frame (callable, optional): Called as ``show_frame(camera, frame)`` with the frame to
+            display and ``show_frame(camera, None)`` to close the window, instead of using OpenCV
+            windows from this thread (HighGUI is not thread-safe; thread mode draws on the main thread).
+    """
+    def __init__(self, cam_cfg, config, stop_flag, publish_frame, video_path=None, report_stats=None,
+                 person_detector=None, control_queue=None, on_clip=None,
+                 on_alert=None, show_frame=None, face_gallery=None):
+        self.cam_cfg = cam_cfg
+        self.config = config
+        self.stop_flag = stop_flag
+        self.publish_frame = publish_frame
+        self.video_path = video_path
+        self.report_stats = report_stats
+        self.control_queue = control_queue
+        self.on_clip = on_clip
+        self.on_alert = on_alert
+        self.show_frame = show_frame
+        self.face_gallery = face_gallery
+        self.quality = {}
+        self.name = cam_cfg.get('name', f"Camera{cam_cfg.get('camera_index', 0)}")
+        self.camera_index = cam_cfg.get('camera_index', 0)
+        self.log_file = cam_cfg.get('log_file', 'camera_log.txt')
+        self.live_feed_timeout = cam_cfg.get('live_feed_timeout', 15)
+        self.headless = config.get('headless', False)
+        self.global_log = os.path.abspath(os.path.join(os.path.dirname(__file__), '../motiondetection.log'))
+        self.detector = None
+        self.person_detector = person_detector
+        self.notifier = None
+        self.snapshots = None  # SnapshotEncoder for alert attachments
+        self.events = None  # EventStore recording every detector result
+        self.face_recog = None
+        self.face_worker = None
+        self.frame_buffer = cam_cfg.get('frame_buffer', 2)
+        self.grabber = None
+        # Motion gating: only run the person detector when something changed
+        gate_cfg = cam_cfg.get('gating', {}) or {}
+        self.gate = DetectionGate(mode=gate_cfg.get('mode', 'motion'),
+                                  keepalive_every=gate_cfg.get('keepalive_every', 5),
+                                  sanity_interval=gate_cfg.get('sanity_interval', 30))
+        # Tracker keeps boxes (with stable IDs and dwell time) alive between detector runs
+        track_cfg = cam_cfg.get('tracking', {}) or {}
+        self.tracker = None
+        if track_cfg.get('enabled', True):
+            self.tracker = MultiObjectTracker(max_age=track_cfg.get('max_age', 2.0),
+                                              iou_threshold=track_cfg.get('iou_threshold', 0.3),
+                                              min_hits=track_cfg.get('min_hits', 1))
+        self.alert_min_dwell = track_cfg.get('alert_min_dwell', 0)
+        self.recorder = None
+        self.tracks = []
+        self.stats = {'frames': 0, 'fps': 0.0, 'persons': 0, 'running': False,
+                      'dropped_frames': 0, 'latency_ms': 0.0, 'active_tracks': 0}
+
+    def setup(self):
+        """
+        Build the per-camera components. Imports are done here so that a
+        process-mode child only pays for what it actually uses.
+        """
+        from utils import setup_logger, ensure_log_file
+        from motion import MotionDetector
+        from notifier import Notifier
+
+        ensure_log_file(self.log_file)
+        logger = setup_logger(self.log_file)
+        if self.on_alert is None:
+            self.notifier = Notifier(self.cam_cfg.get('notifications', {}),
+                                     outbox_cfg=self.config.get('notification_outbox'), name=self.name)
+        from event_store import EventStore, event_store_path
+        ev_path = event_store_path(self.config)
+        if ev_path:
+            ev_cfg = self.config['event_store']
+            self.events = EventStore(ev_path, batch_size=ev_cfg.get('batch_size', 200),
+                                     flush_interval=ev_cfg.get('flush_interval', 1.0),
+                                     max_queue=ev_cfg.get('max_queue', 10000),
+                                     retention_days=ev_cfg.get('retention_days', 30))
+        snap_cfg = self.config.get('snapshot', {}) or {}
+        if snap_cfg.get('enabled', False):
+            from snapshot import SnapshotEncoder
+            self.snapshots = SnapshotEncoder(max_width=snap_cfg.get('max_width', 640),
+                                             quality=snap_cfg.get('quality', 80))
+        # Face recognition is optional: only enable if library and known_faces/ are present.
+        # An empty gallery is kept so identities enrolled over the API take effect immediately.
+        try:
+            from face_recognizer import FaceRecognizer
+        except ImportError:
+            FaceRecognizer = None
+        face_cfg = self.config.get('face_recognition', {}) or {}
+        if FaceRecognizer and os.path.isdir(KNOWN_FACES_DIR):
+            try:
+                self.face_recog = FaceRecognizer(KNOWN_FACES_DIR, tolerance=face_cfg.get('tolerance', 0.6),
+                                                 index_options=face_cfg.get('index'), gallery=self.face_gallery)
+            except Exception:
+                self.face_recog = None
+        if self.face_recog is not None:
+            from face_worker import FaceRecognitionWorker
+            self.face_worker = FaceRecognitionWorker(self.face_recog,
+                                                     max_workers=face_cfg.get('workers', 1),
+                                                     max_pending=face_cfg.get('max_pending', 2),
+                                                     timeout=face_cfg.get('timeout', 1.5))
+        self.detector = MotionDetector(
+            sensitivity=self.cam_cfg.get('sensitivity', 800),
+            threshold=self.cam_cfg.get('threshold', 100),
+            reference_update=self.cam_cfg.get('reference_update', True),
+            camera_index=self.camera_index,
+            logger=logger,
+            video_path=self.video_path,
+            analysis_scale=self.cam_cfg.get('analysis_scale', 1.0)
+        )
+        self.detector.on_person_detected = self.on_person_detected
+        # Event clips with pre-roll from an in-memory JPEG ring
+        rec_cfg = self.cam_cfg.get('recording', {}) or {}
+        if rec_cfg.get('enabled', False):
+            from clip_recorder import ClipRecorder, clip_output_dir
+            self.recorder = ClipRecorder(self.name, clip_output_dir(self.cam_cfg),
+                                         pre_roll=rec_cfg.get('pre_roll', 10),
+                                         post_roll=rec_cfg.get('post_roll', 10),
+                                         max_memory_mb=rec_cfg.get('max_memory_mb', 64),
+                                         fps=rec_cfg.get('fps', 10),
+                                         jpeg_quality=rec_cfg.get('jpeg_quality', 80),
+                                         max_clip_seconds=rec_cfg.get('max_clip_seconds', 300),
+                                         on_clip=self._clip_written)
+        if self.person_detector is None:
+            self.person_detector = self._build_person_detector()
+
+    def _build_person_detector(self):
+        from yolo_person_detector import YoloPersonDetector
+        # Initialize detectors (supports classic YOLOv3, advanced YOLOv5/v8 and their ONNX exports)
+        det_cfg = self.cam_cfg.get('detector', {})
+        det_type = det_cfg.get('type', 'yolo_v3')
+        if det_type == 'onnx':
+            from onnx_yolo import ONNXYOLODetector
+            return ONNXYOLODetector(
+                model_path=det_cfg.get('model_path'),
+                conf_threshold=det_cfg.get('conf_threshold', 0.5),
+                target_classes=det_cfg.get('target_classes', ['person']),
+                input_size=det_cfg.get('input_size', 640),
+                backend=det_cfg.get('backend', 'opencv'),
+                quantize=det_cfg.get('quantize', False)
+            )
+        advanced = None
+        if det_type in ('yolo_v5', 'yolo_v8'):
+            try:
+                from advanced_yolo import AdvancedYOLODetector
+                advanced = AdvancedYOLODetector
+            except ImportError:
+                advanced = None
+        if advanced is not None:
+            return advanced(
+                model_path=det_cfg.get('model_path'),
+                conf_threshold=det_cfg.get('conf_threshold', 0.5),
+                target_classes=det_cfg.get('target_classes', ['person']),
+                device=det_cfg.get('device', None)
+            )
+        return YoloPersonDetector(
+            conf_threshold=det_cfg.get('conf_threshold', 0.5)
+        )
+
+    def on_person_detected(self, frame=None, persons=None):
+        """
+        Default person-detection event. With face recognition enabled the person crops are
+        handed to the FaceRecognitionWorker and the alert is sent when names arrive (or
+        without names after the worker's timeout); otherwise the alert is sent right away.
+        The annotated snapshot is encoded here, once, before the frame is drawn on.
+        """
+        classes = Counter((p[5] if len(p) > 5 and p[5] else 'person') for p in (persons or [])) or {'person': 1}
+        image = None
+        if self.snapshots is not None and frame is not None:
+            image = self.snapshots.encode(frame, persons)
+        if self.face_worker is not None and frame is not None and len(self.face_recog.index):
+            boxes = [p for p in (persons or []) if len(p) == 5 or p[5] in (None, 'person')]
+            self.face_worker.submit(frame, boxes, lambda matches, status: self._send_alert(matches, classes, image))
+            return
+        self._send_alert([], classes, image)
+
+    def _send_alert(self, matches, classes=None, image=None):
+        names = [m['name'] for m in matches if m.get('name') and m['name'] != 'Unknown']
+        names_str = ', '.join(names) if names else 'Unknown'
+        subject = f"ALERT: Person Detected ({names_str}) - {self.name}"
+        message = f"{names_str} detected by {self.name} at {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        # Append to global detection log
+        try:
+            with open(self.global_log, 'a') as gl:
+                gl.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {subject} | {message}\n")
+        except Exception:
+            pass
+        if self.on_alert is not None:
+            self.on_alert(self.name, {'classes': dict(classes or {'person': 1}), 'names': names, 'ts': time.time(),
+                                      'image': image})
+            return
+        self.notifier.notify_all(subject, message, image=image)
+
+    def _clip_written(self, path, info):
+        if self.on_clip is not None:
+            self.on_clip(self.name, path, info)
+
+    def apply_quality(self, settings):
+        """
+        Apply LoadController settings: ``detector_fps`` caps detector runs (0 = unlimited) and
+        ``input_size`` changes the network resolution if the detector supports it.
+        """
+        self.quality = dict(settings)
+        if 'detector_fps' in settings:
+            self.gate.max_fps = settings['detector_fps'] or 0
+        if settings.get('input_size') and hasattr(self.person_detector, 'set_input_size'):
+            self.person_detector.set_input_size(settings['input_size'])
+
+    def apply_config(self, cam_cfg):
+        """
+        Apply an edited camera section of config.yaml to the running pipeline: motion
+        ``sensitivity``/``threshold``/``reference_update``, detector ``conf_threshold``/``nms_threshold``,
+        notification channels, ``live_feed_timeout`` and ``tracking.alert_min_dwell``. Other
+        settings (camera index, detector model, recording) still need a restart.
+        """
+        self.cam_cfg = cam_cfg
+        self.live_feed_timeout = cam_cfg.get('live_feed_timeout', 15)
+        self.alert_min_dwell = (cam_cfg.get('tracking', {}) or {}).get('alert_min_dwell', 0)
+        if self.detector is not None:
+            self.detector.sensitivity = cam_cfg.get('sensitivity', 800)
+            self.detector.threshold = cam_cfg.get('threshold', 100)
+            self.detector.reference_update = cam_cfg.get('reference_update', True)
+        det_cfg = cam_cfg.get('detector', {}) or {}
+        for key in ('conf_threshold', 'nms_threshold'):
+            if key in det_cfg and hasattr(self.person_detector, key):
+                setattr(self.person_detector, key, det_cfg[key])
+        if self.notifier is not None:
+            self.notifier.update_config(cam_cfg.get('notifications', {}))
+
+    def update_face_gallery(self, op, name, encoding=None):
+        """Apply a runtime enrollment ('add', name, encoding) or removal ('remove', name) to the face index."""
+        if self.face_recog is None:
+            return
+        if op == 'add':
+            self.face_recog.add_identity(name, encoding)
+        elif op == 'remove':
+            self.face_recog.remove_identity(name)
+
+    def _poll_control(self):
+        while True:
+            try:
+                message = self.control_queue.get_nowait()
+            except Exception:
+                return
+            if 'face' in message:
+                self.update_face_gallery(*message['face'])
+            elif 'config' in message:
+                self.apply_config(message['config'])
+            else:
+                self.apply_quality(message)
+
+    def get_stats(self):
+        """Return a copy of the per-camera counters."""
+        if self.grabber is not None:
+            self.stats['dropped_frames'] = self.grabber.get_stats()['dropped']
+        self.stats['inference'] = self.gate.get_stats()
+        if self.face_worker is not None:
+            self.stats['face_recognition'] = self.face_worker.get_stats()
+        if self.recorder is not None:
+            self.stats['recording'] = self.recorder.get_stats()
+        if self.notifier is not None:
+            self.stats['notifications'] = self.notifier.get_stats()
+        if self.snapshots is not None:
+            self.stats['snapshots'] = self.snapshots.get_stats()
+        if self.events is not None:
+            self.stats['events'] = self.events.get_stats()
+        return dict(self.stats)
+
+    def _update_fps(self, window_start, window_frames, now):
+        elapsed = now - window_start
+        if elapsed < 1.0:
+            return window_start, window_frames
+        self.stats['fps'] = round(window_frames / elapsed, 2)
+        if self.report_stats:
+            self.report_stats(self.name, self.get_stats())
+        return now, 0
+
+    def _close_window(self, window_name):
+        if self.show_frame is not None:
+            self.show_frame(self.name, None)
+        else:
+            cv2.destroyWindow(window_name)
+
+    def run(self):
+        """
+        Open the capture and process frames until the stream ends or ``stop_flag`` is set.
+        """
+        if self.detector is None:
+            self.setup()
+        # Live cameras drop stale frames; video files are replayed frame by frame
+        self.grabber = FrameGrabber(self.video_path if self.video_path else self.camera_index,
+                                    buffer_size=self.frame_buffer, drop_frames=not self.video_path)
+        if not self.grabber.start():
+            print(f"[ERROR] Unable to open {self.name} ({self.video_path or self.camera_index})")
+            return
+        if self.recorder is not None:
+            self.recorder.start()
+        if self.events is not None:
+            self.events.start()
+        detector = self.detector
+        window_name = f'Live Feed - {self.name}'
+        last_person_time = 0
+        window_open = False
+        feed_published = False
+        last_persons = []
+        window_start = time.time()
+        window_frames = 0
+        self.stats['running'] = True
+        try:
+            while not self.stop_flag.is_set():
+                if self.control_queue is not None:
+                    self._poll_control()
+                ret, frame, captured_at = self.grabber.read()
+                if not ret:
+                    if self.grabber.ended:
+                        break
+                    continue
+
+                # Process frame for motion detection
+                detected, out_frame, _, _ = detector.process_frame(frame)
+
+                # Detect persons in the frame (gated on motion / active person)
+                ran = self.gate.should_run(detected, bool(last_persons))
+                detections = self.person_detector.detect(frame) if ran else []
+                now = time.time()
+                track_ids = []
+                if self.tracker is not None:
+                    # Tracks propagate boxes on frames where the detector was skipped
+                    self.tracks = self.tracker.update(detections, now) if ran else self.tracker.predict(now)
+                    persons = [t.to_tuple() for t in self.tracks]
+                    track_ids = [t.id for t in self.tracks]
+                    self.stats['active_tracks'] = len(self.tracks)
+                elif ran:
+                    persons = detections
+                else:
+                    # Keep the last boxes on screen between keep-alive runs
+                    persons = last_persons
+                last_persons = persons
+                person_present = len(persons) > 0
+                if ran and person_present and self.events is not None:
+                    self.events.record(self.name, persons, now, track_ids)
+                self.stats['frames'] += 1
+                self.stats['latency_ms'] = round((now - captured_at) * 1000, 1)
+                window_frames += 1
+                window_start, window_frames = self._update_fps(window_start, window_frames, now)
+
+                if person_present:
+                    last_person_time = now
+                    self.stats['persons'] += 1
+
+                    # Send notification if not already sent (and a track has been in view long enough)
+                    dwell_ok = self.tracker is None or any(t.dwell(now) >= self.alert_min_dwell for t in self.tracks)
+                    if dwell_ok and not getattr(detector, 'person_alert_sent', False):
+                        detector.person_alert_sent = True
+                        detector.on_person_detected(frame, persons)
+                    # Keep the clip going while the person is in view (post-roll counts from the last sighting)
+                    if dwell_ok and self.recorder is not None:
+                        self.recorder.trigger(now)
+
+                    # Draw bounding boxes for detected persons (supports classic and advanced detectors)
+                    for i, p in enumerate(persons):
+                        # p can be (x1, y1, x2, y2, conf) or (x1, y1, x2, y2, conf, label)
+                        if len(p) == 5:
+                            x1, y1, x2, y2, conf = p
+                            label = None
+                        else:
+                            x1, y1, x2, y2, conf, label = p
+                        if track_ids:
+                            label = f"{label} #{track_ids[i]}"
+                        cv2.rectangle(out_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+                        if label:
+                            cv2.putText(out_frame, str(label), (x1, max(y1 - 5, 0)),
+                                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+                    # Names from the face worker, once they are known
+                    if self.face_worker is not None:
+                        for m in self.face_worker.latest():
+                            left, top, right, bottom = m['box']
+                            cv2.rectangle(out_frame, (left, top), (right, bottom), (255, 0, 0), 1)
+                            cv2.putText(out_frame, m['name'], (left, min(bottom + 15, out_frame.shape[0] - 1)),
+                                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
+
+                    if not self.headless:
+                        if self.show_frame is not None:
+                            self.show_frame(self.name, out_frame)
+                        else:
+                            if not window_open:
+                                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+                            cv2.imshow(window_name, out_frame)
+                        window_open = True
+
+                    self.publish_frame(self.name, out_frame)
+                    feed_published = True
+                elif now - last_person_time > self.live_feed_timeout:
+                    if window_open:
+                        self._close_window(window_name)
+                        window_open = False
+                    if feed_published:
+                        self.publish_frame(self.name, None)
+                        feed_published = False
+                        detector.person_alert_sent = False
+
+                if self.recorder is not None:
+                    # Annotated frame; it is not modified after this point
+                    self.recorder.add_frame(out_frame, captured_at)
+
+                if window_open and self.show_frame is None and cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.stop_flag.set()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.grabber.stop()
+            if self.recorder is not None:
+                self.recorder.stop()
+            if self.events is not None:
+                self.events.stop()
+            if self.face_worker is not None:
+                self.face_worker.shutdown()
+            if self.notifier is not None:
+                self.notifier.close()
+            if window_open:
+                self._close_window(window_name)
+            if feed_published:
+                self.publish_frame(self.name, None)
+            self.stats['running'] = False
+            if self.report_stats:
+                self.report_stats(self.name, self.get_stats())
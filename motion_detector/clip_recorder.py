@@ -0,0 +1,207 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+
+
+def clip_output_dir(cam_cfg):
+    """Absolute clip directory of a camera (``recording.output_dir``, default clips/ at the project root)."""
+    rec_cfg = cam_cfg.get('recording', {}) or {}
+    return os.path.abspath(rec_cfg.get('output_dir') or os.path.join(os.path.dirname(__file__), '../clips'))
+
+
+def clip_dirs(config):
+    """Real paths of the default clip directory and every camera's clip directory."""
+    dirs = [clip_output_dir({})] + [clip_output_dir(c) for c in config.get('cameras', []) or []]
+    return list(dict.fromkeys(os.path.realpath(d) for d in dirs))
+
+
+class ClipRecorder:
+    """
+    Per-camera event clip recorder with a pre-roll kept as JPEG in memory.
+
+    ``add_frame()`` only hands the frame reference to a background thread, which
+    samples it down to ``fps``, JPEG encodes it and appends it to a ring bounded
+    by both ``pre_roll`` seconds and ``max_memory_mb`` (a 720p JPEG is ~50-100 KB
+    instead of 2.7 MB of raw BGR). ``trigger()`` starts an event: the ring is
+    taken as pre-roll and frames keep being collected until ``post_roll`` seconds
+    after the last trigger; the clip is then decoded and written by a separate
+    writer thread, so neither capture nor the ring ever wait on the disk. An event
+    longer than ``max_clip_seconds`` (a person staying in view) is closed and
+    continued in a new clip, which bounds the frames held per event.
+
+    Args:
+        camera (str): Camera name (used in clip file names).
+        output_dir (str): Directory for clip files.
+        pre_roll (float): Seconds kept before an event (default 10).
+        post_roll (float): Seconds recorded after the last trigger (default 10).
+        max_memory_mb (float): Memory budget of the ring in MB (default 64).
+        fps (float): Frames per second kept (default 10; 0 keeps every frame).
+        jpeg_quality (int): JPEG quality of buffered frames (default 80).
+        codec (str): FourCC of the clip file (default 'mp4v').
+        extension (str): Clip file extension (default '.mp4').
+        max_clip_seconds (float): Longest clip; longer events are split into several clips (default 300).
+        on_clip (callable, optional): Called as ``on_clip(path, info)`` after a clip is written.
+    """
+    def __init__(self, camera, output_dir, pre_roll=10.0, post_roll=10.0, max_memory_mb=64, fps=10,
+                 jpeg_quality=80, codec='mp4v', extension='.mp4', max_clip_seconds=300, on_clip=None):
+        self.camera = camera
+        self.output_dir = output_dir
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.codec = codec
+        self.extension = extension
+        self.max_clip_seconds = max_clip_seconds
+        self.on_clip = on_clip
+        self.ring = deque()  # (timestamp, jpeg bytes)
+        self.ring_bytes = 0
+        self.event = None  # {'started', 'until', 'frames', 'part'} while an event is being collected
+        self.lock = threading.Lock()
+        self.frames = queue.Queue(maxsize=4)
+        self.clips = queue.Queue()
+        self.last_sample = 0.0
+        self.running = False
+        self.threads = []
+        self.stats = {'frames_buffered': 0, 'memory_bytes': 0, 'buffered_seconds': 0.0,
+                      'max_memory_bytes': self.max_memory, 'frames_dropped': 0, 'frames_evicted': 0,
+                      'clips_written': 0, 'clips_failed': 0, 'last_clip': None, 'recording': False}
+
+    def start(self):
+        self.running = True
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.threads = [threading.Thread(target=self._encode_loop, name=f'clip-encode-{self.camera}', daemon=True),
+                        threading.Thread(target=self._write_loop, name=f'clip-write-{self.camera}', daemon=True)]
+        for t in self.threads:
+            t.start()
+
+    def stop(self, timeout=10):
+        """Stop recording; an event still collecting post-roll is written with what it has."""
+        self.running = False
+        self.frames.put(None)
+        self.threads[0].join(timeout)
+        with self.lock:
+            event, self.event = self.event, None
+        if event is not None:
+            self.clips.put(event)
+        self.clips.put(None)
+        self.threads[1].join(timeout)
+
+    def add_frame(self, frame, ts=None):
+        """
+        Offer a frame to the recorder (cheap: no copy, no encode on the caller's thread).
+        The caller must not modify the frame afterwards.
+        """
+        ts = time.time() if ts is None else ts
+        if self.fps and ts - self.last_sample < 1.0 / self.fps:
+            return
+        self.last_sample = ts
+        try:
+            self.frames.put_nowait((frame, ts))
+        except queue.Full:
+            with self.lock:
+                self.stats['frames_dropped'] += 1
+
+    def trigger(self, ts=None):
+        """Start an event (pre-roll + post-roll), or extend the post-roll of the current one."""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            if self.event is None:
+                self.event = {'started': ts, 'until': ts + self.post_roll, 'frames': list(self.ring), 'part': 1}
+                self.stats['recording'] = True
+            else:
+                self.event['until'] = ts + self.post_roll
+
+    def _encode_loop(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            frame, ts = item
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                continue
+            self._append(ts, jpeg.tobytes())
+
+    def _append(self, ts, data):
+        with self.lock:
+            self.ring.append((ts, data))
+            self.ring_bytes += len(data)
+            # Bound the ring by time and by memory
+            while self.ring and (self.ring_bytes > self.max_memory or self.ring[0][0] < ts - self.pre_roll):
+                _, old = self.ring.popleft()
+                self.ring_bytes -= len(old)
+                self.stats['frames_evicted'] += 1
+            event = self.event
+            if event is not None:
+                if ts <= event['until'] and event['frames'] and ts - event['frames'][0][0] >= self.max_clip_seconds:
+                    # Clip is full: hand it to the writer and continue the event in a new one
+                    self.clips.put(event)
+                    self.event = {'started': ts, 'until': event['until'], 'frames': [(ts, data)],
+                                  'part': event['part'] + 1}
+                elif ts <= event['until']:
+                    event['frames'].append((ts, data))
+                else:
+                    self.event = None
+                    self.stats['recording'] = False
+                    self.clips.put(event)
+
+    def _write_loop(self):
+        while True:
+            event = self.clips.get()
+            if event is None:
+                return
+            path = self._write_clip(event)
+            with self.lock:
+                self.stats['clips_written' if path else 'clips_failed'] += 1
+                if path:
+                    self.stats['last_clip'] = path
+            if path and self.on_clip is not None:
+                frames = event['frames']
+                self.on_clip(path, {'camera': self.camera, 'started': event['started'],
+                                    'start': frames[0][0], 'end': frames[-1][0], 'frames': len(frames),
+                                    'part': event.get('part', 1)})
+
+    def _write_clip(self, event):
+        frames = event['frames']
+        if not frames:
+            return None
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(event['started']))
+        part = f"_part{event['part']}" if event.get('part', 1) > 1 else ''
+        path = os.path.join(self.output_dir, f'{self.camera}_{stamp}{part}{self.extension}')
+        span = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / span if span > 0 else (self.fps or 10)
+        writer = None
+        try:
+            for _, data in frames:
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                if writer is None:
+                    h, w = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.codec), fps, (w, h))
+                    if not writer.isOpened():
+                        print(f"[ERROR] Could not open clip writer for {path}")
+                        return None
+                writer.write(image)
+        except Exception as e:
+            print(f"[ERROR] Writing clip {path} failed: {e}")
+            return None
+        finally:
+            if writer is not None:
+                writer.release()
+        return path
+
+    def get_stats(self):
+        """Return ring memory use (bytes and seconds buffered) and clip counters."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['frames_buffered'] = len(self.ring)
+            stats['memory_bytes'] = self.ring_bytes
+            stats['buffered_seconds'] = round(self.ring[-1][0] - self.ring[0][0], 2) if self.ring else 0.0
+        return stats
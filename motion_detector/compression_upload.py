@@ -1,33 +1,230 @@
+import json
 import os
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
 
-def compress_video(input_path, output_path, crf=28):
+def _probe_duration(path):
+    """Duration of a video in seconds (via OpenCV), or None if unknown."""
+    try:
+        import cv2
+        cap = cv2.VideoCapture(path)
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+        return frames / fps if frames > 0 and fps > 0 else None
+    except Exception:
+        return None
+
+def compress_video(input_path, output_path, crf=28, preset='fast', threads=0, nice=0, on_progress=None,
+                   timeout=None, process_started=None):
     """
     Compress a video file using ffmpeg.
     :param input_path: Path to input video
     :param output_path: Path to output compressed video
     :param crf: Constant Rate Factor (lower is better quality, 23 is default, 28 is smaller)
+    :param preset: x264 preset (speed/size trade-off)
+    :param threads: Encoder threads (0 = ffmpeg default, i.e. all cores)
+    :param nice: Niceness added to the ffmpeg process (POSIX), so encoding yields CPU to detection
+    :param on_progress: Optional callback ``on_progress(fraction, speed)`` fed from ffmpeg's progress output
+    :param timeout: Seconds after which ffmpeg is killed (None = no limit)
+    :param process_started: Optional callback receiving the Popen object (e.g. to cancel it)
     :return: True if success, False otherwise
     """
+    cmd = [
+        'ffmpeg', '-y', '-nostats', '-loglevel', 'error', '-progress', 'pipe:1', '-i', input_path,
+        '-vcodec', 'libx264', '-crf', str(crf),
+        '-preset', preset, '-threads', str(threads), output_path
+    ]
+    if nice and shutil.which('nice'):
+        # nice(1) rather than preexec_fn, which can deadlock the child of a threaded process
+        cmd = ['nice', '-n', str(nice)] + cmd
+    duration = _probe_duration(input_path) if on_progress else None
     try:
-        cmd = [
-            'ffmpeg', '-y', '-i', input_path,
-            '-vcodec', 'libx264', '-crf', str(crf),
-            '-preset', 'fast', output_path
-        ]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return result.returncode == 0
+        # stderr goes to a temp file and only progress lines are parsed, so nothing accumulates in memory
+        with tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, stdin=subprocess.DEVNULL, text=True)
+            if process_started:
+                process_started(proc)
+            timer = threading.Timer(timeout, proc.kill) if timeout else None
+            if timer:
+                timer.start()
+            try:
+                speed = None
+                for line in proc.stdout:
+                    key, _, value = line.strip().partition('=')
+                    if key == 'speed':
+                        speed = value.rstrip('x') or None
+                    elif key == 'out_time_us' and on_progress and duration and value.isdigit():
+                        on_progress(min(int(value) / 1e6 / duration, 1.0), speed)
+                    elif key == 'progress' and value == 'end' and on_progress:
+                        on_progress(1.0, speed)
+                returncode = proc.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+            if returncode != 0:
+                err.seek(0)
+                tail = err.read()[-500:].decode(errors='replace').strip()
+                print(f"[ERROR] Compression of {input_path} failed ({returncode}): {tail}")
+            return returncode == 0
     except Exception as e:
         print(f"[ERROR] Compression failed: {e}")
         return False
 
-def upload_file(file_path, destination_url):
+class RateLimiter:
+    """
+    Token bucket shared by upload threads so uploads leave bandwidth for the live feed.
+
+    :param rate: Bytes per second (0 or None = unlimited)
+    :param burst: Bucket size in bytes (default: one second worth of ``rate``)
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = rate or 0
+        self.burst = burst or self.rate
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, n):
+        """Take ``n`` bytes from the bucket, sleeping until the rate allows them."""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # The bucket may go negative: the caller then waits off the debt
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class _ThrottledBody:
+    """File-like request body that feeds ``data`` to the HTTP client through a RateLimiter."""
+    def __init__(self, data, limiter):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.limiter = limiter
+
+    def __len__(self):
+        return len(self.data) - self.pos
+
+    def read(self, size=-1):
+        end = len(self.data) if size is None or size < 0 else min(len(self.data), self.pos + size)
+        block = self.data[self.pos:end].tobytes()
+        self.pos = end
+        if self.limiter is not None:
+            self.limiter.consume(len(block))
+        return block
+
+
+def _load_checkpoint(path, destination_url, stat):
+    try:
+        with open(path) as f:
+            cp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cp.get('url') != destination_url or cp.get('size') != stat.st_size or cp.get('mtime') != stat.st_mtime:
+        return None
+    return cp
+
+
+def _save_checkpoint(path, cp):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cp, f)
+    os.replace(tmp_path, path)
+
+
+def _committed_offset(response):
+    """Next byte to send according to a 308 reply's ``Range: bytes=0-N`` header."""
+    rng = response.headers.get('Range', '')
+    if rng.startswith('bytes=') and '-' in rng:
+        return int(rng.split('-')[-1]) + 1
+    return 0
+
+
+def upload_file(file_path, destination_url, chunk_size=8 * 1024 * 1024, limiter=None, checkpoint_path=None,
+                session=None, headers=None, timeout=30, retries=3, backoff=1.0):
     """
-    Placeholder for upload logic. Implement actual upload as needed (S3, FTP, HTTP, etc).
+    Resumable chunked HTTP upload.
+
+    The file is sent as a series of ``PUT destination_url`` requests carrying
+    ``Content-Range: bytes start-end/total``. The server answers ``308`` with a
+    ``Range: bytes=0-N`` header for a partial upload and ``200``/``201`` once the last
+    byte is stored (the resumable scheme used by GCS-style upload endpoints). The
+    committed offset is checkpointed in ``checkpoint_path`` after every chunk; a
+    later call for the same file (same size and mtime) asks the server for its
+    offset with ``Content-Range: bytes */total`` and continues from there.
+
     :param file_path: Path to file to upload
-    :param destination_url: URL or endpoint to upload to
+    :param destination_url: Upload URL (resumable session URL)
+    :param chunk_size: Bytes per request
+    :param limiter: Optional RateLimiter shared with other uploads
+    :param checkpoint_path: Checkpoint file (default ``<file_path>.upload``); removed on success
+    :param session: Optional requests.Session (connection reuse across chunks and files)
+    :param headers: Extra request headers (e.g. authorization)
+    :param timeout: Seconds per request
+    :param retries: Consecutive failed requests tolerated before giving up (the checkpoint is kept)
+    :param backoff: First retry delay in seconds, doubled on every retry
     :return: True if success, False otherwise
     """
-    print(f"[UPLOAD] Would upload {file_path} to {destination_url}")
-    # Implement actual upload logic here
+    import requests
+    checkpoint_path = checkpoint_path or file_path + '.upload'
+    session = session or requests.Session()
+    stat = os.stat(file_path)
+    total = stat.st_size
+    cp = _load_checkpoint(checkpoint_path, destination_url, stat)
+    resume = cp is not None
+    cp = cp or {'url': destination_url, 'size': total, 'mtime': stat.st_mtime, 'offset': 0}
+    offset = cp['offset']
+    failures = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            try:
+                if resume:
+                    # Ask the server what it has; the checkpoint can be ahead of a lost reply
+                    response = session.put(destination_url, data=b'', timeout=timeout,
+                                           headers=dict(headers or {}, **{'Content-Range': f'bytes */{total}'}))
+                else:
+                    f.seek(offset)
+                    chunk = f.read(chunk_size)
+                    end = offset + len(chunk) - 1
+                    content_range = f'bytes {offset}-{end}/{total}' if chunk else f'bytes */{total}'
+                    response = session.put(destination_url, data=_ThrottledBody(chunk, limiter), timeout=timeout,
+                                           headers=dict(headers or {}, **{'Content-Range': content_range}))
+            except requests.RequestException as e:
+                response, error = None, e
+            else:
+                error = None if response.status_code < 300 or response.status_code == 308 \
+                    else f'HTTP {response.status_code}'
+            if error is None:
+                failures = 0
+                if response.status_code in (200, 201) and (resume or end + 1 >= total):
+                    break
+                if response.status_code == 308:
+                    offset = _committed_offset(response)
+                elif not resume:
+                    offset = end + 1
+                resume = False
+                cp['offset'] = offset
+                _save_checkpoint(checkpoint_path, cp)
+                continue
+            if response is not None and 400 <= response.status_code < 500 and response.status_code != 408:
+                print(f"[ERROR] Upload of {file_path} to {destination_url} rejected: {error}")
+                return False
+            failures += 1
+            if failures > retries:
+                print(f"[ERROR] Upload of {file_path} failed at byte {offset}/{total}: {error}")
+                return False
+            time.sleep(backoff * 2 ** (failures - 1))
+            resume = True
+    try:
+        os.remove(checkpoint_path)
+    except OSError:
+        pass
     return True
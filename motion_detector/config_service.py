@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+import yaml
+
+DEFAULT_CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../config.yaml'))
+
+
+def _number(value, name, errors, low=None, high=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{name} must be a number")
+    elif (low is not None and value < low) or (high is not None and value > high):
+        errors.append(f"{name} must be between {low} and {high}")
+
+
+def validate_config(config):
+    """
+    Check the parts of config.yaml that are applied to running cameras.
+
+    Returns:
+        list: Problems found (empty when the configuration is usable).
+    """
+    if not isinstance(config, dict):
+        return ['config.yaml must be a mapping']
+    errors = []
+    cameras = config.get('cameras', [])
+    if not isinstance(cameras, list):
+        return errors + ['cameras must be a list']
+    names = set()
+    for i, cam in enumerate(cameras):
+        if not isinstance(cam, dict):
+            errors.append(f"cameras[{i}] must be a mapping")
+            continue
+        name = cam.get('name', f"Camera{cam.get('camera_index', 0)}")
+        if name in names:
+            errors.append(f"duplicate camera name {name}")
+        names.add(name)
+        for key in ('sensitivity', 'threshold', 'live_feed_timeout'):
+            if key in cam:
+                _number(cam[key], f"{name}.{key}", errors, low=0)
+        det_cfg = cam.get('detector', {}) or {}
+        if not isinstance(det_cfg, dict):
+            errors.append(f"{name}.detector must be a mapping")
+            det_cfg = {}
+        for key in ('conf_threshold', 'nms_threshold'):
+            if key in det_cfg:
+                _number(det_cfg[key], f"{name}.detector.{key}", errors, low=0, high=1)
+        if not isinstance(cam.get('notifications', {}) or {}, dict):
+            errors.append(f"{name}.notifications must be a mapping")
+    for section in ('api', 'live_feed'):
+        port = (config.get(section, {}) or {}).get('port')
+        if port is not None:
+            _number(port, f"{section}.port", errors, low=1, high=65535)
+    return errors
+
+
+class ConfigService:
+    """
+    Parsed config.yaml shared by all modules of a process.
+
+    The file is parsed and validated once; ``get()`` then only returns the cached
+    dict. A watcher thread compares the file's mtime every ``poll_interval`` seconds
+    and, when it changed, re-parses and validates it and calls every subscriber
+    with ``(new, old)``. An invalid edit is reported and ignored (the last good
+    configuration stays active), so a typo cannot take running cameras down.
+    Without the watcher thread, ``get()`` checks the mtime itself at most every
+    ``poll_interval`` seconds.
+
+    Args:
+        path (str): config.yaml path (default: the one next to the package).
+        poll_interval (float): Seconds between mtime checks (default 2).
+        validator (callable): ``validator(config)`` -> list of problems (default validate_config).
+    """
+    def __init__(self, path=None, poll_interval=2.0, validator=validate_config):
+        self.path = path or DEFAULT_CONFIG_PATH
+        self.poll_interval = poll_interval
+        self.validator = validator
+        self.config = None
+        self.mtime = None
+        self.last_check = 0.0
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.stats = {'loads': 0, 'errors': 0, 'last_error': None, 'loaded_at': None}
+
+    def get(self):
+        """
+        Return the current configuration (a shared dict: treat it as read-only).
+
+        Raises:
+            ValueError: The file is invalid and no earlier version was loaded.
+        """
+        if self.config is None or (self.thread is None and time.time() - self.last_check > self.poll_interval):
+            self.check()
+        if self.config is None:
+            raise ValueError(f"Invalid configuration in {self.path}: {self.stats['last_error']}")
+        return self.config
+
+    def subscribe(self, callback):
+        """Call ``callback(new, old)`` after every successful reload."""
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def start(self):
+        self.get()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(self.poll_interval + 1)
+            self.thread = None
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.poll_interval)
+            self.check()
+
+    def check(self):
+        """Reload the file if its mtime changed; returns True when a new configuration was published."""
+        with self.lock:
+            self.last_check = time.time()
+            try:
+                st = os.stat(self.path)
+                mtime = (st.st_mtime_ns, st.st_size)
+            except OSError as e:
+                self.stats['last_error'] = str(e)
+                return False
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime
+            try:
+                with open(self.path) as f:
+                    config = yaml.safe_load(f)
+                errors = self.validator(config)
+            except (OSError, yaml.YAMLError) as e:
+                errors = [str(e)]
+            if errors:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = '; '.join(errors)
+                print(f"[ERROR] Ignoring invalid {self.path}: {self.stats['last_error']}")
+                return False
+            old, self.config = self.config, config
+            self.stats['loads'] += 1
+            self.stats['last_error'] = None
+            self.stats['loaded_at'] = time.time()
+            subscribers = list(self.subscribers) if old is not None else []
+        for callback in subscribers:
+            try:
+                callback(config, old)
+            except Exception as e:
+                print(f"[ERROR] Applying configuration change failed: {e}")
+        return True
+
+    def get_stats(self):
+        """Return load/error counters, the last validation error and when the active version was loaded."""
+        with self.lock:
+            return dict(self.stats)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_config_service(path=None):
+    """Process-wide ConfigService (created on first use; ``path`` only applies then)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigService(path)
+        return _service
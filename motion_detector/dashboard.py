@@ -1,9 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, send_file, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, send_file, jsonify, Response
 from functools import wraps
-import yaml
+import json
+import threading
 import os
 import psutil
 from motion_detector.resource_monitor import ResourceMonitor
+from motion_detector.utils import tail_lines
+from motion_detector.config_service import get_config_service
 
 # Simple password for demonstration (should be hashed in production)
 DASHBOARD_PASSWORD = os.environ.get("DASHBOARD_PASSWORD", "admin")
@@ -13,6 +16,58 @@ dashboard_bp = Blueprint('dashboard', __name__)
 # Global resource monitor instance (set in main)
 resource_monitor = None
 
+# Single LogTailer shared by all /dashboard/stream clients (started on first use)
+log_tailer = None
+_log_tailer_lock = threading.Lock()
+
+def _detection_logs(config):
+    """
+    Files making up the live detection log: the alert log every camera appends to
+    (motiondetection.log), camera_log.txt and each camera's ``log_file`` (resolved
+    like CameraPipeline does, relative to the working directory).
+    """
+    base = os.path.join(os.path.dirname(__file__), '..')
+    paths = [os.path.abspath(os.path.join(base, 'motiondetection.log')),
+             os.path.abspath(os.path.join(base, 'camera_log.txt'))]
+    for cam_cfg in config.get('cameras', []) or []:
+        paths.append(os.path.abspath(cam_cfg.get('log_file', 'camera_log.txt')))
+    return list(dict.fromkeys(paths))
+
+def get_log_tailer():
+    global log_tailer
+    with _log_tailer_lock:
+        if log_tailer is None:
+            from motion_detector.log_tailer import LogTailer
+            base = os.path.join(os.path.dirname(__file__), '..')
+            log_tailer = LogTailer({'detection': _detection_logs(get_config_service().get()),
+                                    'notification': os.path.join(base, 'notification_log.txt'),
+                                    'upload': os.path.join(base, 'ftp_upload.log')})
+            log_tailer.start()
+        return log_tailer
+
+def _log_filter(args):
+    """
+    Line filter from the dashboard's query parameters (notif_filter, notif_channel,
+    notif_status, detect_filter), shared by logs_ajax and the SSE stream.
+    """
+    notif_filter = args.get('notif_filter', '').strip().lower()
+    notif_channel = args.get('notif_channel', '').strip().lower()
+    notif_status = args.get('notif_status', '').strip().lower()
+    detect_filter = args.get('detect_filter', '').strip().lower()
+
+    def match(log, line):
+        if log == 'notification':
+            if notif_filter and notif_filter not in line.lower():
+                return False
+            if notif_channel and f"{notif_channel.upper()} |" not in line:
+                return False
+            if notif_status and notif_status.upper() not in line:
+                return False
+        elif log == 'detection':
+            return detect_filter in line.lower()
+        return True
+    return match
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -38,25 +93,31 @@ def logout():
     session['logged_in'] = False
     return redirect(url_for('dashboard.login'))
 
+def _event_db(config):
+    """Path of the detection event store, or None when it is disabled or not created yet."""
+    from motion_detector.event_store import event_store_path
+    db_path = event_store_path(config)
+    return db_path if db_path and os.path.exists(db_path) else None
+
+def _recent_detections(config, n):
+    """Last ``n`` detections as log lines: from the event store when enabled, else the tail of camera_log.txt."""
+    db_path = _event_db(config)
+    if db_path:
+        from motion_detector.event_store import query_events, format_event
+        return [format_event(e) for e in reversed(query_events(db_path, limit=n)['events'])]
+    log_path = os.path.join(os.path.dirname(__file__), '../camera_log.txt')
+    return tail_lines(log_path, n) if os.path.exists(log_path) else []
+
 @dashboard_bp.route('/dashboard/status')
 @login_required
 def status():
-    # Load detection log (last 20 events)
-    log_path = os.path.join(os.path.dirname(__file__), '../camera_log.txt')
-    detections = []
-    if os.path.exists(log_path):
-        with open(log_path) as f:
-            detections = f.readlines()[-20:]
-    # Load notification log (last 20 events)
+    config = get_config_service().get()
+    # Last 20 detections and notifications
+    detections = _recent_detections(config, 20)
     notif_log_path = os.path.join(os.path.dirname(__file__), '../notification_log.txt')
     notifications = []
     if os.path.exists(notif_log_path):
-        with open(notif_log_path) as f:
-            notifications = f.readlines()[-20:]
-    # Load notification config
-    config_path = os.path.join(os.path.dirname(__file__), '../config.yaml')
-    with open(config_path) as f:
-        config = yaml.safe_load(f)
+        notifications = tail_lines(notif_log_path, 20)
     channels = {
         'email': config.get('email', {}).get('enabled', False),
         'telegram': config.get('telegram', {}).get('enabled', False),
@@ -65,6 +126,35 @@ def status():
     }
     return render_template('dashboard.html', detections=detections, notifications=notifications, channels=channels)
 
+@dashboard_bp.route('/dashboard/outbox')
+@login_required
+def outbox():
+    from motion_detector.notification_outbox import outbox_summary
+    config = get_config_service().get()
+    outbox_cfg = config.get('notification_outbox', {}) or {}
+    db_path = outbox_cfg.get('path') or os.path.join(os.path.dirname(__file__), '../notification_outbox.db')
+    if not outbox_cfg.get('enabled', False) or not os.path.exists(db_path):
+        return jsonify({'enabled': outbox_cfg.get('enabled', False), 'channels': {}})
+    return jsonify({'enabled': True, 'channels': outbox_summary(db_path)})
+
+@dashboard_bp.route('/dashboard/events')
+@login_required
+def events():
+    # ?camera=&class=&start=&end=&limit=&cursor= (timestamps in epoch seconds)
+    from motion_detector.event_store import query_events
+    config = get_config_service().get()
+    db_path = _event_db(config)
+    if db_path is None:
+        return jsonify({'events': [], 'next': None})
+    try:
+        return jsonify(query_events(db_path, start=request.args.get('start', type=float),
+                                    end=request.args.get('end', type=float),
+                                    camera=request.args.get('camera'), cls=request.args.get('class'),
+                                    limit=request.args.get('limit', 100, type=int),
+                                    cursor=request.args.get('cursor')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @dashboard_bp.route('/dashboard/log/<logtype>')
 @login_required
 def download_log(logtype):
@@ -80,34 +170,49 @@ def download_log(logtype):
 @login_required
 def logs_ajax():
     notif_log_path = os.path.join(os.path.dirname(__file__), '../notification_log.txt')
-    detection_log_path = os.path.join(os.path.dirname(__file__), '../camera_log.txt')
+    config = get_config_service().get()
     notifications = []
-    detections = []
-    # Get filter params
-    notif_filter = request.args.get('notif_filter', '').strip().lower()
-    notif_channel = request.args.get('notif_channel', '').strip().lower()
-    notif_status = request.args.get('notif_status', '').strip().lower()
-    detect_filter = request.args.get('detect_filter', '').strip().lower()
+    match = _log_filter(request.args)
     if os.path.exists(notif_log_path):
-        with open(notif_log_path) as f:
-            logs = f.readlines()[-100:]
-            filtered = []
-            for l in logs:
-                l_low = l.lower()
-                if notif_filter and notif_filter not in l_low:
-                    continue
-                if notif_channel and f"{notif_channel.upper()} |" not in l:
-                    continue
-                if notif_status and notif_status.upper() not in l:
-                    continue
-                filtered.append(l)
-            notifications = filtered[-20:]
-    if os.path.exists(detection_log_path):
-        with open(detection_log_path) as f:
-            logs = f.readlines()[-100:]
-            detections = [l for l in logs if detect_filter in l.lower()][-20:]
+        notifications = [l for l in tail_lines(notif_log_path, 100) if match('notification', l)][-20:]
+    detections = [l for l in _recent_detections(config, 100) if match('detection', l)][-20:]
     return jsonify({'notifications': notifications, 'detections': detections})
 
+@dashboard_bp.route('/dashboard/stream')
+@login_required
+def stream():
+    """
+    Server-Sent Events: the last 20 matching lines of each log, then every new line as
+    ``event: detection|notification|upload`` with the line JSON-encoded in ``data``.
+    Filters take the same parameters as logs_ajax. All tabs share one LogTailer, so
+    viewers add no file reads; a comment line every 15 s detects closed connections.
+
+    The stream always carries log lines: detections are the alert log and every
+    camera's log file (see _detection_logs). The detection event store, when
+    enabled, is read by status/logs_ajax and ``GET /events`` for indexed history.
+    """
+    tailer = get_log_tailer()
+    match = _log_filter(request.args)
+    sub = tailer.subscribe(match)
+
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            for log in ('detection', 'notification', 'upload'):
+                for line in [l for l in tailer.history(log) if match(log, l)][-20:]:
+                    yield f"event: {log}\ndata: {json.dumps(line)}\n\n"
+            while not sub.closed:
+                items = sub.get(timeout=15)
+                if not items:
+                    yield ': keepalive\n\n'
+                for log, line in items:
+                    yield f"event: {log}\ndata: {json.dumps(line)}\n\n"
+        finally:
+            tailer.unsubscribe(sub)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @dashboard_bp.route('/dashboard/clear_log/<logtype>', methods=['POST'])
 @login_required
 def clear_log(logtype):
@@ -181,19 +286,15 @@ def ftp_upload_log():
     log_path = os.path.join(os.path.dirname(__file__), '../ftp_upload.log')
     if not os.path.exists(log_path):
         return jsonify([])
-    with open(log_path, 'r') as f:
-        lines = f.readlines()
     # Return last 20 entries, newest last
-    return jsonify([l.strip() for l in lines[-20:]])
+    return jsonify([l.strip() for l in tail_lines(log_path, 20)])
 
 @dashboard_bp.route('/health')
 def health():
     # Camera status: check if camera is available (simulate for now)
     camera_status = True
     # Notification channel config status
-    config_path = os.path.join(os.path.dirname(__file__), '../config.yaml')
-    with open(config_path) as f:
-        config = yaml.safe_load(f)
+    config = get_config_service().get()
     notif_status = {ch: bool(config.get(ch, {}).get('enabled', False)) for ch in ['email', 'telegram', 'whatsapp', 'discord']}
     # Disk space
     disk = psutil.disk_usage('/')
@@ -205,5 +306,6 @@ def health():
         'notifications': notif_status,
         'disk_ok': disk_ok,
         'disk_percent': disk.percent,
-        'resource_status': res_status
+        'resource_status': res_status,
+        'log_stream': log_tailer.get_stats() if log_tailer is not None else None
     })
@@ -0,0 +1,67 @@
+import time
+
+
+class DetectionGate:
+    """
+    Decides per frame whether the (expensive) person detector has to run.
+
+    Modes:
+      - 'always': run the detector on every frame (previous behaviour).
+      - 'motion': run only when MotionDetector reports change, plus
+          * a keep-alive run every ``keepalive_every`` frames while a person is being tracked
+            (a person standing still produces no motion but must not vanish), and
+          * a sanity run every ``sanity_interval`` seconds on static scenes.
+
+    Args:
+        mode (str): 'motion' or 'always' (default 'motion').
+        keepalive_every (int): Run cadence in frames while a person is present (default 5).
+        sanity_interval (float): Seconds between forced runs on an idle scene (default 30).
+        max_fps (float): Upper bound on detector runs per second, 0 for unlimited (default 0).
+            Adjusted at runtime by the LoadController.
+    """
+    def __init__(self, mode='motion', keepalive_every=5, sanity_interval=30.0, max_fps=0):
+        if mode not in ('motion', 'always'):
+            raise ValueError(f"Unknown gating mode: {mode}")
+        self.mode = mode
+        self.keepalive_every = max(1, int(keepalive_every))
+        self.sanity_interval = sanity_interval
+        self.max_fps = max_fps
+        self.last_run = 0.0
+        self.frames_since_run = 0
+        self.counters = {'executed': 0, 'skipped': 0, 'motion': 0, 'keepalive': 0, 'sanity': 0, 'always': 0}
+
+    def should_run(self, motion, tracking, now=None):
+        """
+        Args:
+            motion (bool): MotionDetector found change in this frame.
+            tracking (bool): The last detector run found a person.
+            now (float, optional): Current time (defaults to time.time()).
+        Returns:
+            str or None: Reason for running ('always', 'motion', 'keepalive', 'sanity'), or None to skip.
+        """
+        now = time.time() if now is None else now
+        self.frames_since_run += 1
+        if self.max_fps and now - self.last_run < 1.0 / self.max_fps:
+            reason = None
+        elif self.mode == 'always':
+            reason = 'always'
+        elif motion:
+            reason = 'motion'
+        elif tracking and self.frames_since_run >= self.keepalive_every:
+            reason = 'keepalive'
+        elif now - self.last_run >= self.sanity_interval:
+            reason = 'sanity'
+        else:
+            reason = None
+        if reason is None:
+            self.counters['skipped'] += 1
+            return None
+        self.counters['executed'] += 1
+        self.counters[reason] += 1
+        self.last_run = now
+        self.frames_since_run = 0
+        return reason
+
+    def get_stats(self):
+        """Return the executed/skipped inference counters (with a per-reason breakdown)."""
+        return dict(self.counters)
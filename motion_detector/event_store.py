@@ -0,0 +1,224 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    track_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS detections_camera_ts ON detections (camera, ts);
+CREATE INDEX IF NOT EXISTS detections_class_ts ON detections (class, ts);
+CREATE INDEX IF NOT EXISTS detections_camera_class_ts ON detections (camera, class, ts);
+"""
+
+COLUMNS = ('id', 'ts', 'camera', 'class', 'confidence', 'x1', 'y1', 'x2', 'y2', 'track_id')
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class EventStore:
+    """
+    Indexed store of person/object detections (SQLite, WAL mode).
+
+    ``record()`` only appends to an in-memory queue, so the capture loop never
+    waits on disk; a writer thread inserts whatever has accumulated in one
+    transaction every ``flush_interval`` seconds (or as soon as ``batch_size``
+    rows are waiting). If the writer falls behind by more than ``max_queue`` rows,
+    new detections are dropped and counted rather than growing memory. Rows older
+    than ``retention_days`` are deleted, so the file does not grow forever.
+    Read with ``query_events``.
+
+    Args:
+        db_path (str): SQLite database file (may be shared by all cameras and processes).
+        batch_size (int): Rows that trigger an early flush (default 200).
+        flush_interval (float): Maximum seconds a detection waits before it is written (default 1).
+        max_queue (int): Rows buffered before new detections are dropped (default 10000).
+        retention_days (float): Days detections are kept, 0 = forever (default 30).
+    """
+    def __init__(self, db_path, batch_size=200, flush_interval=1.0, max_queue=10000, retention_days=30):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.db = _connect(db_path)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.running = False
+        self.thread = None
+        self.last_prune = 0.0
+        self.lock = threading.Lock()
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'write_ms_total': 0.0}
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='event-store', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Write what is still queued and close the database."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self._flush()
+        self.db.close()
+
+    def record(self, camera, persons, ts=None, track_ids=None):
+        """
+        Queue the detections of one frame.
+
+        Args:
+            camera (str): Camera name.
+            persons (list): (x1, y1, x2, y2, conf) or (x1, y1, x2, y2, conf, label) boxes.
+            ts (float, optional): Detection time (default now).
+            track_ids (list, optional): Tracker ID per box.
+        """
+        ts = ts or time.time()
+        for i, p in enumerate(persons):
+            label = p[5] if len(p) > 5 and p[5] else 'person'
+            track_id = track_ids[i] if track_ids and i < len(track_ids) else None
+            row = (ts, camera, str(label), float(p[4]), int(p[0]), int(p[1]), int(p[2]), int(p[3]), track_id)
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                with self.lock:
+                    self.stats['dropped'] += 1
+                continue
+            with self.lock:
+                self.stats['recorded'] += 1
+
+    def _run(self):
+        while self.running:
+            deadline = time.time() + self.flush_interval
+            while self.running and self.queue.qsize() < self.batch_size and time.time() < deadline:
+                time.sleep(0.05)
+            self._flush()
+
+    def _flush(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        now = time.time()
+        prune = self.retention_days and now - self.last_prune > 3600
+        if not rows and not prune:
+            return
+        start = time.perf_counter()
+        try:
+            with self.db:
+                if rows:
+                    self.db.executemany(
+                        "INSERT INTO detections (ts, camera, class, confidence, x1, y1, x2, y2, track_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                if prune:
+                    self.last_prune = now
+                    self.db.execute("DELETE FROM detections WHERE ts < ?", (now - self.retention_days * 86400,))
+        except sqlite3.Error as e:
+            print(f"[ERROR] Writing {len(rows)} detections failed: {e}")
+            with self.lock:
+                self.stats['dropped'] += len(rows)
+            return
+        with self.lock:
+            self.stats['written'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['write_ms_total'] += (time.perf_counter() - start) * 1000
+
+    def get_stats(self):
+        """Return recorded/written/dropped counts, queue depth and the average batch write time."""
+        with self.lock:
+            stats = dict(self.stats)
+        write_ms_total = stats.pop('write_ms_total')
+        stats['queued'] = self.queue.qsize()
+        stats['avg_batch_ms'] = round(write_ms_total / stats['batches'], 2) if stats['batches'] else None
+        return stats
+
+
+def event_store_path(config):
+    """Database path from the ``event_store`` config section, None when the store is disabled."""
+    ev_cfg = config.get('event_store', {}) or {}
+    if not ev_cfg.get('enabled', False):
+        return None
+    return os.path.abspath(ev_cfg.get('path') or os.path.join(os.path.dirname(__file__), '../events.db'))
+
+
+def format_event(event):
+    """One detection as a dashboard log line."""
+    when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['ts']))
+    line = (f"[{when}] {event['camera']} | {event['class']} {event['confidence']:.2f} | "
+            f"box ({event['x1']},{event['y1']})-({event['x2']},{event['y2']})")
+    if event['track_id'] is not None:
+        line += f" | track {event['track_id']}"
+    return line + '\n'
+
+
+def query_events(db_path, start=None, end=None, camera=None, cls=None, limit=100, cursor=None):
+    """
+    Newest-first detections matching the filters, one page at a time.
+
+    Pages are keyset-paginated on (ts, id) along the (camera/class, ts) indexes, so
+    a page costs the same however large the table is.
+
+    Args:
+        db_path (str): EventStore database file.
+        start (float, optional): Earliest timestamp (inclusive).
+        end (float, optional): Latest timestamp (exclusive).
+        camera (str, optional): Only this camera.
+        cls (str, optional): Only this class (e.g. 'person').
+        limit (int): Page size, capped at 1000 (default 100).
+        cursor (str, optional): ``next`` value of the previous page.
+    Returns:
+        dict: {'events': [row dicts], 'next': cursor of the following page or None}.
+    Raises:
+        ValueError: If ``cursor`` is malformed.
+    """
+    limit = max(1, min(int(limit), 1000))
+    where, params = [], []
+    if camera:
+        where.append('camera = ?')
+        params.append(camera)
+    if cls:
+        where.append('class = ?')
+        params.append(cls)
+    if start is not None:
+        where.append('ts >= ?')
+        params.append(float(start))
+    if end is not None:
+        where.append('ts < ?')
+        params.append(float(end))
+    if cursor:
+        try:
+            cursor_ts, cursor_id = cursor.split(':')
+            params.extend([float(cursor_ts), int(cursor_id)])
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        where.append('(ts, id) < (?, ?)')
+    sql = f"SELECT {', '.join(COLUMNS)} FROM detections"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY ts DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+    db = sqlite3.connect(db_path, timeout=5)
+    try:
+        rows = db.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # No detections table yet
+    finally:
+        db.close()
+    events = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+    following = f"{events[-1]['ts']!r}:{events[-1]['id']}" if len(rows) > limit else None
+    return {'events': events, 'next': following}
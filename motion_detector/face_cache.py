@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Enrolled names become file names in known_faces/
+VALID_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9 _.-]{0,63}$')
+
+# Serialises saves of pipelines sharing one cache file (thread mode)
+_save_lock = threading.Lock()
+# One refresh at a time per process: later callers wait and find the images already encoded
+_refresh_lock = threading.Lock()
+
+
+def face_images(directory, name):
+    """Paths of every ``<name>.<ext>`` image of ``name`` in ``directory`` (any image extension or case)."""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, fname) for fname in sorted(os.listdir(directory))
+            if os.path.splitext(fname)[0] == name and os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS]
+
+
+class FaceEncodingCache:
+    """
+    On-disk cache of known-face encodings keyed by file path, size and mtime.
+
+    Stored as a single compressed ``.npz`` (paths, sizes, mtimes, names and a
+    float32 encoding matrix). ``refresh()`` reuses every cached entry whose file is
+    unchanged, encodes only new or modified images (in a process pool when there
+    is more than one) and forgets entries for deleted files, so a restart with an
+    unchanged gallery costs one ``np.load``. Saves go through a unique temporary
+    file and ``os.replace``, so cameras refreshing the same cache concurrently
+    never see a partial file.
+
+    Args:
+        cache_path (str): Path of the ``.npz`` cache file.
+        dim (int): Encoding length (128 for face_recognition).
+    """
+    def __init__(self, cache_path, dim=128):
+        self.cache_path = cache_path
+        self.dim = dim
+        self.entries = {}  # path -> (size, mtime, name, encoding or None)
+        self.stats = {'cached': 0, 'encoded': 0, 'removed': 0}
+
+    def load(self):
+        """Load the cache file; a missing or unreadable cache is treated as empty."""
+        self.entries = {}
+        if not os.path.exists(self.cache_path):
+            return self.entries
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                for path, size, mtime, name, valid, enc in zip(data['paths'], data['sizes'], data['mtimes'],
+                                                               data['names'], data['valid'], data['encodings']):
+                    self.entries[str(path)] = (int(size), float(mtime), str(name), enc if valid else None)
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable face cache {self.cache_path}: {e}")
+            self.entries = {}
+        return self.entries
+
+    def save(self):
+        """Write the cache atomically."""
+        items = sorted(self.entries.items())
+        encodings = np.zeros((len(items), self.dim), dtype=np.float32)
+        for i, (_, (_, _, _, enc)) in enumerate(items):
+            if enc is not None:
+                encodings[i] = enc
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        with _save_lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.cache_path) + '.', suffix='.tmp',
+                                            dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez_compressed(
+                        f,
+                        paths=np.array([p for p, _ in items], dtype=str),
+                        sizes=np.array([e[0] for _, e in items], dtype=np.int64),
+                        mtimes=np.array([e[1] for _, e in items], dtype=np.float64),
+                        names=np.array([e[2] for _, e in items], dtype=str),
+                        valid=np.array([e[3] is not None for _, e in items], dtype=bool),
+                        encodings=encodings,
+                    )
+                os.replace(tmp_path, self.cache_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def put(self, path, name, encoding):
+        """Record the encoding of a file written at runtime (e.g. an enrolled face) and save."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        self.entries[path] = (st.st_size, st.st_mtime, name,
+                              None if encoding is None else np.asarray(encoding, dtype=np.float32))
+        self.save()
+
+    def drop(self, name):
+        """
+        Forget every entry labelled ``name`` and save.
+
+        Returns:
+            list: Paths of the dropped entries.
+        """
+        paths = [p for p, e in self.entries.items() if e[2] == name]
+        for path in paths:
+            del self.entries[path]
+        if paths:
+            self.save()
+        return paths
+
+    def identities(self):
+        """Return {name: number of images with a face} for the loaded entries."""
+        counts = {}
+        for _, _, name, enc in self.entries.values():
+            if enc is not None:
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def refresh(self, directory, encode_fn, workers=None):
+        """
+        Bring the cache in line with the images in ``directory``.
+
+        Args:
+            directory (str): Folder of known faces; file names (without extension) are the labels.
+            encode_fn (callable): Picklable ``encode_fn(path) -> encoding or None``.
+            workers (int, optional): Process pool size (default: CPU count); 1 encodes inline. Inside a
+                daemonic process (an orchestrator camera worker), which may not have children, encoding is
+                always inline.
+        Returns:
+            tuple: (names, encodings) for every image with a face, encodings as an (N, dim) float32 matrix.
+        """
+        with _refresh_lock:
+            return self._refresh(directory, encode_fn, workers)
+
+    def _refresh(self, directory, encode_fn, workers):
+        self.load()
+        seen, todo = {}, []
+        for fname in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(fname)
+            if ext.lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.abspath(os.path.join(directory, fname))
+            st = os.stat(path)
+            seen[path] = (st.st_size, st.st_mtime, name)
+            cached = self.entries.get(path)
+            if cached is None or cached[0] != st.st_size or cached[1] != st.st_mtime:
+                todo.append(path)
+        removed = [p for p in self.entries if p not in seen]
+        for path in removed:
+            del self.entries[path]
+        if len(todo) > 1 and workers != 1 and not multiprocessing.current_process().daemon:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                encodings = list(pool.map(encode_fn, todo))
+        else:
+            encodings = [encode_fn(path) for path in todo]
+        for path, enc in zip(todo, encodings):
+            size, mtime, name = seen[path]
+            self.entries[path] = (size, mtime, name, None if enc is None else np.asarray(enc, dtype=np.float32))
+        self.stats = {'cached': len(seen) - len(todo), 'encoded': len(todo), 'removed': len(removed)}
+        if todo or removed or not os.path.exists(self.cache_path):
+            self.save()
+        valid = [(e[2], e[3]) for p, e in sorted(self.entries.items()) if e[3] is not None]
+        names = [n for n, _ in valid]
+        matrix = np.array([enc for _, enc in valid], dtype=np.float32).reshape(-1, self.dim)
+        return names, matrix
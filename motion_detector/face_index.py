@@ -0,0 +1,193 @@
+import threading
+import numpy as np
+
+
+class FaceIndex:
+    """
+    Nearest-neighbour index over face encodings (pure NumPy).
+
+    Encodings live in one contiguous float32 matrix (grown by doubling) with their
+    squared norms precomputed, so a query is a single matrix-vector product:
+    ``|x - q|^2 = |x|^2 - 2 x.q + |q|^2``. Identities can be added and removed at
+    runtime; removal moves the last row into the freed slot, so the matrix stays dense.
+
+    Once the gallery reaches ``ivf_threshold`` encodings an IVF layer is trained
+    (k-means coarse quantiser): every row is assigned to one of ``nlist`` centroids
+    and a query only scans the rows of its ``nprobe`` nearest centroids. New rows
+    are assigned to the nearest existing centroid; the quantiser is retrained when
+    the gallery has doubled since the last training.
+
+    Args:
+        dim (int): Encoding length (default 128).
+        ivf_threshold (int): Gallery size at which the IVF layer is used (default 10000; 0 disables it).
+        nlist (int, optional): Number of IVF cells (default: ~sqrt(size)).
+        nprobe (int): Cells scanned per query (default 8).
+    """
+    def __init__(self, dim=128, ivf_threshold=10000, nlist=None, nprobe=8):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.lock = threading.Lock()
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._norms = np.zeros(64, dtype=np.float32)
+        self._cells = np.zeros(64, dtype=np.int32)
+        self._labels = []
+        self._size = 0
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = None  # (row order sorted by cell, cell bounds); rebuilt lazily after changes
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def names(self):
+        """Label of every row, in index order."""
+        with self.lock:
+            return list(self._labels)
+
+    def identities(self):
+        """Return {name: number of encodings}."""
+        counts = {}
+        with self.lock:
+            for name in self._labels:
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def _grow(self, needed):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr in ('_vectors', '_norms', '_cells'):
+            old = getattr(self, attr)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, attr, new)
+
+    def add(self, names, encodings):
+        """
+        Add encodings to the index.
+
+        Args:
+            names (str or list): One label, or one label per encoding.
+            encodings (ndarray): (dim,) or (N, dim) encodings.
+        """
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if isinstance(names, str):
+            names = [names] * len(encodings)
+        if len(names) != len(encodings):
+            raise ValueError("names and encodings must have the same length")
+        with self.lock:
+            start, end = self._size, self._size + len(encodings)
+            self._grow(end)
+            self._vectors[start:end] = encodings
+            self._norms[start:end] = np.einsum('ij,ij->i', encodings, encodings)
+            self._labels.extend(names)
+            self._size = end
+            if self._centroids is not None:
+                self._cells[start:end] = self._nearest_cells(encodings, 1)[:, 0]
+            self._lists = None
+            self._maybe_train()
+
+    def remove(self, name):
+        """
+        Remove every encoding labelled ``name``.
+
+        Returns:
+            int: Number of encodings removed.
+        """
+        with self.lock:
+            rows = [i for i, label in enumerate(self._labels) if label == name]
+            # Highest rows first so a moved last row is never one we still have to remove
+            for row in reversed(rows):
+                last = self._size - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    self._norms[row] = self._norms[last]
+                    self._cells[row] = self._cells[last]
+                    self._labels[row] = self._labels[last]
+                self._labels.pop()
+                self._size = last
+            if self._size < self.ivf_threshold:
+                self._centroids = None
+                self._trained_size = 0
+            self._lists = None
+            return len(rows)
+
+    def _maybe_train(self):
+        if not self.ivf_threshold or self._size < self.ivf_threshold:
+            return
+        if self._centroids is not None and self._size < 2 * self._trained_size:
+            return
+        self._train()
+
+    def _train(self, iterations=10):
+        data = self._vectors[:self._size]
+        nlist = self.nlist or max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(self._size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            self._centroids = centroids
+            cells = self._nearest_cells(data, 1)[:, 0]
+            for c in range(nlist):
+                members = data[cells == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+        self._centroids = centroids
+        self._cells[:self._size] = self._nearest_cells(data, 1)[:, 0]
+        self._trained_size = self._size
+        self._lists = None
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            cells = self._cells[:self._size]
+            order = np.argsort(cells, kind='stable')
+            bounds = np.searchsorted(cells[order], np.arange(len(self._centroids) + 1))
+            self._lists = (order, bounds)
+        return self._lists
+
+    def _nearest_cells(self, queries, n):
+        c = self._centroids
+        d = np.einsum('ij,ij->i', c, c)[None, :] - 2 * queries @ c.T
+        n = min(n, len(c))
+        return np.argpartition(d, n - 1, axis=1)[:, :n]
+
+    def search(self, queries, k=1):
+        """
+        Find the ``k`` nearest encodings of every query.
+
+        Args:
+            queries (ndarray): (dim,) or (M, dim) encodings.
+            k (int): Neighbours per query.
+        Returns:
+            list: One list per query of (name, distance) pairs, nearest first.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        with self.lock:
+            if self._size == 0:
+                return [[] for _ in range(len(queries))]
+            if self._centroids is None:
+                return [self._scan(q, None, k) for q in queries]
+            probes = self._nearest_cells(queries, self.nprobe)
+            order, bounds = self._inverted_lists()
+            return [self._scan(q, np.concatenate([order[bounds[c]:bounds[c + 1]] for c in p]), k)
+                    for q, p in zip(queries, probes)]
+
+    def _scan(self, query, rows, k):
+        # rows=None scans the whole gallery in storage order without gathering a copy;
+        # probed IVF rows come in cell order and must be gathered (even if all cells are probed)
+        if rows is None:
+            vectors, norms = self._vectors[:self._size], self._norms[:self._size]
+            rows = np.arange(self._size)
+        else:
+            vectors, norms = self._vectors[rows], self._norms[rows]
+        if len(rows) == 0:
+            return []
+        d2 = norms - 2 * (vectors @ query) + query @ query
+        k = min(k, len(rows))
+        top = np.argpartition(d2, k - 1)[:k]
+        top = top[np.argsort(d2[top])]
+        return [(self._labels[rows[i]], float(np.sqrt(max(d2[i], 0.0)))) for i in top]
@@ -1,32 +1,131 @@
 import os
+import cv2
 try:
     import face_recognition
 except ImportError:
     raise ImportError("face_recognition must be installed for FaceRecognizer. Please install via 'pip install face_recognition'.")
 
+from face_cache import FaceEncodingCache, VALID_NAME, face_images
+from face_index import FaceIndex
+
+def encode_known_face(path):
+    """
+    Encode the first face found in an image file (module-level so a process pool can run it).
+
+    Returns:
+        ndarray or None: 128-d encoding, or None if no face was found.
+    """
+    image = face_recognition.load_image_file(path)
+    encodings = face_recognition.face_encodings(image)
+    return encodings[0] if encodings else None
+
+def encode_face_image(frame):
+    """
+    Encode the largest face in a BGR image.
+
+    Returns:
+        ndarray or None: 128-d encoding, or None if no face was found.
+    """
+    rgb = frame[:, :, ::-1]
+    locations = face_recognition.face_locations(rgb)
+    if not locations:
+        return None
+    # (top, right, bottom, left): keep the biggest face
+    largest = max(locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]))
+    return face_recognition.face_encodings(rgb, [largest])[0]
+
+def load_known_faces(known_faces_dir, cache_path=None, workers=None):
+    """
+    Bring the encoding cache of known_faces_dir up to date and return the gallery.
+
+    Returns:
+        tuple: (names, encodings) with encodings as an (N, 128) float32 matrix.
+    """
+    cache = FaceEncodingCache(cache_path or os.path.join(known_faces_dir, '.encodings_cache.npz'))
+    return cache.refresh(known_faces_dir, encode_known_face, workers=workers)
+
+def save_known_face(known_faces_dir, name, frame, encoding, cache_path=None):
+    """
+    Persist an enrolled face as ``<name>.jpg`` and record its encoding in the cache,
+    so the next startup neither misses nor re-encodes it. Earlier images of ``name``
+    (any extension) and their cache entries are removed first, so after a restart the
+    gallery holds exactly the enrolled face, like the live index.
+
+    Returns:
+        str: Path of the written image.
+    """
+    if not VALID_NAME.match(name or ''):
+        raise ValueError(f"Invalid name: {name!r}")
+    os.makedirs(known_faces_dir, exist_ok=True)
+    cache = FaceEncodingCache(cache_path or os.path.join(known_faces_dir, '.encodings_cache.npz'))
+    cache.load()
+    for old in face_images(known_faces_dir, name):
+        os.remove(old)
+    cache.drop(name)
+    path = os.path.join(known_faces_dir, f'{name}.jpg')
+    if not cv2.imwrite(path, frame):
+        raise IOError(f"Could not write {path}")
+    cache.put(path, name, encoding)
+    return path
+
+def delete_known_face(known_faces_dir, name, cache_path=None):
+    """
+    Delete every image of ``name`` from known_faces_dir and drop it from the cache.
+
+    Returns:
+        int: Number of images deleted.
+    """
+    if not VALID_NAME.match(name or ''):
+        raise ValueError(f"Invalid name: {name!r}")
+    images = face_images(known_faces_dir, name)
+    for path in images:
+        os.remove(path)
+    cache = FaceEncodingCache(cache_path or os.path.join(known_faces_dir, '.encodings_cache.npz'))
+    cache.load()
+    cache.drop(name)
+    return len(images)
+
 class FaceRecognizer:
     """
     Face recognizer for known-person alerts using face_recognition library.
 
+    Encodings are persisted in an ``.npz`` cache keyed by path, size and mtime, so only
+    new or changed images are encoded at startup (in parallel with a process pool).
+    Lookups go through a FaceIndex (contiguous float32 matrix, IVF for large galleries);
+    identities can be added or removed at runtime with ``add_identity``/``remove_identity``.
+
     Args:
         known_faces_dir (str): Directory containing images of known persons. File names (without extension) are used as labels.
         tolerance (float): Distance tolerance for face matching (default 0.6).
+        cache_path (str, optional): Encoding cache file (default: ``.encodings_cache.npz`` inside known_faces_dir).
+        workers (int, optional): Processes used to encode new images (default: CPU count).
+        index_options (dict, optional): Extra FaceIndex arguments (ivf_threshold, nlist, nprobe).
+        gallery (tuple, optional): (names, encodings) already loaded with ``load_known_faces`` (the
+            orchestrator refreshes the cache once for all cameras); skips the refresh.
     """
-    def __init__(self, known_faces_dir, tolerance=0.6):
-        self.known_encodings = []
-        self.known_names = []
+    def __init__(self, known_faces_dir, tolerance=0.6, cache_path=None, workers=None, index_options=None,
+                 gallery=None):
         self.tolerance = tolerance
-        # Load known faces
-        for fname in os.listdir(known_faces_dir):
-            path = os.path.join(known_faces_dir, fname)
-            name, ext = os.path.splitext(fname)
-            if ext.lower() not in ('.jpg', '.jpeg', '.png'):
-                continue
-            image = face_recognition.load_image_file(path)
-            encodings = face_recognition.face_encodings(image)
-            if encodings:
-                self.known_encodings.append(encodings[0])
-                self.known_names.append(name)
+        self.known_faces_dir = known_faces_dir
+        # Load known faces (cached encodings are reused, changed images re-encoded)
+        if gallery is None:
+            gallery = load_known_faces(known_faces_dir, cache_path, workers)
+        names, encodings = gallery
+        self.index = FaceIndex(**(index_options or {}))
+        self.index.add(names, encodings)
+
+    @property
+    def known_names(self):
+        return self.index.names
+
+    def add_identity(self, name, encoding):
+        """Add (or replace) the encoding of ``name`` in the live index."""
+        self.index.remove(name)
+        self.index.add(name, encoding)
+
+    def remove_identity(self, name):
+        """Remove ``name`` from the live index; returns the number of encodings removed."""
+        return self.index.remove(name)
 
     def recognize(self, frame):
         """
@@ -43,16 +142,12 @@ class FaceRecognizer:
         locations = face_recognition.face_locations(rgb)
         encodings = face_recognition.face_encodings(rgb, locations)
         results = []
-        for loc, enc in zip(locations, encodings):
-            # Compare to known encodings
-            matches = face_recognition.compare_faces(self.known_encodings, enc, self.tolerance)
+        # One vectorised nearest-neighbour query for all faces in the frame
+        neighbours = self.index.search(encodings, k=1) if encodings else []
+        for loc, nearest in zip(locations, neighbours):
             name = 'Unknown'
-            if matches and any(matches):
-                # Select best match
-                distances = face_recognition.face_distance(self.known_encodings, enc)
-                best_idx = distances.argmin()
-                if matches[best_idx]:
-                    name = self.known_names[best_idx]
+            if nearest and nearest[0][1] <= self.tolerance:
+                name = nearest[0][0]
             top, right, bottom, left = loc
             results.append({'name': name, 'box': (left, top, right, bottom)})
         return results
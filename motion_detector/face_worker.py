@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FaceRecognitionWorker:
+    """
+    Runs face recognition off the capture loop on person crops.
+
+    ``submit()`` copies the person boxes out of the frame and hands them to a
+    bounded worker pool, then returns immediately. ``on_result(matches, status)``
+    is called exactly once per submission:
+
+      - ``'ok'``: recognition finished within ``timeout``; ``matches`` holds the results,
+      - ``'timeout'``: no result in time; ``matches`` is empty (alert without names),
+      - ``'busy'``: ``max_pending`` jobs already queued; the job was not started,
+      - ``'error'``: recognition raised.
+
+    Results that arrive after the timeout still update ``latest()`` so the overlay
+    can show names once they are known.
+
+    Args:
+        face_recog (FaceRecognizer): Recognizer with ``recognize(frame)``.
+        max_workers (int): Worker threads (default 1).
+        max_pending (int): Maximum queued + running jobs (default 2).
+        timeout (float): Seconds to wait before alerting without names (default 1.5).
+        padding (float): Fraction of the box size added around each crop (default 0.1).
+    """
+    def __init__(self, face_recog, max_workers=1, max_pending=2, timeout=1.5, padding=0.1):
+        self.face_recog = face_recog
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.padding = padding
+        self.lock = threading.Lock()
+        self.pending = 0
+        self._latest = ([], 0.0)
+        self.stats = {'submitted': 0, 'ok': 0, 'timeout': 0, 'busy': 0, 'error': 0, 'late': 0,
+                      'last_ms': 0.0}
+
+    def _crops(self, frame, boxes):
+        h, w = frame.shape[:2]
+        if not boxes:
+            return [(frame.copy(), 0, 0)]
+        crops = []
+        for box in boxes:
+            x1, y1, x2, y2 = [int(v) for v in box[:4]]
+            px, py = int((x2 - x1) * self.padding), int((y2 - y1) * self.padding)
+            x1, y1 = max(0, x1 - px), max(0, y1 - py)
+            x2, y2 = min(w, x2 + px), min(h, y2 + py)
+            if x2 > x1 and y2 > y1:
+                crops.append((frame[y1:y2, x1:x2].copy(), x1, y1))
+        return crops
+
+    def _recognize(self, crops):
+        start = time.time()
+        matches = []
+        for crop, ox, oy in crops:
+            for m in self.face_recog.recognize(crop):
+                left, top, right, bottom = m['box']
+                matches.append({'name': m['name'], 'box': (left + ox, top + oy, right + ox, bottom + oy)})
+        self.stats['last_ms'] = round((time.time() - start) * 1000, 1)
+        return matches
+
+    def submit(self, frame, boxes, on_result):
+        """
+        Queue recognition for the person ``boxes`` of ``frame`` (whole frame if no boxes).
+
+        Args:
+            frame (ndarray): BGR frame.
+            boxes (list): Person boxes as (x1, y1, x2, y2, ...) tuples.
+            on_result (callable): ``on_result(matches, status)``, see class docstring.
+        """
+        with self.lock:
+            self.stats['submitted'] += 1
+            if self.pending >= self.max_pending:
+                self.stats['busy'] += 1
+                busy = True
+            else:
+                self.pending += 1
+                busy = False
+        if busy:
+            on_result([], 'busy')
+            return
+        state = {'done': False}
+
+        def finish(matches, status):
+            with self.lock:
+                if state['done']:
+                    return False
+                state['done'] = True
+                self.stats[status] += 1
+            on_result(matches, status)
+            return True
+
+        def on_timeout():
+            finish([], 'timeout')
+
+        timer = threading.Timer(self.timeout, on_timeout)
+        timer.daemon = True
+
+        def on_done(future):
+            timer.cancel()
+            with self.lock:
+                self.pending -= 1
+            if future.exception() is not None:
+                finish([], 'error')
+                return
+            matches = future.result()
+            with self.lock:
+                self._latest = (matches, time.time())
+            if not finish(matches, 'ok'):
+                with self.lock:
+                    self.stats['late'] += 1
+
+        future = self.executor.submit(self._recognize, self._crops(frame, boxes))
+        timer.start()
+        future.add_done_callback(on_done)
+
+    def latest(self, max_age=5.0):
+        """Return the most recent matches if they are younger than ``max_age`` seconds."""
+        with self.lock:
+            matches, ts = self._latest
+        return matches if time.time() - ts <= max_age else []
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=self.pending)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+import cv2
+
+
+class FrameGrabber:
+    """
+    Reads frames from a camera/video in its own thread and keeps only the newest ones.
+
+    The capture thread pushes ``(frame, timestamp)`` pairs into a bounded ring; when
+    the ring is full the oldest frame is dropped. ``read()`` hands the pipeline the
+    newest frame and discards anything older, so a slow detector never works on a
+    stale backlog and end-to-end latency stays bounded.
+
+    Args:
+        source (int or str): Camera index or video file path, as accepted by cv2.VideoCapture.
+        buffer_size (int): Maximum number of frames kept in the ring (default 2).
+        drop_frames (bool): Drop oldest frames when the ring is full (live cameras). When False
+            the capture thread waits for the consumer instead, so video files are processed
+            frame by frame.
+    """
+    def __init__(self, source, buffer_size=2, drop_frames=True):
+        self.source = source
+        self.buffer_size = max(1, int(buffer_size))
+        self.drop_frames = drop_frames
+        self.ring = deque()
+        self.cond = threading.Condition()
+        self.cap = None
+        self.thread = None
+        self.running = False
+        self.ended = False
+        self.captured = 0
+        self.dropped = 0
+
+    def start(self):
+        """
+        Open the capture and start the grabbing thread.
+
+        Returns:
+            bool: False if the source could not be opened.
+        """
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            return False
+        # Keep the driver/FFmpeg queue short; buffering is done in our ring
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.running = True
+        self.thread = threading.Thread(target=self._grab, daemon=True)
+        self.thread.start()
+        return True
+
+    def _grab(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            ts = time.time()
+            with self.cond:
+                if not ret:
+                    self.ended = True
+                    self.cond.notify_all()
+                    break
+                if not self.drop_frames:
+                    while self.running and len(self.ring) >= self.buffer_size:
+                        self.cond.wait(0.1)
+                elif len(self.ring) >= self.buffer_size:
+                    self.ring.popleft()
+                    self.dropped += 1
+                self.ring.append((frame, ts))
+                self.captured += 1
+                self.cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """
+        Return the newest frame, waiting up to ``timeout`` seconds for one to arrive.
+        Older frames still in the ring are discarded (and counted as dropped) when frames
+        are being dropped; otherwise frames are returned in order.
+
+        Returns:
+            tuple: (ok, frame, timestamp). ``ok`` is False once the stream has ended or
+            no frame arrived in time; check ``ended`` to tell the two apart.
+        """
+        with self.cond:
+            if not self.ring and not self.ended:
+                self.cond.wait(timeout)
+            if not self.ring:
+                return False, None, None
+            if self.drop_frames:
+                frame, ts = self.ring.pop()
+                self.dropped += len(self.ring)
+                self.ring.clear()
+            else:
+                frame, ts = self.ring.popleft()
+            self.cond.notify_all()
+            return True, frame, ts
+
+    def get_stats(self):
+        """Return capture counters: frames captured, frames dropped and current ring depth."""
+        with self.cond:
+            return {'captured': self.captured, 'dropped': self.dropped, 'buffered': len(self.ring)}
+
+    def stop(self):
+        """Stop the grabbing thread and release the capture."""
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        if self.cap is not None:
+            self.cap.release()
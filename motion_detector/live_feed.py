@@ -1,51 +1,187 @@
 import threading
 import os
+from urllib.parse import quote
 import cv2
-from flask import Flask, Response, render_template
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from stream_server import MJPEGStreamServer
 
 class LiveFeedManager:
-    def __init__(self):
+    """
+    MJPEG stream shared by all cameras, served by an asyncio MJPEGStreamServer.
+
+    Each camera publishes its annotated frames under its own name; ``/video_feed/<camera>``
+    streams a single camera and ``/video_feed`` streams the most recently updated one.
+
+    Frames are encoded at most once per published version, no matter how many
+    clients watch: ``update_frame`` only stores a reference and bumps the camera's
+    version, clients wait until a newer version exists, and the first client to
+    ask for a version encodes it for everybody. With no viewers nothing is encoded at all.
+
+    Args:
+        write_timeout (float): Seconds a viewer may take to accept one frame before it is dropped (default 10).
+        max_clients (int): Concurrent viewers accepted (default 500).
+    """
+    def __init__(self, write_timeout=10.0, max_clients=500):
         self.active = False
-        self.frame = None
+        self.frames = {}  # camera name -> latest frame (None when only the JPEG is known)
+        self.versions = {}  # camera name -> version of its latest frame
+        self.jpegs = {}  # camera name -> (version, JPEG bytes) of the last encoded frame
+        self.latest_camera = None  # camera streamed by /video_feed
+        self.version = 0  # bumped on every update of any camera
+        self.quality = {}  # camera name -> JPEG quality (set by the LoadController)
+        self.default_quality = 95
+        self.viewers = 0
+        self.stats = {'published': 0, 'encoded': 0}
         self.lock = threading.Lock()
-        self.thread = None
-        # Use top-level templates/static folders
+        self.encode_locks = {}  # camera name -> Lock, so concurrent clients never encode twice
+        self.write_timeout = write_timeout
+        self.max_clients = max_clients
+        self.server = None
+        # Use top-level templates folder
         template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../templates'))
-        static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../static'))
-        self.app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
-        self._setup_routes()
+        self.templates = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape())
+        self.templates.globals['url_for'] = self._url_for
+
+    @staticmethod
+    def _url_for(endpoint, **values):
+        if endpoint == 'static':
+            return '/static/' + quote(values['filename'])
+        if values.get('camera'):
+            return '/video_feed/' + quote(values['camera'])
+        return '/video_feed'
+
+    def render_index(self):
+        """Render the live feed page listing every publishing camera."""
+        return self.templates.get_template('live_feed.html').render(cameras=self.cameras())
+
+    def viewer_joined(self):
+        with self.lock:
+            self.viewers += 1
 
-    def _setup_routes(self):
-        @self.app.route('/')
-        def index():
-            return render_template('live_feed.html')
+    def viewer_left(self):
+        with self.lock:
+            self.viewers -= 1
+
+    def _current_version(self, camera):
+        return self.versions.get(camera, 0) if camera else self.version
 
-        @self.app.route('/video_feed')
-        def video_feed():
-            return Response(self._gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    def peek(self, camera=None):
+        """
+        Non-blocking view of a stream.
+
+        Returns:
+            tuple: (stream version, source camera, source version or None if nothing to show,
+            cached JPEG of that version or None if it still has to be encoded)
+        """
+        with self.lock:
+            version = self._current_version(camera)
+            source = camera if camera else self.latest_camera
+            if source not in self.frames:
+                return version, source, None, None
+            source_version = self.versions[source]
+            cached = self.jpegs.get(source)
+            return version, source, source_version, cached[1] if cached and cached[0] == source_version else None
 
-    def _gen(self):
-        while self.active:
+    def encoded_jpeg(self, camera):
+        """Return the JPEG of the camera's latest frame, encoding it only if this version was not encoded yet."""
+        with self.lock:
+            encode_lock = self.encode_locks.setdefault(camera, threading.Lock())
+        with encode_lock:
+            with self.lock:
+                frame = self.frames.get(camera)
+                version = self.versions.get(camera)
+                cached = self.jpegs.get(camera)
+                quality = self.quality.get(camera, self.default_quality)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            if frame is None:
+                return None
+            ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ret:
+                return None
+            data = jpeg.tobytes()
             with self.lock:
-                if self.frame is not None:
-                    ret, jpeg = cv2.imencode('.jpg', self.frame)
-                    if ret:
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-            cv2.waitKey(1)
+                self.jpegs[camera] = (version, data)
+                self.stats['encoded'] += 1
+            return data
 
     def start(self, host='0.0.0.0', port=3000):
-        if self.thread is None or not self.thread.is_alive():
+        """Start streaming; the server is (re)bound if it is not running."""
+        with self.lock:
             self.active = True
-            self.thread = threading.Thread(target=self.app.run, kwargs={'host': host, 'port': port, 'threaded': True}, daemon=True)
-            self.thread.start()
+        if self.server is None or not self.server.is_running():
+            self.server = MJPEGStreamServer(self, host=host, port=port, write_timeout=self.write_timeout,
+                                            max_clients=self.max_clients)
+            if not self.server.start():
+                self.server = None
 
     def stop(self):
-        self.active = False
+        """Stop streaming, disconnect all viewers and release the port."""
+        with self.lock:
+            self.active = False
+        if self.server is not None:
+            self.server.notify()
+            self.server.stop()
+            self.server = None
+
+    def _notify(self):
+        # Called with self.lock held: wakes the viewers waiting in the stream server
+        if self.server is not None:
+            self.server.notify()
+
+    def update_frame(self, frame, camera=None):
+        """
+        Publish a new frame. The frame is not copied: the caller hands it over and
+        must not modify it afterwards. Encoding is deferred until a client asks for it.
+        """
+        self._publish(camera, frame, None)
+
+    def update_jpeg(self, jpeg, camera=None):
+        """Publish a frame that is already JPEG encoded (e.g. by a process-mode camera worker)."""
+        self._publish(camera, None, jpeg)
+
+    def _publish(self, camera, frame, jpeg):
+        with self.lock:
+            version = self.versions.get(camera, 0) + 1
+            self.versions[camera] = version
+            self.frames[camera] = frame
+            if jpeg is not None:
+                self.jpegs[camera] = (version, jpeg)
+            self.latest_camera = camera
+            self.version += 1
+            self.stats['published'] += 1
+            self._notify()
+
+    def set_quality(self, camera, quality):
+        """Set the JPEG quality used when streaming ``camera``."""
+        with self.lock:
+            self.quality[camera] = int(quality)
+
+    def clear_frame(self, camera):
+        """
+        Drop a camera's frame once its person-present window has timed out.
+        """
+        with self.lock:
+            # The version counter is kept so a returning camera never reuses a version a client has seen
+            self.frames.pop(camera, None)
+            self.jpegs.pop(camera, None)
+            if self.latest_camera == camera:
+                self.latest_camera = None
+            self.version += 1
+            self._notify()
+
+    def cameras(self):
+        """Return the names of cameras currently publishing frames."""
+        with self.lock:
+            return sorted(c for c in self.frames if c is not None)
 
-    def update_frame(self, frame):
+    def get_stats(self):
+        """Return viewer count, published/encoded frame counters and the stream server counters."""
         with self.lock:
-            self.frame = frame.copy()
+            stats = dict(self.stats, viewers=self.viewers)
+        server = self.server
+        stats['server'] = server.get_stats() if server is not None else {}
+        return stats
 
     def is_running(self):
-        return self.active and self.thread and self.thread.is_alive()
+        return self.active and self.server is not None and self.server.is_running()
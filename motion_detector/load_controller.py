@@ -0,0 +1,128 @@
+import threading
+import time
+
+# Quality levels from best (0) to most degraded. detector_fps 0 = unlimited.
+DEFAULT_LEVELS = [
+    {'detector_fps': 0, 'input_size': 608, 'jpeg_quality': 90},
+    {'detector_fps': 0, 'input_size': 416, 'jpeg_quality': 80},
+    {'detector_fps': 5, 'input_size': 416, 'jpeg_quality': 70},
+    {'detector_fps': 2, 'input_size': 320, 'jpeg_quality': 60},
+    {'detector_fps': 1, 'input_size': 320, 'jpeg_quality': 50},
+]
+
+
+class LoadController:
+    """
+    Load-adaptive degradation controller.
+
+    Every ``interval`` seconds it reads per-camera frame latency (from the
+    orchestrator stats) and system CPU/memory (from the ResourceMonitor). A camera
+    over its latency budget, or any camera while the box is overloaded, is moved
+    one quality level down (lower detector rate, smaller input size, lower JPEG
+    quality); after ``recover_after`` calm cycles it is moved one level back up.
+
+    Args:
+        orchestrator (MultiCameraOrchestrator): Source of per-camera stats; receives settings via apply_quality().
+        live_feed (LiveFeedManager): Receives the per-camera JPEG quality.
+        resource_monitor (ResourceMonitor, optional): Source of CPU/memory usage.
+        latency_budget_ms (float): Target capture-to-result latency per camera (default 500).
+        interval (float): Seconds between control steps (default 2).
+        cpu_high (float): CPU percent above which every camera degrades (default 90).
+        cpu_low (float): CPU percent below which recovery is allowed (default 70).
+        memory_high (float): Memory percent above which every camera degrades (default 90).
+        recover_after (int): Consecutive calm steps before restoring one level (default 3).
+        levels (list, optional): Quality levels, best first (default DEFAULT_LEVELS).
+        start_level (int): Initial level for every camera (default 1).
+    """
+    def __init__(self, orchestrator, live_feed, resource_monitor=None, latency_budget_ms=500, interval=2.0,
+                 cpu_high=90, cpu_low=70, memory_high=90, recover_after=3, levels=None, start_level=1):
+        self.orchestrator = orchestrator
+        self.live_feed = live_feed
+        self.resource_monitor = resource_monitor
+        self.latency_budget_ms = latency_budget_ms
+        self.interval = interval
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.memory_high = memory_high
+        self.recover_after = recover_after
+        self.levels = levels or DEFAULT_LEVELS
+        self.start_level = min(max(0, start_level), len(self.levels) - 1)
+        self.state = {}  # camera name -> decision dict
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval + 1)
+
+    def _loop(self):
+        while self.running:
+            self.step()
+            time.sleep(self.interval)
+
+    def _apply(self, camera, level):
+        settings = self.levels[level]
+        self.orchestrator.apply_quality(camera, settings)
+        self.live_feed.set_quality(camera, settings['jpeg_quality'])
+
+    def step(self):
+        """Run one control cycle over all cameras."""
+        system = self.resource_monitor.get_status() if self.resource_monitor else {}
+        cpu = system.get('cpu', 0)
+        memory = system.get('memory', 0)
+        overloaded = cpu >= self.cpu_high or memory >= self.memory_high
+        calm_system = cpu < self.cpu_low and memory < self.memory_high
+        now = time.time()
+        for camera, stats in self.orchestrator.get_stats()['cameras'].items():
+            latency = stats.get('latency_ms', 0.0)
+            with self.lock:
+                st = self.state.get(camera)
+                if st is None:
+                    st = self.state[camera] = {'level': self.start_level, 'calm_steps': 0, 'reason': 'initial',
+                                               'changed_at': now}
+                    self._apply(camera, st['level'])
+                level = st['level']
+                if latency > self.latency_budget_ms or overloaded:
+                    st['calm_steps'] = 0
+                    if level < len(self.levels) - 1:
+                        level += 1
+                        st['reason'] = f'latency {latency:.0f} ms' if latency > self.latency_budget_ms \
+                            else f'cpu {cpu:.0f}% / memory {memory:.0f}%'
+                elif calm_system and latency < self.latency_budget_ms / 2:
+                    st['calm_steps'] += 1
+                    if st['calm_steps'] >= self.recover_after and level > 0:
+                        level -= 1
+                        st['calm_steps'] = 0
+                        st['reason'] = 'load dropped'
+                else:
+                    st['calm_steps'] = 0
+                st['latency_ms'] = latency
+                if level != st['level']:
+                    st['level'] = level
+                    st['changed_at'] = now
+                    self._apply(camera, level)
+
+    def get_decisions(self):
+        """
+        Returns:
+            dict: {'latency_budget_ms', 'cameras': {name: {'level', 'settings', 'latency_ms', 'reason', 'changed_at'}}}
+        """
+        with self.lock:
+            cameras = {
+                camera: {
+                    'level': st['level'],
+                    'settings': dict(self.levels[st['level']]),
+                    'latency_ms': st.get('latency_ms', 0.0),
+                    'reason': st['reason'],
+                    'changed_at': st['changed_at'],
+                }
+                for camera, st in self.state.items()
+            }
+        return {'latency_budget_ms': self.latency_budget_ms, 'cameras': cameras}
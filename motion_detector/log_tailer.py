@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from collections import deque
+
+from motion_detector.utils import tail_lines
+
+
+class LogSubscription:
+    """
+    Bounded queue of (log, line) pairs for one subscriber (e.g. a dashboard tab).
+    When the subscriber does not keep up the oldest lines are dropped and counted,
+    so a stalled client never holds memory or the tailer.
+
+    Args:
+        match (callable, optional): ``match(log, line)`` -> bool; only matching lines are queued.
+        maxlen (int): Lines kept for the subscriber (default 500).
+    """
+    def __init__(self, match=None, maxlen=500):
+        self.match = match
+        self.lines = deque(maxlen=maxlen)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, log, lines):
+        if self.match is not None:
+            lines = [line for line in lines if self.match(log, line)]
+        if not lines:
+            return
+        with self.cond:
+            overflow = len(self.lines) + len(lines) - self.lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self.lines.extend((log, line) for line in lines)
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        """Wait up to ``timeout`` seconds for lines; returns all queued (log, line) pairs (may be empty)."""
+        with self.cond:
+            if not self.lines and not self.closed:
+                self.cond.wait(timeout)
+            items = list(self.lines)
+            self.lines.clear()
+            return items
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class LogTailer:
+    """
+    Follows several log files from one thread and broadcasts new lines to subscribers.
+
+    Every file is read from where the last poll stopped (starting at its end), so
+    the cost of a poll is the size of what was appended - independent of the file
+    size and of the number of subscribers. A changed inode (the file was rotated
+    or recreated) or a size below the read position (truncated, e.g. by the
+    dashboard's Clear button) starts the file over from the beginning. The last
+    ``history`` lines of each log are kept for new subscribers. A log may be
+    made of several files (e.g. the detection logs of every camera); their new
+    lines are broadcast under the same log name.
+
+    Args:
+        paths (dict): log name -> file path, or list of file paths.
+        interval (float): Seconds between polls (default 0.5).
+        history (int): Lines per log kept for new subscribers (default 100).
+        max_read (int): Bytes read per file and poll, so a huge burst is spread over polls (default 1 MiB).
+    """
+    def __init__(self, paths, interval=0.5, history=100, max_read=1024 * 1024):
+        self.paths = {log: [p] if isinstance(p, str) else list(dict.fromkeys(p)) for log, p in paths.items()}
+        self.interval = interval
+        self.max_read = max_read
+        self.state = {}  # (log, path) -> {'inode', 'offset', 'partial'}
+        self.recent = {log: deque(maxlen=history) for log in paths}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.stats = {'polls': 0, 'bytes_read': 0, 'lines': 0, 'rotations': 0}
+        for log, log_paths in self.paths.items():
+            for path in log_paths:
+                self._open(log, path)
+
+    def _open(self, log, path):
+        # Start at the end of the file, with its last lines as history
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.state[(log, path)] = {'inode': None, 'offset': 0, 'partial': b''}
+            return
+        self.recent[log].extend(line.rstrip('\n') for line in tail_lines(path, self.recent[log].maxlen))
+        self.state[(log, path)] = {'inode': st.st_ino, 'offset': st.st_size, 'partial': b''}
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='log-tailer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(self.interval * 2 + 1)
+        with self.lock:
+            for sub in self.subscribers:
+                sub.close()
+
+    def subscribe(self, match=None, maxlen=500):
+        """Register a subscriber; returns a LogSubscription receiving every new matching line."""
+        sub = LogSubscription(match, maxlen)
+        with self.lock:
+            self.subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            if sub in self.subscribers:
+                self.subscribers.remove(sub)
+        sub.close()
+
+    def history(self, log, n=None):
+        """Last ``n`` lines of a log seen by the tailer, oldest first."""
+        with self.lock:
+            lines = list(self.recent[log])
+        return lines[-n:] if n else lines
+
+    def _run(self):
+        while self.running:
+            self.poll()
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Read what was appended to every log since the last poll and broadcast it."""
+        for log, path in [(log, path) for log, log_paths in self.paths.items() for path in log_paths]:
+            lines = self._read(log, path)
+            if not lines:
+                continue
+            with self.lock:
+                self.recent[log].extend(lines)
+                self.stats['lines'] += len(lines)
+                subscribers = list(self.subscribers)
+            for sub in subscribers:
+                sub.put(log, lines)
+        with self.lock:
+            self.stats['polls'] += 1
+
+    def _read(self, log, path):
+        state = self.state[(log, path)]
+        try:
+            st = os.stat(path)
+        except OSError:
+            state.update(inode=None, offset=0, partial=b'')
+            return []
+        if st.st_ino != state['inode'] or st.st_size < state['offset']:
+            with self.lock:
+                if state['inode'] is not None:
+                    self.stats['rotations'] += 1
+                if st.st_ino == state['inode']:
+                    self.recent[log].clear()  # Truncated in place: the old lines are gone
+            state.update(inode=st.st_ino, offset=0, partial=b'')
+        if st.st_size == state['offset']:
+            return []
+        try:
+            with open(path, 'rb') as f:
+                f.seek(state['offset'])
+                data = f.read(min(st.st_size - state['offset'], self.max_read))
+        except OSError:
+            return []
+        state['offset'] += len(data)
+        with self.lock:
+            self.stats['bytes_read'] += len(data)
+        data = state['partial'] + data
+        *complete, state['partial'] = data.split(b'\n')
+        return [line.decode('utf-8', 'replace').rstrip('\r') for line in complete]
+
+    def get_stats(self):
+        """Return poll/line/byte/rotation counters, the subscriber count and lines dropped for slow subscribers."""
+        with self.lock:
+            return dict(self.stats, subscribers=len(self.subscribers),
+                        dropped=sum(sub.dropped for sub in self.subscribers))
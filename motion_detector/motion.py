@@ -7,7 +7,7 @@ import os
 from ftp_utils import upload_via_ftp
 
 class MotionDetector:
-    def __init__(self, sensitivity, threshold, reference_update, camera_index, logger, video_path=None):
+    def __init__(self, sensitivity, threshold, reference_update, camera_index, logger, video_path=None, analysis_scale=1.0):
         self.sensitivity = sensitivity
         self.threshold = threshold
         self.reference_update = reference_update
@@ -16,13 +16,24 @@ class MotionDetector:
         self.first_frame = None
         self.avg_frame = None
         self.video_path = video_path
+        # Motion analysis runs on a copy downscaled by this factor (1.0 = full resolution)
+        self.analysis_scale = analysis_scale
+        self.last_boxes = []
 
     def process_frame(self, frame):
-        greyscale = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(greyscale, (21, 21), 0)
-        if self.first_frame is None:
+        scale = self.analysis_scale
+        if scale != 1.0:
+            small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        greyscale = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # Keep the blur footprint constant relative to the scene (odd kernel, 21 at full res)
+        ksize = max(3, int(21 * scale) | 1)
+        blurred = cv2.GaussianBlur(greyscale, (ksize, ksize), 0)
+        if self.first_frame is None or self.first_frame.shape != blurred.shape:
             self.first_frame = blurred.copy()
-            self.avg_frame = blurred.astype('float')
+            self.avg_frame = blurred.astype('float32')
+            self.last_boxes = []
             return False, frame, None, None
         if self.reference_update:
             cv2.accumulateWeighted(blurred, self.avg_frame, 0.05)
@@ -31,13 +42,21 @@ class MotionDetector:
             frame_delta = cv2.absdiff(self.first_frame, blurred)
         thresh = cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY)[1]
         dilated = cv2.dilate(thresh, None, iterations=2)
-        cnts, _ = cv2.findContours(dilated.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cnts, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # sensitivity is a full-resolution area; contour areas shrink with the square of the scale
+        min_area = self.sensitivity * scale * scale
         detected = False
+        boxes = []
         for c in cnts:
-            if cv2.contourArea(c) > self.sensitivity:
+            if cv2.contourArea(c) > min_area:
                 (x, y, w, h) = cv2.boundingRect(c)
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                # Map the box back to full-resolution coordinates
+                x1, y1 = int(x / scale), int(y / scale)
+                x2, y2 = int((x + w) / scale), int((y + h) / scale)
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                boxes.append((x1, y1, x2, y2))
                 detected = True
+        self.last_boxes = boxes
         return detected, frame, dilated, frame_delta
 
     def run(self, hotkey, headless, log_file, stop_flag):
@@ -0,0 +1,254 @@
+import heapq
+import json
+import random
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (owner, state, next_attempt);
+"""
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class NotificationOutbox:
+    """
+    Durable, retrying delivery queue for notifications (SQLite, WAL mode).
+
+    ``enqueue()`` stores the message before returning, so queued alerts survive a
+    crash or restart and are delivered when the outbox of the same ``owner`` starts
+    again. Every channel has its own worker threads (``concurrency``), so a slow or
+    failing provider does not hold up the others. A failed send is retried after
+    ``backoff_base * 2**(attempts - 1)`` seconds (with jitter, capped at
+    ``backoff_max``); after ``max_attempts`` the message is dead-lettered (kept in
+    the table with state 'dead' for inspection).
+
+    Each channel holds at most ``max_pending`` undelivered messages. When full,
+    ``enqueue()`` waits up to ``timeout`` seconds for room and then rejects the
+    message, so a long provider outage cannot grow the queue without bound.
+    Delivered rows are kept for ``retention`` seconds to report delivery lag.
+
+    Args:
+        db_path (str): SQLite database file (shared by all owners and processes).
+        senders (dict): channel -> callable(payload) that raises on failure.
+        owner (str): Name of this outbox's rows (e.g. the camera); outboxes sharing a file deliver only their own.
+        concurrency (int or dict): Worker threads per channel, or channel -> threads (default 1).
+        max_attempts (int): Attempts before a message is dead-lettered (default 8).
+        backoff_base (float): First retry delay in seconds (default 5).
+        backoff_max (float): Maximum retry delay in seconds (default 900).
+        max_pending (int): Undelivered messages allowed per channel (default 500).
+        retention (float): Seconds delivered rows are kept (default 3600).
+        on_dead (callable, optional): Called as ``on_dead(channel, payload, error)`` for a dead-lettered message.
+    """
+    def __init__(self, db_path, senders, owner='system', concurrency=1, max_attempts=8, backoff_base=5.0,
+                 backoff_max=900.0, max_pending=500, retention=3600.0, on_dead=None):
+        self.db_path = db_path
+        self.senders = senders
+        self.owner = owner
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_pending = max_pending
+        self.retention = retention
+        self.on_dead = on_dead
+        self.db = _connect(db_path)
+        self.cond = threading.Condition()
+        # channel -> heap of (next_attempt, id, payload, attempts, created_at)
+        self.queues = {channel: [] for channel in senders}
+        self.in_flight = {channel: 0 for channel in senders}
+        self.running = False
+        self.worker_threads = []
+        self.last_prune = 0.0
+        self.stats = {channel: {'sent': 0, 'retries': 0, 'dead': 0, 'rejected': 0, 'lag_total': 0.0}
+                      for channel in senders}
+        self._load()
+
+    def _load(self):
+        rows = self.db.execute(
+            "SELECT id, channel, payload, attempts, next_attempt, created_at FROM outbox "
+            "WHERE owner = ? AND state = 'pending'", (self.owner,)).fetchall()
+        for row_id, channel, payload, attempts, next_attempt, created_at in rows:
+            # Rows of channels that are no longer configured stay in the table untouched
+            if channel in self.queues:
+                heapq.heappush(self.queues[channel], (next_attempt, row_id, json.loads(payload), attempts, created_at))
+
+    def start(self):
+        self.running = True
+        for channel in self.senders:
+            n = self.concurrency.get(channel, 1) if isinstance(self.concurrency, dict) else self.concurrency
+            for i in range(max(1, int(n))):
+                t = threading.Thread(target=self._worker, args=(channel,), name=f'outbox-{channel}-{i}', daemon=True)
+                t.start()
+                self.worker_threads.append(t)
+
+    def stop(self, timeout=5):
+        """Stop the workers; undelivered messages stay in the database for the next start."""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for t in self.worker_threads:
+            t.join(timeout)
+        # A send still blocked in its transport finishes later and records its result
+        if not any(t.is_alive() for t in self.worker_threads):
+            with self.cond:
+                self.db.close()
+        self.worker_threads = []
+
+    def depth(self, channel):
+        # Called with self.cond held
+        return len(self.queues[channel]) + self.in_flight[channel]
+
+    def enqueue(self, channel, payload, timeout=0):
+        """
+        Store a message for delivery.
+
+        Args:
+            channel (str): One of the configured channels.
+            payload (dict): JSON-serialisable message passed to the channel's sender.
+            timeout (float): Seconds to wait for room when the channel is full (0 = reject at once).
+        Returns:
+            int or None: Row id, or None if the channel stayed full (the message is dropped).
+        """
+        if channel not in self.queues:
+            raise ValueError(f"Unknown channel: {channel}")
+        deadline = time.time() + (timeout or 0)
+        with self.cond:
+            while self.depth(channel) >= self.max_pending:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    self.stats[channel]['rejected'] += 1
+                    return None
+                self.cond.wait(remaining)
+            now = time.time()
+            cur = self.db.execute(
+                "INSERT INTO outbox (owner, channel, payload, next_attempt, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.owner, channel, json.dumps(payload), now, now))
+            self.db.commit()
+            heapq.heappush(self.queues[channel], (now, cur.lastrowid, payload, 0, now))
+            self.cond.notify_all()
+            return cur.lastrowid
+
+    def _next(self, channel):
+        queue = self.queues[channel]
+        with self.cond:
+            while self.running:
+                now = time.time()
+                if queue and queue[0][0] <= now:
+                    self.in_flight[channel] += 1
+                    return heapq.heappop(queue)
+                self.cond.wait(queue[0][0] - now if queue else None)
+            return None
+
+    def _worker(self, channel):
+        sender = self.senders[channel]
+        while True:
+            item = self._next(channel)
+            if item is None:
+                return
+            try:
+                sender(item[2])
+                error = None
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            self._finish(channel, item, error)
+
+    def _finish(self, channel, item, error):
+        _, row_id, payload, attempts, created_at = item
+        attempts += 1
+        now = time.time()
+        dead = False
+        with self.cond:
+            self.in_flight[channel] -= 1
+            stats = self.stats[channel]
+            if error is None:
+                stats['sent'] += 1
+                stats['lag_total'] += now - created_at
+                self.db.execute("UPDATE outbox SET state = 'sent', attempts = ?, delivered_at = ?, last_error = NULL "
+                                "WHERE id = ?", (attempts, now, row_id))
+            elif attempts >= self.max_attempts:
+                dead = True
+                stats['dead'] += 1
+                self.db.execute("UPDATE outbox SET state = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                                (attempts, error, row_id))
+            else:
+                stats['retries'] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.0)
+                heapq.heappush(self.queues[channel], (now + delay, row_id, payload, attempts, created_at))
+                self.db.execute("UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                                (attempts, now + delay, error, row_id))
+            if now - self.last_prune > 60:
+                self.last_prune = now
+                self.db.execute("DELETE FROM outbox WHERE owner = ? AND state = 'sent' AND delivered_at < ?",
+                                (self.owner, now - self.retention))
+            self.db.commit()
+            self.cond.notify_all()
+        if dead and self.on_dead is not None:
+            self.on_dead(channel, payload, error)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: channel -> {'pending', 'in_flight', 'sent', 'retries', 'dead', 'rejected',
+            'oldest_pending_s', 'avg_lag_s'} (lag = enqueue to delivery).
+        """
+        now = time.time()
+        result = {}
+        with self.cond:
+            for channel, queue in self.queues.items():
+                stats = dict(self.stats[channel])
+                lag_total = stats.pop('lag_total')
+                stats['pending'] = len(queue)
+                stats['in_flight'] = self.in_flight[channel]
+                stats['oldest_pending_s'] = round(now - min(i[4] for i in queue), 1) if queue else 0.0
+                stats['avg_lag_s'] = round(lag_total / stats['sent'], 3) if stats['sent'] else 0.0
+                result[channel] = stats
+        return result
+
+
+def outbox_summary(db_path, window=3600.0):
+    """
+    Depth and delivery lag per channel for every owner of an outbox database
+    (read-only; used by the dashboard, which may run in another process than the outboxes).
+
+    Returns:
+        dict: channel -> {'pending', 'dead', 'oldest_pending_s', 'sent_recent', 'avg_lag_s'}
+        (``sent_recent``/``avg_lag_s`` over the last ``window`` seconds).
+    """
+    now = time.time()
+    db = sqlite3.connect(db_path, timeout=5)
+    try:
+        rows = db.execute(
+            "SELECT channel, "
+            "SUM(state = 'pending'), SUM(state = 'dead'), "
+            "MIN(CASE WHEN state = 'pending' THEN created_at END), "
+            "SUM(state = 'sent' AND delivered_at >= ?), "
+            "AVG(CASE WHEN state = 'sent' AND delivered_at >= ? THEN delivered_at - created_at END) "
+            "FROM outbox GROUP BY channel", (now - window, now - window)).fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # No outbox table yet
+    finally:
+        db.close()
+    return {channel: {'pending': pending or 0, 'dead': dead or 0,
+                      'oldest_pending_s': round(now - oldest, 1) if oldest else 0.0,
+                      'sent_recent': sent or 0, 'avg_lag_s': round(lag, 3) if lag else 0.0}
+            for channel, pending, dead, oldest, sent, lag in rows}
@@ -1,11 +1,106 @@
 import smtplib
+import hashlib
+import json
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque, OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 import time
 import threading
 import os
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(pool_connections=8, pool_maxsize=16):
+    """
+    Process-wide requests.Session shared by all notifiers, so Telegram, WhatsApp and
+    Discord calls reuse kept-alive TCP/TLS connections instead of a handshake per alert.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+class SMTPConnection:
+    """
+    Reusable, logged-in SMTP connection.
+
+    The connection is opened on the first send and kept for the next ones; after
+    ``idle_timeout`` seconds without use it is closed and reopened (servers drop idle
+    sessions anyway). If the server has dropped it, the message is resent once on a
+    fresh connection.
+
+    Args:
+        host (str): SMTP server.
+        port (int): SMTP port.
+        username (str, optional): Login user (no login when empty).
+        password (str, optional): Login password.
+        use_ssl (bool): SMTP over TLS (SMTP_SSL) instead of plain SMTP (default True).
+        idle_timeout (float): Seconds of inactivity after which the connection is renewed (default 60).
+        timeout (float): Socket timeout in seconds (default 10).
+    """
+    def __init__(self, host, port, username=None, password=None, use_ssl=True, idle_timeout=60.0, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.server = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self.connects = 0
+
+    def _connect(self):
+        cls = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = cls(self.host, self.port, timeout=self.timeout)
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+        self.connects += 1
+
+    def _close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                self.server.close()
+            self.server = None
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        with self.lock:
+            if self.server is not None and time.time() - self.last_used > self.idle_timeout:
+                self._close()
+            fresh = self.server is None
+            if fresh:
+                self._connect()
+            try:
+                self.server.sendmail(from_addr, to_addrs, msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._close()
+                if fresh:
+                    raise
+                self._connect()
+                self.server.sendmail(from_addr, to_addrs, msg)
+            self.last_used = time.time()
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+
 class Notifier:
     """
     Notification manager for sending alerts via Email, Telegram, WhatsApp, and Discord.
@@ -14,11 +109,18 @@ class Notifier:
       - Rate limiting per channel
       - Logging of all notifications (success/failure) with context
       - Simple template support for notification messages
+      - Persistent transports: a pooled HTTP session and a reusable SMTP connection
+      - Per-channel send latency metrics (get_stats)
+      - Snapshot attachments: one JPEG buffer attached by email, Telegram (sendPhoto) and Discord
     Args:
         config (dict): Notification configuration dictionary.
         log_file (str): Path to the notification log file (default: 'notification_log.txt').
+        session (requests.Session, optional): HTTP session (default: the shared pooled session).
+        outbox_cfg (dict, optional): ``notification_outbox`` settings; when enabled, notify_all goes
+            through a durable NotificationOutbox instead of the thread pool.
+        name (str): Owner name of this notifier's outbox rows (default 'system').
     """
-    def __init__(self, config, log_file="notification_log.txt"):
+    def __init__(self, config, log_file="notification_log.txt", session=None, outbox_cfg=None, name='system'):
         """
         Initialize the Notifier with channel configs, logging, and rate limiting.
         """
@@ -26,15 +128,59 @@ class Notifier:
         self.telegram_cfg = config.get('telegram', {})
         self.whatsapp_cfg = config.get('whatsapp', {})
         self.discord_cfg = config.get('discord', {})
+        self.session = session or get_http_session()
+        self.smtp = None  # SMTPConnection, opened on the first email
+        self.metrics = {}  # channel -> {'sent', 'failed', 'latencies'}
         self.executor = ThreadPoolExecutor(max_workers=4)
         self.log_file = log_file
         self.last_sent = {}  # Tracks last sent time per channel for rate limiting
         self.lock = threading.Lock()  # Protects shared state
         self.rate_limit_seconds = 30  # Minimum seconds between notifications per channel
+        # Snapshots referenced by queued outbox messages (the JSON payload only carries the key)
+        self.attachments = OrderedDict()
+        self.max_attachments = 32
         # Simple templates, can be expanded
         self.templates = {
             'default': "[{{timestamp}}] {{channel}}: {{subject}} - {{message}}",
         }
+        self.outbox = None
+        outbox_cfg = outbox_cfg or {}
+        self.enqueue_timeout = outbox_cfg.get('enqueue_timeout', 0)
+        if outbox_cfg.get('enabled', False) and self.enabled_channels():
+            from motion_detector.notification_outbox import NotificationOutbox
+            db_path = outbox_cfg.get('path') or os.path.join(os.path.dirname(__file__), '../notification_outbox.db')
+            self.outbox = NotificationOutbox(
+                os.path.abspath(db_path),
+                {channel: self._outbox_send(channel) for channel in self.enabled_channels()},
+                owner=name,
+                concurrency=outbox_cfg.get('concurrency', 1),
+                max_attempts=outbox_cfg.get('max_attempts', 8),
+                backoff_base=outbox_cfg.get('backoff_base', 5.0),
+                backoff_max=outbox_cfg.get('backoff_max', 900.0),
+                max_pending=outbox_cfg.get('max_pending', 500),
+                retention=outbox_cfg.get('retention', 3600.0),
+                on_dead=self._dead_letter
+            )
+            self.outbox.start()
+
+    def update_config(self, config):
+        """
+        Apply changed channel settings (config.yaml reload). The SMTP connection is reopened
+        if its server or login changed; channels enabled later than the outbox was created are
+        sent without it until the next restart.
+        """
+        email_cfg = config.get('email', {})
+        smtp_keys = ('smtp_server', 'smtp_port', 'username', 'password', 'smtp_ssl')
+        with self.lock:
+            smtp = None
+            if any(email_cfg.get(k) != self.email_cfg.get(k) for k in smtp_keys):
+                smtp, self.smtp = self.smtp, None
+            self.email_cfg = email_cfg
+            self.telegram_cfg = config.get('telegram', {})
+            self.whatsapp_cfg = config.get('whatsapp', {})
+            self.discord_cfg = config.get('discord', {})
+        if smtp is not None:
+            smtp.close()
 
     def log_notification(self, channel, subject, message, status, error=None):
         """
@@ -43,7 +189,7 @@ class Notifier:
             channel (str): Notification channel (email, telegram, etc)
             subject (str): Notification subject
             message (str): Notification message
-            status (str): 'SENT' or 'FAILED'
+            status (str): 'SENT', 'FAILED', 'DEAD' (outbox gave up) or 'DROPPED' (outbox full)
             error (str, optional): Error message if failed
         """
         log_entry = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {channel.upper()} | {subject} | {status} | {message}"
@@ -53,6 +199,59 @@ class Notifier:
             with open(self.log_file, 'a') as f:
                 f.write(log_entry + "\n")
 
+    def record_latency(self, channel, seconds, ok, attachment_bytes=0):
+        """Record the duration of one send attempt on a channel (and the size of an attached snapshot)."""
+        with self.lock:
+            m = self.metrics.setdefault(channel, {'sent': 0, 'failed': 0, 'latencies': deque(maxlen=200),
+                                                  'attachments': 0, 'attachment_bytes': 0})
+            m['sent' if ok else 'failed'] += 1
+            m['latencies'].append(seconds)
+            if attachment_bytes:
+                m['attachments'] += 1
+                m['attachment_bytes'] += attachment_bytes
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: channel -> {'sent', 'failed', 'last_ms', 'avg_ms', 'p95_ms'} over the last 200 sends,
+            'attachments'/'attachment_bytes' (snapshots uploaded), plus 'outbox' (depth, retries,
+            dead letters, lag) when the outbox is enabled.
+        """
+        stats = {}
+        with self.lock:
+            for channel, m in self.metrics.items():
+                lat = sorted(m['latencies'])
+                stats[channel] = {
+                    'sent': m['sent'],
+                    'failed': m['failed'],
+                    'last_ms': round(m['latencies'][-1] * 1000, 1) if lat else None,
+                    'avg_ms': round(sum(lat) / len(lat) * 1000, 1) if lat else None,
+                    'p95_ms': round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1) if lat else None,
+                    'attachments': m['attachments'],
+                    'attachment_bytes': m['attachment_bytes'],
+                }
+        if self.outbox is not None:
+            for channel, outbox_stats in self.outbox.get_stats().items():
+                stats.setdefault(channel, {'sent': 0, 'failed': 0, 'last_ms': None, 'avg_ms': None, 'p95_ms': None,
+                                           'attachments': 0, 'attachment_bytes': 0})['outbox'] = outbox_stats
+        return stats
+
+    def _smtp_connection(self):
+        with self.lock:
+            if self.smtp is None:
+                self.smtp = SMTPConnection(self.email_cfg['smtp_server'], self.email_cfg['smtp_port'],
+                                           self.email_cfg.get('username'), self.email_cfg.get('password'),
+                                           use_ssl=self.email_cfg.get('smtp_ssl', True),
+                                           idle_timeout=self.email_cfg.get('smtp_idle_timeout', 60))
+            return self.smtp
+
+    def close(self):
+        """Stop the outbox workers and close the SMTP connection (the HTTP session is shared and stays open)."""
+        if self.outbox is not None:
+            self.outbox.stop()
+        if self.smtp is not None:
+            self.smtp.close()
+
     def is_rate_limited(self, channel):
         """
         Check if the channel is rate-limited (i.e., recently sent).
@@ -85,88 +284,145 @@ class Notifier:
             .replace("{{subject}}", subject) \
             .replace("{{message}}", message)
 
-    def send_email(self, subject, body):
+    def send_email(self, subject, body, image=None):
         """
         Send an email notification asynchronously if enabled and not rate-limited.
-        Logs the result.
+        ``image`` (JPEG bytes) is attached. Logs the result.
         """
-        channel = 'email'
-        if not self.email_cfg.get('enabled', False) or self.is_rate_limited(channel):
-            return
-        msg = MIMEText(body)
-        msg['Subject'] = subject
-        msg['From'] = self.email_cfg['from']
-        msg['To'] = self.email_cfg['to']
-        try:
-            with smtplib.SMTP_SSL(self.email_cfg['smtp_server'], self.email_cfg['smtp_port']) as server:
-                server.login(self.email_cfg['username'], self.email_cfg['password'])
-                server.sendmail(self.email_cfg['from'], [self.email_cfg['to']], msg.as_string())
-            self.log_notification(channel, subject, body, 'SENT')
-        except smtplib.SMTPException as e:
-            self.log_notification(channel, subject, body, 'FAILED', str(e))
-        except Exception as e:
-            self.log_notification(channel, subject, body, 'FAILED', str(e))
+        if self.email_cfg.get('enabled', False) and not self.is_rate_limited('email'):
+            self._send('email', subject, body, image=image)
 
-    def send_telegram(self, message, subject="Alert"):
+    def send_telegram(self, message, subject="Alert", image=None):
         """
-        Send a Telegram notification if enabled and not rate-limited. Logs the result.
+        Send a Telegram notification if enabled and not rate-limited, as a photo with
+        caption when ``image`` (JPEG bytes) is given. Logs the result.
         """
-        channel = 'telegram'
-        if not self.telegram_cfg.get('enabled', False) or self.is_rate_limited(channel):
-            return
-        token = self.telegram_cfg['bot_token']
-        chat_id = self.telegram_cfg['chat_id']
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        data = {'chat_id': chat_id, 'text': message}
-        try:
-            requests.post(url, data=data, timeout=5)
-            self.log_notification(channel, subject, message, 'SENT')
-        except requests.RequestException as e:
-            self.log_notification(channel, subject, message, 'FAILED', str(e))
-        except Exception as e:
-            self.log_notification(channel, subject, message, 'FAILED', str(e))
+        if self.telegram_cfg.get('enabled', False) and not self.is_rate_limited('telegram'):
+            self._send('telegram', subject, message, image=image)
 
     def send_whatsapp(self, message, subject="Alert"):
         """
         Send a WhatsApp notification if enabled and not rate-limited. Logs the result.
         """
-        channel = 'whatsapp'
-        if not self.whatsapp_cfg.get('enabled', False) or self.is_rate_limited(channel):
-            return
-        phone = self.whatsapp_cfg['phone']
-        apikey = self.whatsapp_cfg['apikey']
-        url = f"https://api.callmebot.com/whatsapp.php?phone={phone}&text={message}&apikey={apikey}"
-        try:
-            requests.get(url, timeout=5)
-            self.log_notification(channel, subject, message, 'SENT')
-        except requests.RequestException as e:
-            self.log_notification(channel, subject, message, 'FAILED', str(e))
-        except Exception as e:
-            self.log_notification(channel, subject, message, 'FAILED', str(e))
+        if self.whatsapp_cfg.get('enabled', False) and not self.is_rate_limited('whatsapp'):
+            self._send('whatsapp', subject, message)
 
-    def send_discord(self, message, subject="Alert"):
+    def send_discord(self, message, subject="Alert", image=None):
         """
-        Send a Discord webhook notification if enabled and not rate-limited. Logs the result.
+        Send a Discord webhook notification if enabled and not rate-limited, with ``image``
+        (JPEG bytes) as file attachment. Logs the result.
         """
-        channel = 'discord'
-        if not self.discord_cfg.get('enabled', False) or self.is_rate_limited(channel):
+        if self.discord_cfg.get('enabled', False) and not self.is_rate_limited('discord'):
+            self._send('discord', subject, message, image=image)
+
+    def _deliver_email(self, subject, body, image=None):
+        if image:
+            msg = MIMEMultipart()
+            msg.attach(MIMEText(body))
+            msg.attach(MIMEImage(image, 'jpeg', name='snapshot.jpg'))
+        else:
+            msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.email_cfg['from']
+        msg['To'] = self.email_cfg['to']
+        self._smtp_connection().sendmail(self.email_cfg['from'], [self.email_cfg['to']], msg.as_string())
+
+    def _deliver_telegram(self, subject, message, image=None):
+        api_url = self.telegram_cfg.get('api_url', 'https://api.telegram.org')
+        if image:
+            # Photo captions are limited to 1024 characters
+            url = f"{api_url}/bot{self.telegram_cfg['bot_token']}/sendPhoto"
+            data = {'chat_id': self.telegram_cfg['chat_id'], 'caption': message[:1024]}
+            files = {'photo': ('snapshot.jpg', image, 'image/jpeg')}
+            self.session.post(url, data=data, files=files, timeout=10).raise_for_status()
             return
-        webhook_url = self.discord_cfg['webhook_url']
+        url = f"{api_url}/bot{self.telegram_cfg['bot_token']}/sendMessage"
+        data = {'chat_id': self.telegram_cfg['chat_id'], 'text': message}
+        self.session.post(url, data=data, timeout=5).raise_for_status()
+
+    def _deliver_whatsapp(self, subject, message, image=None):
+        # CallMeBot only sends text
+        url = self.whatsapp_cfg.get('api_url', 'https://api.callmebot.com/whatsapp.php')
+        params = {'phone': self.whatsapp_cfg['phone'], 'text': message, 'apikey': self.whatsapp_cfg['apikey']}
+        self.session.get(url, params=params, timeout=5).raise_for_status()
+
+    def _deliver_discord(self, subject, message, image=None):
         data = {"content": message}
+        if image:
+            files = {'file': ('snapshot.jpg', image, 'image/jpeg')}
+            self.session.post(self.discord_cfg['webhook_url'], data={'payload_json': json.dumps(data)},
+                              files=files, timeout=10).raise_for_status()
+            return
+        self.session.post(self.discord_cfg['webhook_url'], json=data, timeout=5).raise_for_status()
+
+    def _send(self, channel, subject, message, raise_errors=False, image=None):
+        """
+        Deliver one message on ``channel`` over the persistent transports, recording latency
+        and logging the result. Errors are logged and swallowed unless ``raise_errors``.
+        """
+        deliver = getattr(self, f'_deliver_{channel}')
+        attachment_bytes = len(image) if image and channel != 'whatsapp' else 0
+        start = time.perf_counter()
         try:
-            requests.post(webhook_url, json=data, timeout=5)
-            self.log_notification(channel, subject, message, 'SENT')
-        except requests.RequestException as e:
-            self.log_notification(channel, subject, message, 'FAILED', str(e))
+            deliver(subject, message, image)
         except Exception as e:
+            self.record_latency(channel, time.perf_counter() - start, False)
             self.log_notification(channel, subject, message, 'FAILED', str(e))
+            if raise_errors:
+                raise
+            return False
+        self.record_latency(channel, time.perf_counter() - start, True, attachment_bytes)
+        self.log_notification(channel, subject, message, 'SENT')
+        return True
+
+    def _store_attachment(self, image):
+        key = hashlib.sha1(image).hexdigest()
+        with self.lock:
+            self.attachments[key] = image
+            self.attachments.move_to_end(key)
+            while len(self.attachments) > self.max_attachments:
+                self.attachments.popitem(last=False)
+        return key
 
-    def notify_all(self, subject, message):
+    def _outbox_send(self, channel):
+        def send(payload):
+            # A snapshot evicted from memory (or lost in a restart) degrades the message to text
+            image = self.attachments.get(payload['image']) if payload.get('image') else None
+            self._send(channel, payload['subject'], payload['message'], raise_errors=True, image=image)
+        return send
+
+    def _dead_letter(self, channel, payload, error):
+        self.log_notification(channel, payload['subject'], payload['message'], 'DEAD', error)
+
+    def enabled_channels(self):
+        configs = {'email': self.email_cfg, 'telegram': self.telegram_cfg,
+                   'whatsapp': self.whatsapp_cfg, 'discord': self.discord_cfg}
+        return [channel for channel, cfg in configs.items() if cfg.get('enabled', False)]
+
+    def notify_all(self, subject, message, rate_limited=True, image=None):
         """
         Send notifications to all enabled channels asynchronously using templates.
+        With an outbox the messages are stored durably and delivered (and retried) by its workers.
+        ``rate_limited=False`` skips the per-channel rate limit (used for alert digests, which
+        already bound the message rate and must not be dropped). ``image`` (JPEG bytes, see
+        SnapshotEncoder) is attached by every channel that supports media, as the same buffer.
         """
         rendered = self.render_template('default', subject, message)
-        self.executor.submit(self.send_email, subject, rendered)
-        self.executor.submit(self.send_telegram, rendered, subject)
-        self.executor.submit(self.send_whatsapp, rendered, subject)
-        self.executor.submit(self.send_discord, rendered, subject)
+        if self.outbox is None and rate_limited:
+            self.executor.submit(self.send_email, subject, rendered, image)
+            self.executor.submit(self.send_telegram, rendered, subject, image)
+            self.executor.submit(self.send_whatsapp, rendered, subject)
+            self.executor.submit(self.send_discord, rendered, subject, image)
+            return
+        image_key = self._store_attachment(image) if image and self.outbox is not None else None
+        for channel in self.enabled_channels():
+            if rate_limited and self.is_rate_limited(channel):
+                continue
+            if self.outbox is None or channel not in self.outbox.queues:
+                self.executor.submit(self._send, channel, subject, rendered, image=image)
+                continue
+            payload = {'subject': subject, 'message': rendered}
+            if image_key and channel != 'whatsapp':
+                payload['image'] = image_key
+            if self.outbox.enqueue(channel, payload, timeout=self.enqueue_timeout) is None:
+                self.log_notification(channel, subject, rendered, 'DROPPED', 'outbox full')
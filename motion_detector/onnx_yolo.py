@@ -0,0 +1,186 @@
+import os
+import ast
+import cv2
+import numpy as np
+
+
+class ONNXYOLODetector:
+    """
+    YOLOv5/v8 detector running an ONNX export through OpenCV DNN or ONNX Runtime.
+
+    Avoids the torch + ultralytics stack at runtime on CPU-only boxes. A ``.pt``
+    ``model_path`` is exported once with ultralytics (the ``.onnx`` file is cached
+    next to the weights and reused afterwards); a ``.onnx`` path is loaded directly.
+    With ``quantize`` a dynamically int8-quantized copy is produced with
+    ``onnxruntime.quantization`` and used instead; its ConvInteger/MatMulInteger
+    operators only run on the onnxruntime backend (OpenCV DNN cannot load them).
+
+    Args:
+        model_path (str): Path to ``.pt`` weights or an ``.onnx`` model.
+        conf_threshold (float): Confidence threshold for detections.
+        target_classes (list): Class names to keep (None keeps all).
+        input_size (int): Square network input size, e.g. 320/416/640 (default 640).
+        backend (str): 'opencv' (cv2.dnn, default) or 'onnxruntime'.
+        quantize (bool): Use an int8-quantized model (default False; requires backend 'onnxruntime').
+        nms_threshold (float): IoU threshold for non-maximum suppression (default 0.45).
+        class_names (list, optional): Class names; read from the model metadata or models/coco.names otherwise.
+    """
+    def __init__(self, model_path='models/yolov5s.onnx', conf_threshold=0.5, target_classes=None,
+                 input_size=640, backend='opencv', quantize=False, nms_threshold=0.45, class_names=None):
+        if backend not in ('opencv', 'onnxruntime'):
+            raise ValueError(f"Unknown ONNX backend: {backend}")
+        if quantize and backend != 'onnxruntime':
+            raise ValueError("quantize requires backend 'onnxruntime' "
+                             "(OpenCV DNN cannot load dynamically quantized models)")
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.input_size = int(input_size)
+        self.backend = backend
+        self.onnx_path = export_onnx(model_path, self.input_size)
+        if quantize:
+            self.onnx_path = quantize_onnx(self.onnx_path)
+        if backend == 'onnxruntime':
+            try:
+                import onnxruntime as ort
+            except ImportError:
+                raise ImportError("onnxruntime must be installed for the onnxruntime backend. Please install via 'pip install onnxruntime'.")
+            self.session = ort.InferenceSession(self.onnx_path, providers=['CPUExecutionProvider'])
+            self.input_name = self.session.get_inputs()[0].name
+            self.net = None
+        else:
+            self.net = cv2.dnn.readNetFromONNX(self.onnx_path)
+            self.session = None
+        self.class_names = class_names or self._load_class_names()
+        self.target_classes = set(target_classes) if target_classes else None
+
+    def _load_class_names(self):
+        # ultralytics stores names as a dict literal in the ONNX metadata
+        names = None
+        if self.session is not None:
+            names = self.session.get_modelmeta().custom_metadata_map.get('names')
+        else:
+            try:
+                import onnx
+                meta = {p.key: p.value for p in onnx.load(self.onnx_path, load_external_data=False).metadata_props}
+                names = meta.get('names')
+            except Exception:
+                names = None
+        if names:
+            parsed = ast.literal_eval(names)
+            return [parsed[k] for k in sorted(parsed)] if isinstance(parsed, dict) else list(parsed)
+        coco = os.path.join(os.path.dirname(__file__), '../models/coco.names')
+        if os.path.exists(coco):
+            with open(coco) as f:
+                return [line.strip() for line in f if line.strip()]
+        return []
+
+    def detect(self, frame):
+        """
+        Run inference on a single frame and return filtered detections.
+
+        Returns:
+            List of tuples: (x1, y1, x2, y2, confidence, class_name)
+        """
+        image, scale, pad = letterbox(frame, self.input_size)
+        blob = cv2.dnn.blobFromImage(image, 1 / 255.0, (self.input_size, self.input_size), swapRB=True, crop=False)
+        if self.session is not None:
+            output = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            self.net.setInput(blob)
+            output = self.net.forward()
+        return decode_yolo_output(output, frame.shape[:2], scale, pad, self.class_names,
+                                  self.conf_threshold, self.nms_threshold, self.target_classes)
+
+
+def export_onnx(model_path, input_size=640):
+    """
+    Return an ONNX model for ``model_path``, exporting ``.pt`` weights with ultralytics if
+    no up-to-date ``<name>_<input_size>.onnx`` exists next to them.
+    """
+    if model_path.endswith('.onnx'):
+        return model_path
+    onnx_path = f"{os.path.splitext(model_path)[0]}_{input_size}.onnx"
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(model_path):
+        return onnx_path
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        raise ImportError("ultralytics is required once to export .pt weights to ONNX. Please install via 'pip install ultralytics' or point model_path at an .onnx file.")
+    exported = YOLO(model_path).export(format='onnx', imgsz=input_size)
+    if exported != onnx_path:
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+
+def quantize_onnx(onnx_path):
+    """Return a dynamically int8-quantized copy of ``onnx_path`` (cached as ``<name>.int8.onnx``)."""
+    int8_path = f"{os.path.splitext(onnx_path)[0]}.int8.onnx"
+    if os.path.exists(int8_path) and os.path.getmtime(int8_path) >= os.path.getmtime(onnx_path):
+        return int8_path
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        raise ImportError("onnxruntime must be installed for int8 quantization. Please install via 'pip install onnxruntime'.")
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def letterbox(frame, size):
+    """
+    Resize keeping aspect ratio and pad to a ``size`` x ``size`` square.
+
+    Returns:
+        tuple: (image, scale, (pad_x, pad_y)) needed to map boxes back to the frame.
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    resized = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    image = cv2.copyMakeBorder(resized, pad_y, size - nh - pad_y, pad_x, size - nw - pad_x,
+                               cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return image, scale, (pad_x, pad_y)
+
+
+def decode_yolo_output(output, frame_shape, scale, pad, class_names, conf_threshold, nms_threshold,
+                       target_classes=None):
+    """
+    Decode a raw YOLOv5 ``(1, N, 5 + C)`` or YOLOv8 ``(1, 4 + C, N)`` output into detections.
+
+    Returns:
+        List of tuples: (x1, y1, x2, y2, confidence, class_name) in frame coordinates.
+    """
+    pred = output[0]
+    if pred.shape[0] < pred.shape[1]:
+        # YOLOv8: channels first, no objectness
+        pred = pred.T
+        class_scores = pred[:, 4:]
+    else:
+        class_scores = pred[:, 5:] * pred[:, 4:5]
+    class_ids = class_scores.argmax(axis=1)
+    confidences = class_scores[np.arange(len(class_ids)), class_ids]
+    keep = confidences >= conf_threshold
+    if not keep.any():
+        return []
+    pred, class_ids, confidences = pred[keep], class_ids[keep], confidences[keep]
+    h, w = frame_shape
+    cx, cy, bw, bh = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+    x1 = np.clip((cx - bw / 2 - pad[0]) / scale, 0, w - 1)
+    y1 = np.clip((cy - bh / 2 - pad[1]) / scale, 0, h - 1)
+    x2 = np.clip((cx + bw / 2 - pad[0]) / scale, 0, w - 1)
+    y2 = np.clip((cy + bh / 2 - pad[1]) / scale, 0, h - 1)
+    boxes = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1).astype(int).tolist()
+    scores = confidences.astype(float).tolist()
+    if hasattr(cv2.dnn, 'NMSBoxesBatched'):
+        idxs = cv2.dnn.NMSBoxesBatched(boxes, scores, class_ids.tolist(), conf_threshold, nms_threshold)
+    else:
+        idxs = cv2.dnn.NMSBoxes(boxes, scores, conf_threshold, nms_threshold)
+    detections = []
+    for i in np.array(idxs).flatten():
+        cid = int(class_ids[i])
+        name = class_names[cid] if cid < len(class_names) else str(cid)
+        if target_classes is not None and name not in target_classes:
+            continue
+        x, y, bw_i, bh_i = boxes[i]
+        detections.append((x, y, x + bw_i, y + bh_i, scores[i], name))
+    return detections
@@ -0,0 +1,416 @@
+import os
+import threading
+import multiprocessing
+import queue
+import cv2
+from camera_pipeline import CameraPipeline, KNOWN_FACES_DIR
+from batch_inference import BatchInferenceServer, BatchedDetector
+
+
+def _process_main(cam_cfg, config, stop_flag, out_queue, video_path, control_queue=None, face_gallery=None):
+    """
+    Entry point of a process-mode camera worker. Annotated frames are JPEG
+    encoded (at the quality the LoadController set for this camera) before
+    crossing the process boundary and are streamed by the parent as-is; stats
+    are forwarded as plain dicts. The parent owns the live feed and API server.
+    """
+    pipeline = None
+
+    def publish(camera, frame):
+        if frame is None:
+            # A clear must not be lost, otherwise the feed keeps a stale frame
+            try:
+                out_queue.put(('frame', camera, None), timeout=1)
+            except queue.Full:
+                pass
+            return
+        quality = pipeline.quality.get('jpeg_quality', 95) if pipeline is not None else 95
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        if not ok:
+            return
+        try:
+            out_queue.put_nowait(('frame', camera, jpeg.tobytes()))
+        except queue.Full:
+            pass  # Parent is behind; the next frame supersedes this one
+
+    def clip(camera, path, info):
+        # Clips are rare and must reach the parent's transcode queue
+        try:
+            out_queue.put(('clip', camera, (path, info)), timeout=5)
+        except queue.Full:
+            print(f"[WARN] Could not hand clip {path} to the parent process")
+
+    def alert(camera, event):
+        # Alerts are merged into a digest in the parent; like clips they must not be lost
+        try:
+            out_queue.put(('alert', camera, event), timeout=5)
+        except queue.Full:
+            print(f"[WARN] Could not hand alert from {camera} to the parent process")
+
+    def report(camera, stats):
+        try:
+            out_queue.put_nowait(('stats', camera, stats))
+        except queue.Full:
+            pass
+
+    pipeline = CameraPipeline(cam_cfg, config, stop_flag, publish, video_path=video_path, report_stats=report,
+                              control_queue=control_queue, on_clip=clip,
+                              on_alert=alert if _digest_enabled(config) else None, face_gallery=face_gallery)
+    pipeline.run()
+
+
+def _digest_enabled(config):
+    return bool((config.get('alert_digest', {}) or {}).get('enabled', False))
+
+
+class MultiCameraOrchestrator:
+    """
+    Runs one CameraPipeline per configured camera at the same time.
+
+    In ``thread`` mode every pipeline runs in a thread of this process (OpenCV and
+    the DNN backends release the GIL for most of their work). In ``process`` mode
+    every pipeline runs in its own process so capture, motion analysis and
+    inference scale across cores; frames and stats come back over a bounded queue.
+    Either way the single LiveFeedManager is shared, so its port is bound once.
+    OpenCV's HighGUI is not thread-safe, so in thread mode the pipelines only hand
+    their display frames over and ``update_windows()`` draws them from the main
+    thread (a process worker draws its own window on its own main thread).
+
+    With ``batch_inference.enabled`` (thread mode only), cameras that use the same
+    YOLOv5/v8 weights share one model behind a BatchInferenceServer, so frames from
+    all cameras are run as one batch.
+
+    Args:
+        config (dict): Full configuration loaded from config.yaml.
+        live_feed (LiveFeedManager): Shared web stream.
+        mode (str): 'thread' or 'process' (default from ``orchestrator.mode``, else 'thread').
+        video_path (str, optional): Video file used instead of the cameras (simulation).
+    """
+    def __init__(self, config, live_feed, mode=None, video_path=None):
+        orch_cfg = config.get('orchestrator', {}) or {}
+        self.config = config
+        self.live_feed = live_feed
+        self.mode = mode or orch_cfg.get('mode', 'thread')
+        if self.mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown orchestrator mode: {self.mode}")
+        self.video_path = video_path
+        self.cameras = config.get('cameras', [])
+        lf_cfg = config.get('live_feed', {})
+        self.lf_host = lf_cfg.get('host', '0.0.0.0')
+        self.lf_port = lf_cfg.get('port', 3000)
+        self.lock = threading.Lock()
+        self.workers = {}  # camera name -> Thread or Process
+        self.pipelines = {}  # camera name -> CameraPipeline (thread mode only)
+        self._stats = {}  # camera name -> last stats reported by a process worker
+        self.batch_servers = {}  # 'model_path@device' -> BatchInferenceServer
+        self.control_queues = {}  # camera name -> Queue of quality/face/config messages (process mode only)
+        # Called as clip_handler(camera, path, info) for every event clip (e.g. TranscodeQueue submission)
+        self.clip_handler = None
+        # Called as alert_handler(camera, event) for every alert when alert_digest is enabled (the AlertDigest)
+        self.alert_handler = None
+        self.display_lock = threading.Lock()
+        self.display = {}  # camera name -> latest frame to show, None to close (thread mode)
+        self.windows = set()  # cameras with an open window (main thread only)
+        if self.mode == 'process':
+            self.ctx = multiprocessing.get_context(orch_cfg.get('start_method'))
+            self.stop_flag = self.ctx.Event()
+            self.queue = self.ctx.Queue(maxsize=orch_cfg.get('queue_size', 8) * max(len(self.cameras), 1))
+            self._drain_thread = threading.Thread(target=self._drain, daemon=True)
+        else:
+            self.stop_flag = threading.Event()
+
+    @staticmethod
+    def camera_name(cam_cfg):
+        return cam_cfg.get('name', f"Camera{cam_cfg.get('camera_index', 0)}")
+
+    def _batched_detector(self, cam_cfg):
+        """
+        Return a BatchedDetector on a shared server for this camera, or None when batching
+        does not apply (disabled, process mode, classic detector, ultralytics missing).
+        """
+        batch_cfg = self.config.get('batch_inference', {}) or {}
+        det_cfg = cam_cfg.get('detector', {}) or {}
+        if not batch_cfg.get('enabled', False) or self.mode != 'thread':
+            return None
+        if det_cfg.get('type', 'yolo_v3') not in ('yolo_v5', 'yolo_v8'):
+            return None
+        key = f"{det_cfg.get('model_path')}@{det_cfg.get('device') or 'default'}"
+        server = self.batch_servers.get(key)
+        if server is None:
+            try:
+                from advanced_yolo import AdvancedYOLODetector
+            except ImportError:
+                return None
+            # The shared model keeps everything above the lowest threshold of its cameras
+            thresholds = [(c.get('detector', {}) or {}).get('conf_threshold', 0.5) for c in self.cameras
+                          if (c.get('detector', {}) or {}).get('model_path') == det_cfg.get('model_path')]
+            model = AdvancedYOLODetector(model_path=det_cfg.get('model_path'),
+                                         conf_threshold=min(thresholds or [0.5]),
+                                         target_classes=None,
+                                         device=det_cfg.get('device', None))
+            server = BatchInferenceServer(model, max_batch=batch_cfg.get('max_batch', 8),
+                                          max_wait_ms=batch_cfg.get('max_wait_ms', 10))
+            server.start()
+            self.batch_servers[key] = server
+        return BatchedDetector(server, conf_threshold=det_cfg.get('conf_threshold', 0.5),
+                               target_classes=det_cfg.get('target_classes', ['person']))
+
+    def publish_frame(self, camera, frame):
+        """
+        Route a camera's annotated frame (ndarray or JPEG bytes) to the shared live feed; ``None`` clears it.
+        The web stream is started on the first frame and stopped when no camera has a person in view.
+        """
+        with self.lock:
+            if frame is None:
+                self.live_feed.clear_frame(camera)
+                if not self.live_feed.cameras():
+                    self.live_feed.stop()
+                return
+            if not self.live_feed.is_running():
+                self.live_feed.start(host=self.lf_host, port=self.lf_port)
+            if isinstance(frame, bytes):
+                # Already JPEG encoded by a process worker: pass it through without a decode/encode round trip
+                self.live_feed.update_jpeg(frame, camera)
+            else:
+                self.live_feed.update_frame(frame, camera)
+
+    def show_frame(self, camera, frame):
+        """Queue a thread-mode pipeline's frame for display (latest wins); ``None`` closes its window."""
+        with self.display_lock:
+            self.display[camera] = frame
+
+    def update_windows(self):
+        """
+        Draw the pending display frames and poll the keyboard ('q' stops all cameras).
+        Must be called from the main thread.
+
+        Returns:
+            bool: True while a camera window is open.
+        """
+        with self.display_lock:
+            pending, self.display = self.display, {}
+        for camera, frame in pending.items():
+            window_name = f'Live Feed - {camera}'
+            if frame is None:
+                if camera in self.windows:
+                    cv2.destroyWindow(window_name)
+                    self.windows.discard(camera)
+                continue
+            if camera not in self.windows:
+                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+                self.windows.add(camera)
+            cv2.imshow(window_name, frame)
+        if self.windows and cv2.waitKey(1) & 0xFF == ord('q'):
+            self.stop_flag.set()
+        return bool(self.windows)
+
+    def _handle_clip(self, camera, path, info):
+        if self.clip_handler is not None:
+            try:
+                self.clip_handler(camera, path, info)
+            except Exception as e:
+                print(f"[ERROR] Clip handler failed for {path}: {e}")
+
+    def _handle_alert(self, camera, event):
+        if self.alert_handler is not None:
+            try:
+                self.alert_handler(camera, event)
+            except Exception as e:
+                print(f"[ERROR] Alert handler failed for {camera}: {e}")
+
+    def _drain(self):
+        while True:
+            try:
+                kind, camera, payload = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self.is_alive():
+                    break
+                continue
+            if kind == 'stats':
+                self._stats[camera] = payload
+            elif kind == 'clip':
+                self._handle_clip(camera, *payload)
+            elif kind == 'alert':
+                self._handle_alert(camera, payload)
+            else:
+                self.publish_frame(camera, payload)
+
+    def _load_face_gallery(self):
+        """
+        Refresh the known-face encoding cache once for all cameras, before any capture thread
+        runs. Returns (names, encodings), or None when face recognition is unavailable.
+        """
+        if not os.path.isdir(KNOWN_FACES_DIR):
+            return None
+        try:
+            from face_recognizer import load_known_faces
+        except ImportError:
+            return None
+        try:
+            return load_known_faces(KNOWN_FACES_DIR)
+        except Exception as e:
+            print(f"[WARN] Could not load known faces: {e}")
+            return None
+
+    def start(self):
+        """Start one worker per configured camera."""
+        face_gallery = self._load_face_gallery()
+        for cam_cfg in self.cameras:
+            name = self.camera_name(cam_cfg)
+            if self.mode == 'process':
+                self.control_queues[name] = self.ctx.Queue()
+                worker = self.ctx.Process(
+                    target=_process_main,
+                    args=(cam_cfg, self.config, self.stop_flag, self.queue, self.video_path,
+                          self.control_queues[name], face_gallery),
+                    name=f'camera-{name}', daemon=True)
+            else:
+                pipeline = CameraPipeline(cam_cfg, self.config, self.stop_flag, self.publish_frame,
+                                          video_path=self.video_path,
+                                          person_detector=self._batched_detector(cam_cfg),
+                                          on_clip=self._handle_clip,
+                                          on_alert=self._handle_alert if _digest_enabled(self.config) else None,
+                                          show_frame=self.show_frame, face_gallery=face_gallery)
+                self.pipelines[name] = pipeline
+                worker = threading.Thread(target=pipeline.run, name=f'camera-{name}', daemon=True)
+            self.workers[name] = worker
+            worker.start()
+            print(f"Configured camera: {name} with log {cam_cfg.get('log_file', 'camera_log.txt')} ({self.mode} mode)")
+        if self.mode == 'process':
+            self._drain_thread.start()
+
+    def apply_quality(self, camera, settings):
+        """Forward LoadController settings to a camera's pipeline (directly or over its control queue)."""
+        if self.mode == 'process':
+            if camera in self.control_queues:
+                self.control_queues[camera].put(dict(settings))
+        elif camera in self.pipelines:
+            self.pipelines[camera].apply_quality(settings)
+
+    def apply_config(self, config):
+        """
+        Push an edited configuration (ConfigService reload) to the running cameras, matched by
+        name. Added or removed cameras are only reported; they take effect after a restart.
+        """
+        self.config = config
+        known = {self.camera_name(c) for c in self.cameras}
+        updated = {self.camera_name(c): c for c in config.get('cameras', [])}
+        for name in sorted(known.symmetric_difference(updated)):
+            print(f"[WARN] Camera {name} added or removed in config.yaml; restart to apply")
+        for name, cam_cfg in updated.items():
+            if name not in known:
+                continue
+            if self.mode == 'process':
+                if name in self.control_queues:
+                    self.control_queues[name].put({'config': cam_cfg})
+            elif name in self.pipelines:
+                self.pipelines[name].apply_config(cam_cfg)
+
+    def _broadcast_face(self, op, name, encoding=None):
+        for camera, pipeline in self.pipelines.items():
+            pipeline.update_face_gallery(op, name, encoding)
+        for camera, control in self.control_queues.items():
+            control.put({'face': (op, name, encoding)})
+
+    def check_face_name(self, name):
+        """
+        Cheap checks before an enrollment image is decoded or encoded.
+
+        Raises:
+            RuntimeError: face_recognition is not installed.
+            ValueError: ``name`` cannot be used as a known_faces/ file name.
+        """
+        try:
+            import face_recognizer  # Fails without the face_recognition library
+        except ImportError as e:
+            raise RuntimeError(str(e))
+        from face_cache import VALID_NAME
+        if not VALID_NAME.match(name or ''):
+            raise ValueError(f"Invalid name: {name!r}")
+
+    def enroll_face(self, name, frame):
+        """
+        Enroll (or replace) an identity at runtime: the face is encoded once here, saved to
+        known_faces/ with its cached encoding (replacing earlier images of the name), and added
+        to every pipeline's face index.
+
+        Raises:
+            RuntimeError: face_recognition is not installed.
+            ValueError: invalid name or no face in the image.
+        Returns:
+            dict: {'name', 'path'}
+        """
+        self.check_face_name(name)
+        from face_recognizer import encode_face_image, save_known_face
+        encoding = encode_face_image(frame)
+        if encoding is None:
+            raise ValueError("No face found in image")
+        path = save_known_face(KNOWN_FACES_DIR, name, frame, encoding)
+        self._broadcast_face('add', name, encoding)
+        return {'name': name, 'path': path}
+
+    def remove_face(self, name):
+        """
+        Remove an identity from known_faces/ and from every pipeline's face index.
+
+        Returns:
+            int: Number of images deleted.
+        """
+        try:
+            from face_recognizer import delete_known_face
+        except ImportError as e:
+            raise RuntimeError(str(e))
+        deleted = delete_known_face(KNOWN_FACES_DIR, name)
+        self._broadcast_face('remove', name)
+        return deleted
+
+    def face_identities(self):
+        """Return {name: images with a face} as recorded in the known-face encoding cache."""
+        from face_cache import FaceEncodingCache
+        cache = FaceEncodingCache(os.path.join(KNOWN_FACES_DIR, '.encodings_cache.npz'))
+        cache.load()
+        return cache.identities()
+
+    def is_alive(self):
+        return any(w.is_alive() for w in self.workers.values())
+
+    def join(self, timeout=None):
+        for worker in self.workers.values():
+            worker.join(timeout)
+
+    def stop(self, timeout=5):
+        """Signal all pipelines to stop and wait for them; stragglers in process mode are terminated."""
+        self.stop_flag.set()
+        self.join(timeout)
+        if self.mode == 'process':
+            for worker in self.workers.values():
+                if worker.is_alive():
+                    worker.terminate()
+            self._drain_thread.join(timeout)
+        for server in self.batch_servers.values():
+            server.stop()
+        for camera in self.windows:
+            cv2.destroyWindow(f'Live Feed - {camera}')
+        self.windows.clear()
+
+    def get_stats(self):
+        """
+        Return per-camera counters and the aggregate frame rate.
+
+        Returns:
+            dict: {'mode', 'aggregate_fps', 'cameras': {name: {...}}, 'batch_inference': {model: {...}}}
+        """
+        cameras = {}
+        for name, worker in self.workers.items():
+            if self.mode == 'process':
+                stats = dict(self._stats.get(name, {}))
+            else:
+                stats = self.pipelines[name].get_stats()
+            stats['alive'] = worker.is_alive()
+            cameras[name] = stats
+        return {
+            'mode': self.mode,
+            'aggregate_fps': round(sum(s.get('fps', 0.0) for s in cameras.values()), 2),
+            'cameras': cameras,
+            'batch_inference': {key: server.get_stats() for key, server in self.batch_servers.items()},
+        }
@@ -7,7 +7,8 @@ import os
 class ResourceMonitor:
     """
     Monitors system resources (disk, CPU, memory) and notifies if thresholds are exceeded.
-    Thresholds can be updated at runtime by changing the resource_thresholds.json file.
+    Thresholds can be updated at runtime by changing the resource_thresholds.json file
+    (re-read only when its modification time changes).
     """
     def __init__(self, notifier, check_interval=30, thresholds_file=None):
         """
@@ -23,9 +24,17 @@ class ResourceMonitor:
         self.status = {'disk': 0, 'cpu': 0, 'memory': 0}
         self.running = False
         self.thread = threading.Thread(target=self._monitor, daemon=True)
+        self.thresholds_mtime = None
         self._load_thresholds()
 
     def _load_thresholds(self):
+        try:
+            mtime = os.stat(self.thresholds_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self.thresholds_mtime:
+            return
+        self.thresholds_mtime = mtime
         try:
             with open(self.thresholds_file, 'r') as f:
                 self.thresholds = json.load(f)
@@ -47,7 +56,7 @@ class ResourceMonitor:
 
     def _monitor(self):
         while self.running:
-            self._load_thresholds()  # Reload thresholds every cycle
+            self._load_thresholds()  # Picks up edits to the thresholds file
             disk = psutil.disk_usage('/')
             cpu = psutil.cpu_percent(interval=1)
             memory = psutil.virtual_memory().percent
@@ -0,0 +1,68 @@
+import threading
+import time
+import cv2
+
+
+class SnapshotEncoder:
+    """
+    Annotated JPEG thumbnail of the frame that triggered an alert.
+
+    The frame is first scaled down to ``max_width`` and the person boxes and labels
+    are drawn on the small copy (so the live frame is not touched and drawing is
+    cheap), then encoded once. The resulting bytes are attached as-is by every
+    notification channel that supports media.
+
+    Args:
+        max_width (int): Width of the thumbnail in pixels; smaller frames are not enlarged (default 640).
+        quality (int): JPEG quality 1-100 (default 80).
+    """
+    def __init__(self, max_width=640, quality=80):
+        self.max_width = max_width
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.stats = {'encoded': 0, 'failed': 0, 'encode_ms_total': 0.0, 'bytes_total': 0, 'last_bytes': 0}
+
+    def encode(self, frame, persons=()):
+        """
+        Args:
+            frame (np.ndarray): BGR frame.
+            persons (list): Boxes as (x1, y1, x2, y2, conf) or (x1, y1, x2, y2, conf, label), in frame coordinates.
+        Returns:
+            bytes or None: JPEG data, None if encoding failed.
+        """
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_width / float(w)) if self.max_width else 1.0
+        if scale < 1.0:
+            thumb = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            thumb = frame.copy()
+        for p in persons or []:
+            x1, y1, x2, y2 = (int(v * scale) for v in p[:4])
+            cv2.rectangle(thumb, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            label = p[5] if len(p) > 5 else None
+            if label:
+                cv2.putText(thumb, str(label), (x1, max(y1 - 5, 0)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        ok, jpeg = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            if not ok:
+                self.stats['failed'] += 1
+                return None
+            data = jpeg.tobytes()
+            self.stats['encoded'] += 1
+            self.stats['encode_ms_total'] += elapsed * 1000
+            self.stats['bytes_total'] += len(data)
+            self.stats['last_bytes'] = len(data)
+        return data
+
+    def get_stats(self):
+        """Return encode count, average encode time and average/last JPEG size."""
+        with self.lock:
+            stats = dict(self.stats)
+        encode_ms_total = stats.pop('encode_ms_total')
+        bytes_total = stats.pop('bytes_total')
+        n = stats['encoded']
+        stats['avg_encode_ms'] = round(encode_ms_total / n, 2) if n else None
+        stats['avg_bytes'] = int(bytes_total / n) if n else None
+        return stats
@@ -0,0 +1,224 @@
+import asyncio
+import mimetypes
+import os
+import socket
+import threading
+from urllib.parse import unquote, urlsplit
+
+BOUNDARY = b'frame'
+
+
+class MJPEGStreamServer:
+    """
+    asyncio MJPEG server for the live feed (stdlib only, one event loop thread).
+
+    Every viewer is a coroutine instead of an OS thread. A client waits for the
+    next frame version of its stream; JPEGs come from the LiveFeedManager, which
+    encodes each version once (in the default executor, so the loop never blocks
+    on an encode) and all clients share the bytes.
+
+    Backpressure is per client: nothing is queued in the transport and the kernel
+    send buffer is kept small, and the client only asks for a new frame once the
+    previous one has been flushed, so a slow client skips straight to the newest version instead
+    of queueing old frames. A client that cannot take a frame within
+    ``write_timeout`` seconds is disconnected.
+
+    Args:
+        live_feed (LiveFeedManager): Source of frames and of the index page.
+        host (str): Bind address.
+        port (int): Bind port (0 picks a free port; the bound port is stored in ``self.port``).
+        write_timeout (float): Seconds a client may take to accept one frame (default 10).
+        max_clients (int): Streaming clients accepted at once (default 500).
+        frame_timeout (float): Seconds a client waits for a new frame before re-checking state (default 1).
+        send_buffer (int): Kernel send buffer per viewer in bytes, 0 for the OS default (default 64 KiB).
+    """
+    def __init__(self, live_feed, host='0.0.0.0', port=3000, write_timeout=10.0, max_clients=500, frame_timeout=1.0,
+                 send_buffer=65536):
+        self.live_feed = live_feed
+        self.host = host
+        self.port = port
+        self.write_timeout = write_timeout
+        self.max_clients = max_clients
+        self.frame_timeout = frame_timeout
+        self.send_buffer = send_buffer
+        self.static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../static'))
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.error = None
+        self._ready = threading.Event()
+        self._tick = None
+        self._clients = set()
+        self._encoding = {}  # (camera, version) -> Future of the JPEG being encoded
+        self.stats = {'clients': 0, 'frames_sent': 0, 'frames_dropped': 0, 'bytes_sent': 0,
+                      'slow_disconnects': 0, 'rejected': 0}
+
+    def start(self):
+        """
+        Start the event loop thread and bind the port.
+
+        Returns:
+            bool: True once listening, False if the port could not be bound.
+        """
+        self._ready.clear()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='live-feed-server', daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            print(f"[ERROR] Live feed server could not listen on {self.host}:{self.port}: {self.error}")
+            return False
+        return True
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._tick = asyncio.Event()
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, reuse_address=True))
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        tasks = list(self._clients)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self, timeout=5):
+        """Close the listening socket and all client connections, then join the loop thread."""
+        if self.loop is None or not self.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive() and self.error is None
+
+    def notify(self):
+        """Wake waiting clients; called from any thread when a frame is published or cleared."""
+        if self.loop is not None and self.stats['clients'] and self.is_running():
+            try:
+                self.loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                pass  # Loop closed during shutdown
+
+    def _wake(self):
+        tick, self._tick = self._tick, asyncio.Event()
+        tick.set()
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    async def _handle(self, reader, writer):
+        self._clients.add(asyncio.current_task())
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, 'text/plain', b'Method Not Allowed')
+                return
+            path = unquote(urlsplit(parts[1]).path)
+            if path == '/':
+                await self._respond(writer, 200, 'text/html; charset=utf-8', self.live_feed.render_index().encode())
+            elif path == '/video_feed' or path.startswith('/video_feed/'):
+                await self._stream(writer, path[len('/video_feed/'):] or None)
+            elif path.startswith('/static/'):
+                await self._static(writer, path[len('/static/'):])
+            else:
+                await self._respond(writer, 404, 'text/plain', b'Not Found')
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            writer.close()
+
+    async def _respond(self, writer, status, content_type, body):
+        reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}[status]
+        writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n'
+                     f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+
+    async def _static(self, writer, name):
+        path = os.path.abspath(os.path.join(self.static_dir, name))
+        if not path.startswith(self.static_dir + os.sep) or not os.path.isfile(path):
+            await self._respond(writer, 404, 'text/plain', b'Not Found')
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        await self._respond(writer, 200, mimetypes.guess_type(path)[0] or 'application/octet-stream', body)
+
+    async def _stream(self, writer, camera):
+        if self.stats['clients'] >= self.max_clients:
+            self.stats['rejected'] += 1
+            await self._respond(writer, 503, 'text/plain', b'Too many viewers')
+            return
+        # No frame queued in user space and only a small kernel send buffer, so a slow
+        # client waits for the newest frame rather than working through a backlog
+        writer.transport.set_write_buffer_limits(high=0)
+        sock = writer.get_extra_info('socket')
+        if sock is not None and self.send_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=' + BOUNDARY +
+                     b'\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n')
+        self.stats['clients'] += 1
+        self.live_feed.viewer_joined()
+        try:
+            seen = 0
+            while self.live_feed.active:
+                jpeg, version = await self._next(camera, seen)
+                if jpeg is None:
+                    seen = version
+                    continue
+                if seen and camera and version > seen + 1:
+                    self.stats['frames_dropped'] += version - seen - 1
+                seen = version
+                writer.write(b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\nContent-Length: ' +
+                             str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+                try:
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+                except asyncio.TimeoutError:
+                    self.stats['slow_disconnects'] += 1
+                    return
+                self.stats['frames_sent'] += 1
+                self.stats['bytes_sent'] += len(jpeg)
+        finally:
+            self.stats['clients'] -= 1
+            self.live_feed.viewer_left()
+
+    async def _next(self, camera, seen):
+        tick = self._tick
+        version, source, source_version, jpeg = self.live_feed.peek(camera)
+        if version == seen or source_version is None:
+            if version == seen:
+                try:
+                    await asyncio.wait_for(tick.wait(), self.frame_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return None, version
+        if jpeg is None:
+            # The first client encodes (off the loop), everyone else awaits the same result
+            key = (source, source_version)
+            future = self._encoding.get(key)
+            if future is None:
+                future = self._encoding[key] = self.loop.run_in_executor(None, self.live_feed.encoded_jpeg, source)
+                future.add_done_callback(lambda _: self._encoding.pop(key, None))
+            jpeg = await future
+        return jpeg, version
@@ -0,0 +1,167 @@
+import time
+import itertools
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise IoU between two arrays of boxes.
+
+    Args:
+        a (ndarray): (N, 4) boxes as x1, y1, x2, y2.
+        b (ndarray): (M, 4) boxes as x1, y1, x2, y2.
+    Returns:
+        ndarray: (N, M) IoU values.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    a = np.asarray(a, dtype=float)[:, None, :]
+    b = np.asarray(b, dtype=float)[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class Track:
+    """
+    One tracked object with a constant-velocity Kalman filter (SORT state:
+    centre x/y, area, aspect ratio and the velocities of the first three).
+
+    Attributes:
+        id (int): Stable track ID.
+        label (str): Class name.
+        conf (float): Confidence of the last matched detection.
+        first_seen (float): Time the track was created.
+        last_seen (float): Time of the last matched detection.
+        hits (int): Number of matched detections.
+    """
+    # Shared model matrices
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1
+    H = np.eye(4, 7)
+    Q = np.diag([1, 1, 1, 1, 0.01, 0.01, 0.0001])
+    R = np.diag([1, 1, 10, 10])
+
+    def __init__(self, track_id, box, conf, label, now):
+        self.id = track_id
+        self.label = label
+        self.conf = conf
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 1
+        self.x = np.zeros(7)
+        self.x[:4] = self._to_z(box)
+        self.P = np.diag([10, 10, 10, 10, 1e4, 1e4, 1e4])
+
+    @staticmethod
+    def _to_z(box):
+        x1, y1, x2, y2 = box
+        w, h = max(x2 - x1, 1), max(y2 - y1, 1)
+        return np.array([x1 + w / 2, y1 + h / 2, w * h, w / h], dtype=float)
+
+    def predict(self):
+        # Do not let the area go negative
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def update(self, box, conf, now):
+        z = self._to_z(box)
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+        self.conf = conf
+        self.last_seen = now
+        self.hits += 1
+
+    def box(self):
+        cx, cy, s, r = self.x[:4]
+        w = np.sqrt(max(s * r, 1))
+        h = max(s, 1) / w
+        return (int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2))
+
+    def dwell(self, now=None):
+        """Seconds since the track was first seen."""
+        return (time.time() if now is None else now) - self.first_seen
+
+    def to_tuple(self):
+        """Detection-style tuple: (x1, y1, x2, y2, conf, label)."""
+        return self.box() + (self.conf, self.label)
+
+
+class MultiObjectTracker:
+    """
+    Lightweight SORT-style tracker (pure NumPy) that keeps boxes alive between detector runs.
+
+    Call ``update(detections)`` on frames where the detector ran and ``predict()`` on the
+    others; both advance every track by one frame and return the live tracks. Detections
+    are associated to tracks of the same class by greedy IoU matching.
+
+    Args:
+        max_age (float): Seconds a track survives without a matching detection (default 2).
+        iou_threshold (float): Minimum IoU to associate a detection with a track (default 0.3).
+        min_hits (int): Matched detections before a track is reported (default 1).
+        default_label (str): Label for detectors returning 5-tuples (default 'person').
+    """
+    def __init__(self, max_age=2.0, iou_threshold=0.3, min_hits=1, default_label='person'):
+        self.max_age = max_age
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.default_label = default_label
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def _prune(self, now):
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+
+    def _confirmed(self):
+        return [t for t in self.tracks if t.hits >= self.min_hits]
+
+    def predict(self, now=None):
+        """Advance all tracks one frame without detections."""
+        now = time.time() if now is None else now
+        for t in self.tracks:
+            t.predict()
+        self._prune(now)
+        return self._confirmed()
+
+    def update(self, detections, now=None):
+        """
+        Advance all tracks one frame and correct them with fresh detections.
+
+        Args:
+            detections (list): (x1, y1, x2, y2, conf) or (x1, y1, x2, y2, conf, label) tuples.
+        Returns:
+            list: Confirmed Track objects.
+        """
+        now = time.time() if now is None else now
+        for t in self.tracks:
+            t.predict()
+        dets = [(d[:4], d[4], d[5] if len(d) > 5 and d[5] else self.default_label) for d in detections]
+        ious = iou_matrix([t.box() for t in self.tracks], [d[0] for d in dets])
+        for ti, t in enumerate(self.tracks):
+            for di, d in enumerate(dets):
+                if t.label != d[2]:
+                    ious[ti, di] = 0
+        matched_tracks, matched_dets = set(), set()
+        # Greedy assignment, best overlaps first
+        for flat in np.argsort(-ious, axis=None):
+            ti, di = np.unravel_index(flat, ious.shape)
+            if ious[ti, di] < self.iou_threshold:
+                break
+            if ti in matched_tracks or di in matched_dets:
+                continue
+            self.tracks[ti].update(dets[di][0], dets[di][1], now)
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+        for di, (box, conf, label) in enumerate(dets):
+            if di not in matched_dets:
+                self.tracks.append(Track(next(self._ids), box, conf, label, now))
+        self._prune(now)
+        return self._confirmed()
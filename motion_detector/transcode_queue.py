@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from compression_upload import compress_video
+
+# Lower runs first: fresh event clips go ahead of bulk archive work
+PRIORITIES = {'event': 0, 'normal': 5, 'archive': 10}
+
+
+class TranscodeQueue:
+    """
+    Background transcoding queue around ``compress_video``.
+
+    Jobs wait in a priority heap (``event`` < ``normal`` < ``archive``, FIFO within
+    a priority) and are run by ``workers`` threads, each driving at most one ffmpeg
+    process, so ``workers`` is also the cap on concurrent encodes. ffmpeg runs
+    niced and with a bounded thread count so encoding uses spare CPU without
+    starving the camera pipelines.
+
+    Queued (and interrupted running) jobs are persisted to ``state_file`` and
+    re-queued on the next start. Every job records wait/encode time, progress
+    and encoder speed.
+
+    Args:
+        state_file (str): JSON file holding the pending jobs.
+        workers (int): Worker threads = concurrent ffmpeg processes (default 1).
+        crf (int): Default x264 CRF (default 28).
+        preset (str): x264 preset (default 'fast').
+        threads (int): ffmpeg threads per job, 0 for ffmpeg's default (default 2).
+        nice (int): Niceness of the ffmpeg processes (default 10).
+        timeout (float, optional): Seconds before a job's ffmpeg is killed.
+        delete_source (bool): Remove the input after a successful encode (default False).
+        history (int): Finished jobs kept for inspection (default 100).
+        transcode_fn (callable, optional): Replacement for ``compress_video`` (same keyword arguments).
+        on_done (callable, optional): Called as ``on_done(job)`` after a successful encode.
+    """
+    def __init__(self, state_file, workers=1, crf=28, preset='fast', threads=2, nice=10, timeout=None,
+                 delete_source=False, history=100, transcode_fn=None, on_done=None):
+        self.state_file = state_file
+        self.workers = max(1, int(workers))
+        self.crf = crf
+        self.preset = preset
+        self.ffmpeg_threads = threads
+        self.nice = nice
+        self.timeout = timeout
+        self.delete_source = delete_source
+        self.transcode_fn = transcode_fn or compress_video
+        self.on_done = on_done
+        self.jobs = {}  # job id -> job dict (pending, running and recent finished jobs)
+        self.finished = deque(maxlen=history)
+        self.heap = []
+        self.seq = itertools.count()
+        self.processes = {}  # job id -> Popen of the running ffmpeg
+        self.cond = threading.Condition()
+        self.running = False
+        self.worker_threads = []
+        self.totals = {'done': 0, 'failed': 0, 'cancelled': 0, 'encode_seconds': 0.0, 'wait_seconds': 0.0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable transcode queue {self.state_file}: {e}")
+            return
+        for job in saved:
+            # Jobs that were running when the process stopped start over
+            job.update(state='queued', progress=0.0, started_at=None, requeued=job.get('requeued', 0) + 1)
+            self._enqueue(job)
+
+    def _save(self):
+        # Called with self.cond held
+        pending = [j for j in self.jobs.values() if j['state'] in ('queued', 'running')]
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(sorted(pending, key=lambda j: j['submitted_at']), f)
+        os.replace(tmp_path, self.state_file)
+
+    def _enqueue(self, job):
+        self.jobs[job['id']] = job
+        heapq.heappush(self.heap, (job['priority'], next(self.seq), job['id']))
+
+    def submit(self, input_path, output_path=None, priority='normal', crf=None):
+        """
+        Queue a transcode.
+
+        Args:
+            input_path (str): Source video.
+            output_path (str, optional): Destination (default: ``<name>_x264.mp4`` next to the source).
+            priority (str or int): 'event', 'normal', 'archive' or a number (lower runs first).
+            crf (int, optional): Overrides the queue's default CRF.
+        Returns:
+            str: Job id.
+        """
+        if output_path is None:
+            output_path = os.path.splitext(input_path)[0] + '_x264.mp4'
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'input': input_path,
+            'output': output_path,
+            'crf': self.crf if crf is None else crf,
+            'priority': PRIORITIES.get(priority, priority) if isinstance(priority, str) else int(priority),
+            'state': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': 0.0,
+            'speed': None,
+            'requeued': 0,
+        }
+        if not isinstance(job['priority'], int):
+            raise ValueError(f"Unknown priority: {priority}")
+        with self.cond:
+            self._enqueue(job)
+            self._save()
+            self.cond.notify()
+        return job['id']
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or kill the ffmpeg of a running one. Returns False if the job is unknown or finished."""
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None or job['state'] not in ('queued', 'running'):
+                return False
+            if job['state'] == 'queued':
+                self._finish(job, 'cancelled')
+                return True
+            job['cancel'] = True
+            proc = self.processes.get(job_id)
+        if proc is not None:
+            proc.kill()
+        return True
+
+    def start(self):
+        self.running = True
+        self.worker_threads = [threading.Thread(target=self._worker, name=f'transcode-{i}', daemon=True)
+                               for i in range(self.workers)]
+        for t in self.worker_threads:
+            t.start()
+
+    def stop(self, timeout=5):
+        """Stop the workers; running encodes are killed and stay queued for the next start."""
+        with self.cond:
+            self.running = False
+            procs = list(self.processes.values())
+            self.cond.notify_all()
+        for proc in procs:
+            proc.kill()
+        for t in self.worker_threads:
+            t.join(timeout)
+
+    def _next_job(self):
+        with self.cond:
+            while self.running:
+                while self.heap:
+                    _, _, job_id = heapq.heappop(self.heap)
+                    job = self.jobs.get(job_id)
+                    if job is not None and job['state'] == 'queued':
+                        job['state'] = 'running'
+                        job['started_at'] = time.time()
+                        self._save()
+                        return job
+                self.cond.wait()
+            return None
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            def progress(fraction, speed, job=job):
+                job['progress'] = round(fraction, 3)
+                job['speed'] = speed
+
+            def started(proc, job=job):
+                with self.cond:
+                    self.processes[job['id']] = proc
+                    if not self.running or job.get('cancel'):
+                        proc.kill()
+
+            ok = self.transcode_fn(job['input'], job['output'], crf=job['crf'], preset=self.preset,
+                                   threads=self.ffmpeg_threads, nice=self.nice, on_progress=progress,
+                                   timeout=self.timeout, process_started=started)
+            with self.cond:
+                self.processes.pop(job['id'], None)
+                if not self.running and not ok:
+                    # Interrupted by stop(): leave it 'running' in the state file so it is re-queued
+                    return
+                self._finish(job, 'cancelled' if job.get('cancel') else ('done' if ok else 'failed'))
+            if ok and self.delete_source:
+                try:
+                    os.remove(job['input'])
+                except OSError as e:
+                    print(f"[WARN] Could not delete {job['input']}: {e}")
+            if ok and self.on_done is not None:
+                try:
+                    self.on_done(self.get_job(job['id']))
+                except Exception as e:
+                    print(f"[ERROR] Transcode callback failed for {job['output']}: {e}")
+
+    def _finish(self, job, state):
+        # Called with self.cond held
+        job['state'] = state
+        job['finished_at'] = time.time()
+        if state == 'done':
+            job['progress'] = 1.0
+            job['encode_seconds'] = round(job['finished_at'] - job['started_at'], 3)
+            job['wait_seconds'] = round(job['started_at'] - job['submitted_at'], 3)
+            self.totals['encode_seconds'] += job['encode_seconds']
+            self.totals['wait_seconds'] += job['wait_seconds']
+        self.totals[state] += 1
+        if len(self.finished) == self.finished.maxlen:
+            self.jobs.pop(self.finished[0], None)
+        self.finished.append(job['id'])
+        self._save()
+
+    def get_job(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            return {k: v for k, v in job.items() if k != 'cancel'} if job else None
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {'queued', 'running', 'workers', 'done', 'failed', 'cancelled',
+            'avg_encode_seconds', 'avg_wait_seconds', 'jobs': [...]} (pending jobs in run order, then recent ones)
+        """
+        with self.cond:
+            pending = sorted((j for j in self.jobs.values() if j['state'] in ('queued', 'running')),
+                             key=lambda j: (j['state'] != 'running', j['priority'], j['submitted_at']))
+            recent = [self.jobs[i] for i in reversed(self.finished) if i in self.jobs]
+            done = self.totals['done']
+            return {
+                'queued': sum(1 for j in pending if j['state'] == 'queued'),
+                'running': sum(1 for j in pending if j['state'] == 'running'),
+                'workers': self.workers,
+                'done': done,
+                'failed': self.totals['failed'],
+                'cancelled': self.totals['cancelled'],
+                'avg_encode_seconds': round(self.totals['encode_seconds'] / done, 3) if done else 0.0,
+                'avg_wait_seconds': round(self.totals['wait_seconds'] / done, 3) if done else 0.0,
+                'jobs': [{k: v for k, v in j.items() if k != 'cancel'} for j in pending + recent],
+            }
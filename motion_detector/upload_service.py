@@ -0,0 +1,461 @@
+import json
+import os
+import posixpath
+import queue
+import random
+import threading
+import time
+from ftplib import FTP, error_perm
+from motion_detector.compression_upload import RateLimiter
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+
+def ftp_config_from_env():
+    """
+    Read the FTP/SFTP settings (FTP_HOST, FTP_PORT, FTP_USER, FTP_PASS, FTP_REMOTE_DIR,
+    FTP_USE_SFTP) from the environment / .env once.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    use_sftp = os.getenv('FTP_USE_SFTP', 'false').lower() == 'true'
+    return {
+        'host': os.getenv('FTP_HOST'),
+        'port': int(os.getenv('FTP_PORT') or (22 if use_sftp else 21)),
+        'user': os.getenv('FTP_USER'),
+        'password': os.getenv('FTP_PASS'),
+        'remote_dir': os.getenv('FTP_REMOTE_DIR', '/'),
+        'sftp': use_sftp,
+    }
+
+
+class FTPConnection:
+    """One logged-in FTP session, already in the remote directory."""
+    def __init__(self, cfg, timeout=30):
+        self.cfg = cfg
+        self.ftp = FTP(timeout=timeout)
+        self.ftp.connect(cfg['host'], cfg['port'])
+        self.ftp.login(cfg['user'], cfg['password'])
+        try:
+            self.ftp.cwd(cfg['remote_dir'])
+        except error_perm:
+            self.ftp.mkd(cfg['remote_dir'])
+            self.ftp.cwd(cfg['remote_dir'])
+
+    def size(self, remote_name):
+        """Bytes the server holds for ``remote_name``, or None if unknown."""
+        try:
+            self.ftp.voidcmd('TYPE I')
+            return self.ftp.size(remote_name)
+        except error_perm:
+            return None
+
+    def upload(self, local_path, remote_name, offset=0, callback=None, blocksize=65536):
+        """Send ``local_path`` from byte ``offset`` on (REST + STOR); ``callback(block)`` runs after every block."""
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            self.ftp.storbinary(f'STOR {remote_name}', f, blocksize, callback, rest=offset or None)
+
+    def check(self):
+        self.ftp.voidcmd('NOOP')
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except Exception:
+            self.ftp.close()
+
+
+class SFTPConnection:
+    """One authenticated SFTP session (paramiko) with transport keepalive."""
+    def __init__(self, cfg, timeout=30, keepalive=30):
+        if paramiko is None:
+            raise ImportError("paramiko is required for SFTP support. Please install it via 'pip install paramiko'.")
+        self.cfg = cfg
+        self.transport = paramiko.Transport((cfg['host'], cfg['port']))
+        self.transport.banner_timeout = timeout
+        self.transport.connect(username=cfg['user'], password=cfg['password'])
+        self.transport.set_keepalive(keepalive)
+        self.sftp = paramiko.SFTPClient.from_transport(self.transport)
+        try:
+            self.sftp.chdir(cfg['remote_dir'])
+        except IOError:
+            self.sftp.mkdir(cfg['remote_dir'])
+            self.sftp.chdir(cfg['remote_dir'])
+
+    def size(self, remote_name):
+        try:
+            return self.sftp.stat(posixpath.join(self.cfg['remote_dir'], remote_name)).st_size
+        except IOError:
+            return None
+
+    def upload(self, local_path, remote_name, offset=0, callback=None, blocksize=65536):
+        """Write ``local_path`` from byte ``offset`` on into the remote file at the same offset."""
+        remote_path = posixpath.join(self.cfg['remote_dir'], remote_name)
+        with open(local_path, 'rb') as f, self.sftp.open(remote_path, 'r+b' if offset else 'wb') as remote:
+            f.seek(offset)
+            remote.seek(offset)
+            remote.set_pipelined(True)
+            while True:
+                block = f.read(blocksize)
+                if not block:
+                    break
+                remote.write(block)
+                if callback:
+                    callback(block)
+
+    def check(self):
+        if not self.transport.is_active():
+            raise ConnectionError('SFTP transport closed')
+        self.sftp.stat('.')
+
+    def close(self):
+        try:
+            self.sftp.close()
+        finally:
+            self.transport.close()
+
+
+class ConnectionPool:
+    """
+    Pool of long-lived upload connections.
+
+    Connections are opened lazily up to ``size``. A connection that has been idle
+    for ``check_after`` seconds is health-checked (NOOP / stat) when checked out
+    and replaced if the check fails; a connection released as broken is closed.
+
+    Args:
+        factory (callable): Returns a new connected object with upload/check/close.
+        size (int): Maximum open connections.
+        check_after (float): Idle seconds after which a connection is checked before use (default 30).
+    """
+    def __init__(self, factory, size=4, check_after=30.0):
+        self.factory = factory
+        self.size = size
+        self.check_after = check_after
+        self.idle = queue.LifoQueue()  # (connection, last used); LIFO keeps the warmest ones busy
+        self.open = 0
+        self.lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'checks': 0, 'check_failures': 0, 'closed': 0}
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                conn, last_used = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_open = self.open < self.size
+                    if can_open:
+                        self.open += 1
+                if can_open:
+                    try:
+                        conn = self.factory()
+                    except Exception:
+                        with self.lock:
+                            self.open -= 1
+                        raise
+                    with self.lock:
+                        self.stats['opened'] += 1
+                    return conn
+                # Wake up now and then: a discarded connection frees a slot without touching the idle queue
+                wait = 0.5 if deadline is None else min(0.5, deadline - time.time())
+                if wait <= 0:
+                    raise TimeoutError('no upload connection available')
+                try:
+                    conn, last_used = self.idle.get(timeout=wait)
+                except queue.Empty:
+                    continue
+            if time.time() - last_used >= self.check_after:
+                with self.lock:
+                    self.stats['checks'] += 1
+                try:
+                    conn.check()
+                except Exception:
+                    with self.lock:
+                        self.stats['check_failures'] += 1
+                    self._discard(conn)
+                    continue
+            with self.lock:
+                self.stats['reused'] += 1
+            return conn
+
+    def release(self, conn, broken=False):
+        if broken:
+            self._discard(conn)
+        else:
+            self.idle.put((conn, time.time()))
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self.lock:
+            self.open -= 1
+            self.stats['closed'] += 1
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, open=self.open, idle=self.idle.qsize())
+
+
+class UploadService:
+    """
+    Parallel uploader over a pool of persistent FTP/SFTP connections.
+
+    ``submit()`` queues a file; ``workers`` threads upload through the shared
+    ConnectionPool, so a burst of snapshots and clips pays for login and ``cwd``
+    once per connection instead of once per file. A failed attempt discards the
+    connection and is retried with exponential backoff and jitter
+    (``backoff_base * 2**attempt``, capped at ``backoff_max``). After ``max_retries``
+    the file is moved to the failed list. Both pending and failed uploads are
+    persisted in ``state_file``; pending ones are re-queued on start and failed
+    ones can be re-queued with ``retry_failed()``.
+
+    Uploads are resumable: the bytes sent are checkpointed in ``state_file``
+    every ``checkpoint_bytes``, and a retry (also after a restart) of an
+    unchanged file asks the server how much it already holds (SIZE / stat) and
+    continues from there with REST (FTP) or an offset write (SFTP). All workers
+    share one ``rate_limit`` so uploads do not starve the live feed.
+
+    Args:
+        config (dict): Connection settings (see ftp_config_from_env); read once.
+        state_file (str): JSON file with pending and failed uploads.
+        workers (int): Parallel upload threads (default 4).
+        pool_size (int, optional): Open connections (default: workers).
+        max_retries (int): Retries before a file is parked as failed (default 5).
+        backoff_base (float): First retry delay in seconds (default 1).
+        backoff_max (float): Maximum retry delay in seconds (default 60).
+        check_after (float): Idle seconds before a pooled connection is health-checked (default 30).
+        log_path (str, optional): Upload log (same line format as upload_via_ftp).
+        connection_factory (callable, optional): Overrides the FTP/SFTP connection class.
+        rate_limit (float): Upload bandwidth cap in bytes/s for all workers together, 0 for none (default 0).
+        checkpoint_bytes (int): Bytes sent between checkpoints of the upload offset (default 4 MiB).
+        blocksize (int): Bytes per write (default 64 KiB).
+    """
+    def __init__(self, config, state_file, workers=4, pool_size=None, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, check_after=30.0, log_path=None, connection_factory=None, rate_limit=0,
+                 checkpoint_bytes=4 * 1024 * 1024, blocksize=65536):
+        self.config = config
+        self.state_file = state_file
+        self.workers = max(1, int(workers))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.log_path = log_path
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.checkpoint_bytes = checkpoint_bytes
+        self.blocksize = blocksize
+        if connection_factory is None:
+            cls = SFTPConnection if config.get('sftp') else FTPConnection
+            connection_factory = lambda: cls(config)
+        self.pool = ConnectionPool(connection_factory, size=pool_size or self.workers, check_after=check_after)
+        self.cond = threading.Condition()
+        self.pending = []  # upload dicts, ready or waiting for their next attempt
+        self.active = {}  # upload id -> upload dict being sent
+        self.failed = []
+        self.running = False
+        self.worker_threads = []
+        self.seq = 0
+        self.stats = {'uploaded': 0, 'bytes': 0, 'attempts': 0, 'retries': 0, 'failed': 0, 'resumed': 0,
+                      'bytes_resumed': 0, 'upload_seconds': 0.0, 'started_at': None}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable upload queue {self.state_file}: {e}")
+            return
+        for item in saved.get('pending', []):
+            item['next_attempt'] = 0.0
+            self.pending.append(item)
+        self.failed = saved.get('failed', [])
+        self.seq = max([i['id'] for i in self.pending + self.failed] or [0])
+
+    def _save(self):
+        # Called with self.cond held
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'pending': self.pending + list(self.active.values()), 'failed': self.failed}, f)
+        os.replace(tmp_path, self.state_file)
+
+    def submit(self, local_path, remote_name=None):
+        """Queue ``local_path`` for upload (as ``remote_name``, default its base name). Returns the upload id."""
+        with self.cond:
+            self.seq += 1
+            item = {'id': self.seq, 'local_path': local_path,
+                    'remote_name': remote_name or os.path.basename(local_path),
+                    'attempts': 0, 'next_attempt': 0.0, 'submitted_at': time.time(), 'offset': 0, 'error': None}
+            self.pending.append(item)
+            self._save()
+            self.cond.notify()
+            return item['id']
+
+    def retry_failed(self):
+        """Move every parked upload back to the queue. Returns how many were re-queued."""
+        with self.cond:
+            items, self.failed = self.failed, []
+            for item in items:
+                item.update(attempts=0, next_attempt=0.0)
+                self.pending.append(item)
+            self._save()
+            self.cond.notify_all()
+            return len(items)
+
+    def start(self):
+        self.running = True
+        self.stats['started_at'] = time.time()
+        self.worker_threads = [threading.Thread(target=self._worker, name=f'upload-{i}', daemon=True)
+                               for i in range(self.workers)]
+        for t in self.worker_threads:
+            t.start()
+
+    def stop(self, timeout=10):
+        """Stop the workers (uploads in progress finish) and close the pooled connections."""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for t in self.worker_threads:
+            t.join(timeout)
+        self.pool.close_all()
+
+    def join(self, timeout=None):
+        """Wait until nothing is pending or in flight."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.cond:
+            while self.pending or self.active:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def _next(self):
+        with self.cond:
+            while self.running:
+                now = time.time()
+                ready = [i for i in self.pending if i['next_attempt'] <= now]
+                if ready:
+                    item = min(ready, key=lambda i: (i['next_attempt'], i['id']))
+                    self.pending.remove(item)
+                    self.active[item['id']] = item
+                    return item
+                waits = [i['next_attempt'] - now for i in self.pending]
+                self.cond.wait(min(waits) if waits else None)
+            return None
+
+    def _worker(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            start = time.time()
+            error = None
+            try:
+                conn = self.pool.acquire(timeout=60)
+            except Exception as e:
+                error = e
+            else:
+                try:
+                    self._transfer(conn, item)
+                except Exception as e:
+                    error = e
+                    self.pool.release(conn, broken=True)
+                else:
+                    self.pool.release(conn)
+            self._done(item, error, time.time() - start)
+
+    def _transfer(self, conn, item):
+        st = os.stat(item['local_path'])
+        source = [st.st_size, st.st_mtime]
+        offset = 0
+        if item.get('offset') and item.get('source') == source:
+            # The checkpoint only says a resume is worth asking for; the server's size is what counts
+            remote = conn.size(item['remote_name'])
+            if remote is not None and remote <= st.st_size:
+                offset = remote
+        item['source'] = source
+        item['offset'] = offset
+        if offset:
+            with self.cond:
+                self.stats['resumed'] += 1
+                self.stats['bytes_resumed'] += offset
+        unsaved = 0
+
+        def sent(block):
+            nonlocal unsaved
+            if self.limiter is not None:
+                self.limiter.consume(len(block))
+            item['offset'] += len(block)
+            unsaved += len(block)
+            with self.cond:
+                self.stats['bytes'] += len(block)
+                if unsaved >= self.checkpoint_bytes:
+                    unsaved = 0
+                    self._save()
+
+        conn.upload(item['local_path'], item['remote_name'], offset=offset, callback=sent, blocksize=self.blocksize)
+
+    def _done(self, item, error, elapsed):
+        item['attempts'] += 1
+        with self.cond:
+            self.active.pop(item['id'], None)
+            self.stats['attempts'] += 1
+            if error is None:
+                self.stats['uploaded'] += 1
+                self.stats['upload_seconds'] += elapsed
+            else:
+                item['error'] = str(error)
+                if item['attempts'] > self.max_retries or isinstance(error, FileNotFoundError):
+                    self.stats['failed'] += 1
+                    self.failed.append(item)
+                else:
+                    self.stats['retries'] += 1
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (item['attempts'] - 1))
+                    item['next_attempt'] = time.time() + delay * random.uniform(0.5, 1.0)
+                    self.pending.append(item)
+            self._save()
+            self.cond.notify_all()
+        self._log(item, error)
+
+    def _log(self, item, error):
+        if not self.log_path:
+            return
+        status = 'SUCCESS' if error is None else 'FAIL'
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        msg = f"[FTP_UPLOAD] {stamp} {status} {item['local_path']} -> {item['remote_name']}"
+        if error is not None:
+            msg += f" : {error}"
+        with open(self.log_path, 'a') as logf:
+            logf.write(msg + '\n')
+
+    def get_stats(self):
+        """Return upload counters, throughput, queue depths and pool counters."""
+        with self.cond:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.pending)
+            stats['in_flight'] = len(self.active)
+            keys = ('id', 'local_path', 'remote_name', 'attempts', 'offset', 'error')
+            stats['failed_queue'] = [{k: i.get(k) for k in keys} for i in self.failed]
+        uploaded = stats['uploaded']
+        stats['avg_upload_ms'] = round(stats.pop('upload_seconds') / uploaded * 1000, 1) if uploaded else 0.0
+        started = stats.pop('started_at')
+        elapsed = time.time() - started if started else 0
+        stats['files_per_s'] = round(uploaded / elapsed, 2) if elapsed else 0.0
+        stats['pool'] = self.pool.get_stats()
+        return stats
@@ -19,3 +19,16 @@ def ensure_log_file(log_file):
     if not os.path.exists(log_file):
         with open(log_file, 'w') as f:
             f.write('Motion Detection Log\n')
+
+def tail_lines(path, n, block_size=8192):
+    """Return the last ``n`` lines of a file, reading backwards from the end instead of the whole file."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return [line.decode('utf-8', 'replace') + '\n' for line in data.splitlines()[-n:]]
@@ -10,6 +10,7 @@ Args:
     model_dir (str, optional): Directory path of the YOLO model files. Defaults to None.
     conf_threshold (float, optional): Confidence threshold for person detection. Defaults to 0.5.
     nms_threshold (float, optional): Non-maximum suppression threshold. Defaults to 0.3.
+    input_size (int, optional): Network input size (multiple of 32, e.g. 320/416/608). Defaults to 416.
 
 Attributes:
     conf_threshold (float): Confidence threshold for person detection.
@@ -20,46 +21,71 @@ Attributes:
 
 Methods:
     detect(frame): Detects persons in the given frame.
+    set_input_size(size): Changes the network input size at runtime.
 
 Returns:
     list: List of detected person bounding boxes and confidences.
 """
-    def __init__(self, model_dir=None, conf_threshold=0.5, nms_threshold=0.3):
+    def __init__(self, model_dir=None, conf_threshold=0.5, nms_threshold=0.3, input_size=416):
         if model_dir is None:
             model_dir = os.path.join(os.path.dirname(__file__), '../models')
         self.conf_threshold = conf_threshold
         self.nms_threshold = nms_threshold
+        self.input_size = input_size
         self.classes = []
         with open(os.path.join(model_dir, 'coco.names'), 'r') as f:
             self.classes = [line.strip() for line in f.readlines()]
         self.net = cv2.dnn.readNet(os.path.join(model_dir, 'yolov3-tiny.weights'),
                                    os.path.join(model_dir, 'yolov3-tiny.cfg'))
         self.person_class_id = self.classes.index('person')
+        # Output layers never change, resolve them once instead of per frame
+        self.output_layers = self.net.getUnconnectedOutLayersNames()
+
+    def set_input_size(self, size):
+        self.input_size = int(size)
 
     def detect(self, frame):
-        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (416, 416), swapRB=True, crop=False)
+        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (self.input_size, self.input_size), swapRB=True, crop=False)
         self.net.setInput(blob)
-        ln = self.net.getUnconnectedOutLayersNames()
-        layerOutputs = self.net.forward(ln)
-        boxes, confidences = [], []
-        h, w = frame.shape[:2]
-        for output in layerOutputs:
-            for detection in output:
-                scores = detection[5:]
-                classID = np.argmax(scores)
-                confidence = scores[classID]
-                if classID == self.person_class_id and confidence > self.conf_threshold:
-                    box = detection[0:4] * np.array([w, h, w, h])
-                    (centerX, centerY, width, height) = box.astype('int')
-                    x = int(centerX - width / 2)
-                    y = int(centerY - height / 2)
-                    boxes.append([x, y, int(width), int(height)])
-                    confidences.append(float(confidence))
-        idxs = cv2.dnn.NMSBoxes(boxes, confidences, self.conf_threshold, self.nms_threshold)
-        results = []
-        if len(idxs) > 0:
-            for i in idxs.flatten():
-                x, y, w, h = boxes[i]
-                conf = confidences[i]
-                results.append((x, y, x + w, y + h, conf))
-        return results
+        layerOutputs = self.net.forward(self.output_layers)
+        return decode_person_detections(layerOutputs, frame.shape[:2], self.person_class_id,
+                                        self.conf_threshold, self.nms_threshold)
+
+
+def decode_person_detections(layer_outputs, frame_shape, person_class_id, conf_threshold, nms_threshold):
+    """
+    Decode raw YOLO output layers into person boxes with NumPy array operations.
+
+    All layers are concatenated into one (N, 5 + classes) matrix. Rows are first
+    filtered on the person score (cheap column compare), the argmax over class
+    scores is only computed for those candidates, boxes are scaled in bulk and
+    NMS only sees the survivors.
+
+    Args:
+        layer_outputs (list): Arrays returned by ``net.forward`` (rows: cx, cy, w, h, objectness, class scores...).
+        frame_shape (tuple): (height, width) of the original frame.
+        person_class_id (int): Index of 'person' in the class list.
+        conf_threshold (float): Minimum person score.
+        nms_threshold (float): Non-maximum suppression threshold.
+    Returns:
+        list: [(x1, y1, x2, y2, confidence)] for each detected person.
+    """
+    h, w = frame_shape
+    outputs = np.concatenate([o.reshape(-1, o.shape[-1]) for o in layer_outputs])
+    scores = outputs[:, 5:]
+    cand = np.flatnonzero(scores[:, person_class_id] > conf_threshold)
+    # A row only counts if person is also its best class
+    cand = cand[scores[cand].argmax(axis=1) == person_class_id]
+    if cand.size == 0:
+        return []
+    box = (outputs[cand, :4] * np.array([w, h, w, h])).astype('int')
+    xy = (box[:, :2] - box[:, 2:] / 2).astype('int')
+    boxes = np.hstack([xy, box[:, 2:]]).tolist()
+    confidences = scores[cand, person_class_id].astype(float).tolist()
+    idxs = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, nms_threshold)
+    results = []
+    if len(idxs) > 0:
+        for i in np.array(idxs).flatten():
+            x, y, bw, bh = boxes[i]
+            results.append((x, y, x + bw, y + bh, confidences[i]))
+    return results
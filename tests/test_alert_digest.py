@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from motion_detector.alert_digest import AlertDigest
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, subject, message, image=None):
+        self.messages.append((subject, message))
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_first_alert_immediate_then_one_digest():
+    sent = Recorder()
+    digest = AlertDigest(sent, window=0.3)
+    digest.start()
+    try:
+        digest.add('FrontDoor', {'classes': {'person': 1}})
+        assert sent.messages == [('ALERT: FrontDoor: person', sent.messages[0][1])]
+        # A burst from several cameras inside the window becomes one message
+        digest.add('FrontDoor', {'classes': {'person': 2}, 'names': ['Alice']})
+        digest.add('Garage', {'classes': {'car': 1}})
+        digest.add('FrontDoor', {'classes': {'person': 1}, 'names': ['Bob']})
+        assert len(sent.messages) == 1
+        assert wait_for(lambda: len(sent.messages) == 2)
+    finally:
+        digest.stop()
+    subject, message = sent.messages[1]
+    assert subject == 'ALERT: FrontDoor: 2 persons (Alice, Bob), Garage: car'
+    assert 'FrontDoor: 2 persons (Alice, Bob) - 2 events' in message
+    stats = digest.get_stats()
+    assert stats['events'] == 4 and stats['messages'] == 2 and stats['merged_events'] == 3
+
+
+def test_window_closes_when_quiet():
+    sent = Recorder()
+    digest = AlertDigest(sent, window=0.1)
+    digest.start()
+    try:
+        digest.add('FrontDoor', {'classes': {'person': 1}})
+        time.sleep(0.3)
+        # Nothing arrived during the window: the next alert is again sent at once
+        digest.add('Garage', {'classes': {'person': 1}})
+        assert [s for s, _ in sent.messages] == ['ALERT: FrontDoor: person', 'ALERT: Garage: person']
+    finally:
+        digest.stop()
+
+
+def test_stop_flushes_pending():
+    sent = Recorder()
+    digest = AlertDigest(sent, window=60, immediate_first=False)
+    digest.start()
+    digest.add('FrontDoor', {'classes': {'person': 1, 'dog': 1}})
+    digest.add('Garage', {'classes': {'car': 3}})
+    assert not sent.messages
+    digest.stop()
+    assert [s for s, _ in sent.messages] == ['ALERT: FrontDoor: person, dog, Garage: 3 cars']
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import numpy as np
+from motion_detector.batch_inference import BatchInferenceServer, BatchedDetector
+
+
+class EchoBatchDetector:
+    """Returns one detection per frame carrying the frame's fill value as confidence."""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [[(0, 0, 1, 1, float(f[0, 0, 0]) / 100, 'person'), (0, 0, 1, 1, 0.99, 'car')]
+                for f in frames]
+
+
+def test_frames_from_several_cameras_are_batched_and_routed():
+    detector = EchoBatchDetector()
+    server = BatchInferenceServer(detector, max_batch=8, max_wait_ms=200)
+    results = {}
+
+    def camera(i):
+        results[i] = server.submit(np.full((4, 4, 3), 50 + i, dtype=np.uint8)).result(timeout=5)
+
+    threads = [threading.Thread(target=camera, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    server.start()
+    for t in threads:
+        t.join()
+    server.stop()
+    for i in range(4):
+        assert abs(results[i][0][4] - (50 + i) / 100) < 1e-6
+    assert sum(detector.batch_sizes) == 4
+    assert max(detector.batch_sizes) > 1
+    stats = server.get_stats()
+    assert stats['frames'] == 4
+    assert stats['batches'] == len(detector.batch_sizes)
+
+
+def test_batched_detector_applies_camera_filters():
+    server = BatchInferenceServer(EchoBatchDetector(), max_wait_ms=1)
+    server.start()
+    detector = BatchedDetector(server, conf_threshold=0.6, target_classes=['person'])
+    assert detector.detect(np.full((4, 4, 3), 80, dtype=np.uint8)) == [(0, 0, 1, 1, 0.8, 'person')]
+    assert detector.detect(np.full((4, 4, 3), 10, dtype=np.uint8)) == []
+    server.stop()
+
+
+class FailingBatchDetector:
+    def detect_batch(self, frames):
+        raise RuntimeError('model crashed')
+
+
+def test_failed_or_slow_batches_do_not_raise():
+    server = BatchInferenceServer(FailingBatchDetector(), max_wait_ms=1)
+    server.start()
+    detector = BatchedDetector(server)
+    assert detector.detect(np.zeros((4, 4, 3), dtype=np.uint8)) == []
+    server.stop()
+    # Stopped server: the request is never answered
+    assert BatchedDetector(server, timeout=0.05).detect(np.zeros((4, 4, 3), dtype=np.uint8)) == []
+    stats = server.get_stats()
+    assert (stats['failed_batches'], stats['failed_frames'], stats['timeouts']) == (1, 1, 1)
+    assert stats['last_error'] == 'model crashed'
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import numpy as np
+import cv2
+from motion_detector.clip_recorder import ClipRecorder
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def drained(rec, last_ts):
+    return wait_for(lambda: rec.ring and rec.ring[-1][0] == last_ts)
+
+
+def frame(i):
+    return np.full((48, 64, 3), i % 255, dtype=np.uint8)
+
+
+def test_ring_is_bounded_by_time_and_memory(tmp_path):
+    rec = ClipRecorder('Cam', str(tmp_path), pre_roll=1.0, fps=0)
+    rec.start()
+    try:
+        for i in range(30):
+            rec.add_frame(frame(i), ts=100 + i * 0.1)
+            time.sleep(0.002)
+        assert drained(rec, 100 + 29 * 0.1)
+        stats = rec.get_stats()
+        assert stats['buffered_seconds'] <= 1.0
+        assert stats['memory_bytes'] == sum(len(d) for _, d in rec.ring)
+    finally:
+        rec.stop()
+
+    rec = ClipRecorder('Cam', str(tmp_path), pre_roll=100, fps=0, max_memory_mb=0.002)
+    rec.start()
+    try:
+        for i in range(20):
+            rec.add_frame(frame(i), ts=100 + i * 0.1)
+            time.sleep(0.002)
+        assert drained(rec, 100 + 19 * 0.1)
+        assert rec.get_stats()['memory_bytes'] <= 0.002 * 1024 * 1024
+        assert rec.get_stats()['frames_evicted'] > 0
+    finally:
+        rec.stop()
+
+
+def test_event_writes_pre_and_post_roll_clip(tmp_path):
+    clips = []
+    rec = ClipRecorder('Cam', str(tmp_path), pre_roll=1.0, post_roll=0.5, fps=0, codec='MJPG', extension='.avi',
+                       on_clip=lambda path, info: clips.append((path, info)))
+    rec.start()
+    try:
+        ts = 1000.0
+        for i in range(10):  # 1 s of pre-roll
+            rec.add_frame(frame(i), ts=ts + i * 0.1)
+            time.sleep(0.002)
+        assert drained(rec, ts + 9 * 0.1)
+        rec.trigger(ts=ts + 1.0)
+        for i in range(10, 22):  # post-roll, the last frames fall outside it and close the event
+            rec.add_frame(frame(i), ts=ts + i * 0.1)
+            time.sleep(0.002)
+        assert wait_for(lambda: clips)
+    finally:
+        rec.stop()
+    path, info = clips[0]
+    assert info['start'] < ts + 1.0 <= info['end']
+    cap = cv2.VideoCapture(path)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == info['frames'] >= 15
+    cap.release()
+    assert rec.get_stats()['clips_written'] == 1
+
+
+def test_stop_flushes_unfinished_event(tmp_path):
+    rec = ClipRecorder('Cam', str(tmp_path), post_roll=60, fps=0, codec='MJPG', extension='.avi')
+    rec.start()
+    rec.add_frame(frame(1), ts=1.0)
+    assert drained(rec, 1.0)
+    rec.trigger(ts=1.0)
+    rec.stop()
+    assert rec.get_stats()['clips_written'] == 1
+    assert os.listdir(str(tmp_path))
+
+
+def test_long_event_is_split_into_bounded_clips(tmp_path):
+    clips = []
+    rec = ClipRecorder('Cam', str(tmp_path), pre_roll=0.5, post_roll=0.5, fps=0, codec='MJPG', extension='.avi',
+                       max_clip_seconds=1.0, on_clip=lambda path, info: clips.append((path, info)))
+    rec.start()
+    try:
+        ts = 1000.0
+        for i in range(40):  # Person in view for 3.5 s: trigger on every frame
+            if i >= 5:
+                rec.trigger(ts=ts + i * 0.1)
+            rec.add_frame(frame(i), ts=ts + i * 0.1)
+            time.sleep(0.002)
+    finally:
+        rec.stop()
+    assert [info['part'] for _, info in clips] == [1, 2, 3, 4]
+    assert all(info['end'] - info['start'] < 1.0 for _, info in clips)
+    assert len({path for path, _ in clips}) == 4
@@ -3,7 +3,11 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import os
+import json
 import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
 from motion_detector import compression_upload
 
@@ -16,5 +20,93 @@ def test_compress_video_fake():
         result = compression_upload.compress_video(input_file.name, output_file.name)
         assert result is False or result is True  # Accept both, but should not crash
 
-def test_upload_file():
-    assert compression_upload.upload_file('fake.mp4', 'http://example.com') is True
+class ResumableUploadHandler(BaseHTTPRequestHandler):
+    """PUT endpoint speaking the Content-Range resumable protocol; ``fail_chunks`` answers 503 to chosen chunks."""
+    def do_PUT(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        spec, total = self.headers['Content-Range'].split(' ')[1].split('/')
+        server.requests.append(spec)
+        if spec != '*':
+            start = int(spec.split('-')[0])
+            if len(server.requests) in server.fail_chunks or start != len(server.data):
+                self.send_response(503)
+                self.end_headers()
+                return
+            server.data += body
+        if len(server.data) == int(total):
+            self.send_response(201)
+        else:
+            self.send_response(308)
+            if server.data:
+                self.send_header('Range', f'bytes=0-{len(server.data) - 1}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upload_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ResumableUploadHandler)
+    server.data = b''
+    server.requests = []
+    server.fail_chunks = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_upload_file_chunked(tmp_path, upload_server):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(os.urandom(10000))
+    url = f'http://127.0.0.1:{upload_server.server_port}/upload'
+    assert compression_upload.upload_file(str(path), url, chunk_size=4096) is True
+    assert upload_server.data == path.read_bytes()
+    assert upload_server.requests == ['0-4095', '4096-8191', '8192-9999']
+    assert not os.path.exists(str(path) + '.upload')
+
+
+def test_upload_file_resumes_from_checkpoint(tmp_path, upload_server):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(os.urandom(10000))
+    url = f'http://127.0.0.1:{upload_server.server_port}/upload'
+    upload_server.fail_chunks = {2}
+    assert compression_upload.upload_file(str(path), url, chunk_size=4096, retries=0) is False
+    with open(str(path) + '.upload') as f:
+        assert json.load(f)['offset'] == 4096
+    # The next call asks the server for its offset and only sends what is missing
+    assert compression_upload.upload_file(str(path), url, chunk_size=4096, retries=0) is True
+    assert upload_server.data == path.read_bytes()
+    assert upload_server.requests[2:] == ['*', '4096-8191', '8192-9999']
+
+
+def test_rate_limiter():
+    limiter = compression_upload.RateLimiter(200000)
+    start = time.monotonic()
+    for _ in range(20):
+        limiter.consume(15000)  # 300 KB: 200 KB burst, then 100 KB at 200 KB/s
+    assert 0.4 < time.monotonic() - start < 1.5
+
+
+def test_compress_video_nices_ffmpeg_without_preexec_fn(monkeypatch):
+    calls = []
+
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):
+            calls.append((cmd, kwargs))
+            self.stdout = iter(['progress=end\n'])
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(compression_upload.subprocess, 'Popen', FakePopen)
+    monkeypatch.setattr(compression_upload.shutil, 'which', lambda name: '/usr/bin/' + name)
+    assert compression_upload.compress_video('in.mp4', 'out.mp4', nice=10)
+    cmd, kwargs = calls[0]
+    assert cmd[:4] == ['nice', '-n', '10', 'ffmpeg']
+    assert 'preexec_fn' not in kwargs
+    assert compression_upload.compress_video('in.mp4', 'out.mp4')
+    assert calls[1][0][0] == 'ffmpeg'
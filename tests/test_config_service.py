@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import pytest
+from motion_detector.config_service import ConfigService, validate_config
+
+
+def write(path, text):
+    path.write_text(text)
+    # Make sure the mtime moves even on filesystems with coarse timestamps
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+
+
+def test_cached_and_reloaded_on_change(tmp_path):
+    path = tmp_path / 'config.yaml'
+    write(path, 'cameras:\n  - name: FrontDoor\n    sensitivity: 800\n')
+    service = ConfigService(str(path), poll_interval=0.05)
+    changes = []
+    service.subscribe(lambda new, old: changes.append((old['cameras'][0]['sensitivity'],
+                                                       new['cameras'][0]['sensitivity'])))
+    service.start()
+    try:
+        config = service.get()
+        assert service.get() is config  # No re-parse between changes
+        write(path, 'cameras:\n  - name: FrontDoor\n    sensitivity: 300\n')
+        deadline = time.time() + 5
+        while not changes and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        service.stop()
+    assert changes == [(800, 300)]
+    assert service.get()['cameras'][0]['sensitivity'] == 300
+    assert service.get_stats()['loads'] == 2
+
+
+def test_invalid_edit_keeps_last_good_config(tmp_path):
+    path = tmp_path / 'config.yaml'
+    write(path, 'cameras:\n  - name: FrontDoor\n')
+    service = ConfigService(str(path))
+    good = service.get()
+    write(path, 'cameras:\n  - name: FrontDoor\n    detector: {conf_threshold: 5}\n')
+    assert service.check() is False
+    assert service.get() is good
+    assert 'conf_threshold' in service.get_stats()['last_error']
+    write(path, 'cameras: [unclosed\n')
+    assert service.check() is False
+    assert service.get() is good
+
+
+def test_invalid_file_at_startup_raises(tmp_path):
+    path = tmp_path / 'config.yaml'
+    write(path, 'api: {port: 0}\n')
+    with pytest.raises(ValueError):
+        ConfigService(str(path)).get()
+
+
+def test_validate_config():
+    assert validate_config({'cameras': [{'name': 'A', 'sensitivity': 10}], 'api': {'port': 3001}}) == []
+    errors = validate_config({'cameras': [{'name': 'A', 'threshold': 'high'}, {'name': 'A'}]})
+    assert errors == ['A.threshold must be a number', 'duplicate camera name A']
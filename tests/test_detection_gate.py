@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from motion_detector.detection_gate import DetectionGate
+
+
+def test_motion_mode_runs_on_motion_only():
+    gate = DetectionGate(mode='motion', sanity_interval=30)
+    assert gate.should_run(False, False, now=100.0) == 'sanity'
+    assert gate.should_run(False, False, now=101.0) is None
+    assert gate.should_run(True, False, now=102.0) == 'motion'
+    assert gate.get_stats()['executed'] == 2
+    assert gate.get_stats()['skipped'] == 1
+
+
+def test_keepalive_while_tracking():
+    gate = DetectionGate(mode='motion', keepalive_every=3, sanity_interval=1000)
+    gate.should_run(True, False, now=0.0)
+    reasons = [gate.should_run(False, True, now=1.0 + i) for i in range(6)]
+    assert reasons == [None, None, 'keepalive', None, None, 'keepalive']
+
+
+def test_sanity_run_on_static_scene():
+    gate = DetectionGate(mode='motion', sanity_interval=10)
+    gate.should_run(True, False, now=0.0)
+    assert gate.should_run(False, False, now=5.0) is None
+    assert gate.should_run(False, False, now=10.0) == 'sanity'
+
+
+def test_always_mode_and_invalid_mode():
+    gate = DetectionGate(mode='always')
+    assert gate.should_run(False, False) == 'always'
+    with pytest.raises(ValueError):
+        DetectionGate(mode='sometimes')
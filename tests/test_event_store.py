@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import pytest
+from motion_detector.event_store import EventStore, query_events, format_event
+
+
+def test_batched_writes_and_filters(tmp_path):
+    db = str(tmp_path / 'events.db')
+    t = time.time()
+    store = EventStore(db, flush_interval=0.05)
+    store.start()
+    store.record('FrontDoor', [(10, 20, 110, 220, 0.9), (300, 20, 400, 220, 0.8, 'person')], ts=t,
+                 track_ids=[1, 2])
+    store.record('Garage', [(0, 0, 50, 50, 0.7, 'car')], ts=t + 1)
+    store.record('FrontDoor', [(12, 20, 112, 220, 0.95)], ts=t + 2, track_ids=[1])
+    store.stop()
+    assert store.get_stats()['written'] == 4
+
+    newest = query_events(db)['events']
+    assert [(e['camera'], e['ts']) for e in newest][:2] == [('FrontDoor', t + 2), ('Garage', t + 1)]
+    assert [e['class'] for e in query_events(db, camera='Garage')['events']] == ['car']
+    front = query_events(db, camera='FrontDoor', cls='person', start=t, end=t + 2)['events']
+    assert sorted(e['track_id'] for e in front) == [1, 2]
+    assert 'FrontDoor | person 0.95 | box (12,20)-(112,220) | track 1' in format_event(newest[0])
+
+
+def test_keyset_pagination(tmp_path):
+    db = str(tmp_path / 'events.db')
+    store = EventStore(db)
+    t = time.time()
+    for i in range(25):
+        store.record('Cam', [(0, 0, 10, 10, 0.5)], ts=t + (i // 2))  # Pairs share a timestamp
+    store.stop()
+    seen, cursor = [], None
+    while True:
+        page = query_events(db, limit=10, cursor=cursor)
+        seen.extend(e['id'] for e in page['events'])
+        cursor = page['next']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 25
+    with pytest.raises(ValueError):
+        query_events(db, cursor='garbage')
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = EventStore(str(tmp_path / 'events.db'), max_queue=3)
+    start = time.perf_counter()
+    store.record('Cam', [(0, 0, 10, 10, 0.5)] * 5)
+    assert time.perf_counter() - start < 0.5
+    assert (store.get_stats()['recorded'], store.get_stats()['dropped']) == (3, 2)
+    store.stop()
+
+
+def test_retention_prunes_old_rows(tmp_path):
+    db = str(tmp_path / 'events.db')
+    store = EventStore(db, retention_days=1)
+    store.record('Cam', [(0, 0, 10, 10, 0.5)], ts=time.time() - 2 * 86400)
+    store.stop()
+    store = EventStore(db, retention_days=1)
+    store.record('Cam', [(0, 0, 10, 10, 0.5)])
+    store.stop()
+    assert len(query_events(db)['events']) == 1
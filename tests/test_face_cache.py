@@ -0,0 +1,156 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import multiprocessing
+import threading
+import time
+import numpy as np
+from motion_detector.face_cache import FaceEncodingCache
+
+
+def fake_encode(path):
+    """Deterministic stand-in for face_recognition: encoding derived from file content, None for 'noface'."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data == b'noface':
+        return None
+    return np.full(128, len(data), dtype=np.float64)
+
+
+def test_refresh_encodes_only_new_or_changed(tmp_path):
+    faces = tmp_path / 'faces'
+    faces.mkdir()
+    (faces / 'alice.jpg').write_bytes(b'a' * 10)
+    (faces / 'bob.png').write_bytes(b'b' * 20)
+    (faces / 'blank.jpg').write_bytes(b'noface')
+    (faces / 'notes.txt').write_text('ignored')
+    cache_path = str(tmp_path / 'cache.npz')
+
+    names, encodings = FaceEncodingCache(cache_path).refresh(str(faces), fake_encode, workers=1)
+    assert names == ['alice', 'bob']
+    assert encodings.shape == (2, 128) and encodings.dtype == np.float32
+
+    cache = FaceEncodingCache(cache_path)
+    names, _ = cache.refresh(str(faces), fake_encode, workers=1)
+    assert cache.stats == {'cached': 3, 'encoded': 0, 'removed': 0}
+
+    (faces / 'bob.png').write_bytes(b'b' * 30)
+    (faces / 'alice.jpg').unlink()
+    names, encodings = cache.refresh(str(faces), fake_encode, workers=1)
+    assert cache.stats == {'cached': 1, 'encoded': 1, 'removed': 1}
+    assert names == ['bob']
+    assert encodings[0, 0] == 30
+
+
+def test_unreadable_cache_is_rebuilt(tmp_path):
+    faces = tmp_path / 'faces'
+    faces.mkdir()
+    (faces / 'carol.jpg').write_bytes(b'c' * 5)
+    cache_path = tmp_path / 'cache.npz'
+    cache_path.write_bytes(b'garbage')
+    cache = FaceEncodingCache(str(cache_path))
+    names, _ = cache.refresh(str(faces), fake_encode, workers=1)
+    assert names == ['carol']
+    assert cache.stats['encoded'] == 1
+
+
+def test_put_and_drop_runtime_entries(tmp_path):
+    faces = tmp_path / 'faces'
+    faces.mkdir()
+    (faces / 'alice.jpg').write_bytes(b'a' * 10)
+    cache_path = str(tmp_path / 'cache.npz')
+    cache = FaceEncodingCache(cache_path)
+    cache.refresh(str(faces), fake_encode, workers=1)
+
+    (faces / 'dave.jpg').write_bytes(b'd' * 5)
+    cache.put(str(faces / 'dave.jpg'), 'dave', np.ones(128))
+    assert FaceEncodingCache(cache_path).load() and cache.identities() == {'alice': 1, 'dave': 1}
+    # An enrolled image already in the cache is not re-encoded on the next startup
+    fresh = FaceEncodingCache(cache_path)
+    names, _ = fresh.refresh(str(faces), fake_encode, workers=1)
+    assert names == ['alice', 'dave'] and fresh.stats['encoded'] == 0
+
+    assert len(cache.drop('dave')) == 1
+    reloaded = FaceEncodingCache(cache_path)
+    reloaded.load()
+    assert reloaded.identities() == {'alice': 1}
+
+
+def make_gallery(tmp_path, count=4):
+    faces = tmp_path / 'faces'
+    faces.mkdir()
+    for i in range(count):
+        (faces / f'person{i}.jpg').write_bytes(b'x' * (i + 1))
+    return str(faces)
+
+
+def refresh_in_child(faces, cache_path, results):
+    names, _ = FaceEncodingCache(cache_path).refresh(faces, fake_encode, workers=2)
+    results.put(names)
+
+
+def test_refresh_with_worker_pool_and_in_daemon_process(tmp_path):
+    faces = make_gallery(tmp_path)
+    names, encodings = FaceEncodingCache(str(tmp_path / 'pool.npz')).refresh(faces, fake_encode, workers=2)
+    assert names == [f'person{i}' for i in range(4)]
+    assert list(encodings[:, 0]) == [1, 2, 3, 4]
+    # Orchestrator camera workers are daemonic and may not start a pool: encoding falls back to inline
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=refresh_in_child, args=(faces, str(tmp_path / 'daemon.npz'), results),
+                                    daemon=True)
+    child.start()
+    assert results.get(timeout=30) == names
+    child.join(10)
+    assert child.exitcode == 0
+
+
+def test_concurrent_refresh_of_shared_cache(tmp_path):
+    faces = make_gallery(tmp_path)
+    cache_path = str(tmp_path / 'cache.npz')
+    results, errors = [], []
+
+    def refresh():
+        try:
+            results.append(FaceEncodingCache(cache_path).refresh(faces, fake_encode, workers=1)[0])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=refresh) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(results) == 6
+    assert sorted(os.listdir(tmp_path)) == ['cache.npz', 'faces']  # No temporary files left behind
+    assert FaceEncodingCache(cache_path).load().keys() == {os.path.join(faces, f'person{i}.jpg') for i in range(4)}
+
+
+def test_concurrent_refreshes_encode_each_image_once(tmp_path):
+    faces = make_gallery(tmp_path)
+    cache_path = str(tmp_path / 'cache.npz')
+    encoded = []
+
+    def counting_encode(path):
+        encoded.append(path)
+        time.sleep(0.02)  # Long enough for the refreshes to overlap
+        return fake_encode(path)
+
+    threads = [threading.Thread(target=FaceEncodingCache(cache_path).refresh, args=(faces, counting_encode, 1))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # The first refresh encodes the gallery; the others wait and reuse its cache
+    assert sorted(encoded) == sorted(os.path.join(faces, f'person{i}.jpg') for i in range(4))
+
+
+def test_face_images_finds_every_image_of_a_name(tmp_path):
+    from motion_detector.face_cache import VALID_NAME, face_images
+    for fname in ('alice.jpg', 'alice.PNG', 'alice.jpeg', 'alice.txt', 'alice2.jpg', 'bob.jpg'):
+        (tmp_path / fname).write_bytes(b'x')
+    assert [os.path.basename(p) for p in face_images(str(tmp_path), 'alice')] == \
+        ['alice.PNG', 'alice.jpeg', 'alice.jpg']
+    assert face_images(str(tmp_path / 'missing'), 'alice') == []
+    assert VALID_NAME.match('Alice Smith') and not VALID_NAME.match('../alice')
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from motion_detector.face_index import FaceIndex
+
+
+def brute_force(gallery, query):
+    return np.linalg.norm(gallery - query, axis=1)
+
+
+def test_exact_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    gallery = rng.normal(size=(500, 128)).astype(np.float32)
+    names = [f'p{i}' for i in range(500)]
+    index = FaceIndex()
+    index.add(names, gallery)
+    assert len(index) == 500
+    query = gallery[42] + 0.01
+    result = index.search(query, k=3)[0]
+    expected = np.argsort(brute_force(gallery, query))[:3]
+    assert [n for n, _ in result] == [names[i] for i in expected]
+    assert abs(result[0][1] - brute_force(gallery, query)[42]) < 1e-3
+
+
+def test_add_and_remove_identities():
+    index = FaceIndex(dim=4)
+    index.add('alice', np.ones(4))
+    index.add(['bob', 'carol', 'alice'], np.array([[2] * 4, [3] * 4, [1.1] * 4]))
+    assert index.identities() == {'alice': 2, 'bob': 1, 'carol': 1}
+    assert index.remove('alice') == 2
+    assert sorted(index.names) == ['bob', 'carol']
+    assert index.search(np.full(4, 3.0))[0][0] == ('carol', 0.0)
+    assert index.remove('nobody') == 0
+    index.remove('bob')
+    index.remove('carol')
+    assert index.search(np.zeros(4)) == [[]]
+
+
+def test_ivf_finds_clustered_neighbours():
+    rng = np.random.default_rng(2)
+    centres = rng.normal(scale=5, size=(20, 16))
+    gallery = (centres[rng.integers(0, 20, 2000)] + rng.normal(scale=0.1, size=(2000, 16))).astype(np.float32)
+    index = FaceIndex(dim=16, ivf_threshold=1000, nprobe=4)
+    index.add([str(i) for i in range(2000)], gallery)
+    assert index._centroids is not None
+    hits = 0
+    for i in range(0, 2000, 50):
+        hits += index.search(gallery[i], k=1)[0][0][0] == str(i)
+    assert hits == 40
+    # Incremental add after training lands in a cell and is found
+    index.add('new', centres[3] + 0.5)
+    assert index.search(centres[3] + 0.5)[0][0][0] == 'new'
+
+
+def test_ivf_probing_every_cell_matches_brute_force():
+    rng = np.random.default_rng(3)
+    gallery = rng.normal(size=(200, 16)).astype(np.float32)
+    names = [f'p{i}' for i in range(200)]
+    index = FaceIndex(dim=16, ivf_threshold=100, nlist=4, nprobe=8)
+    index.add(names, gallery)
+    assert index._centroids is not None
+    for i in range(200):
+        query = gallery[i] + 0.01
+        result = index.search(query, k=2)[0]
+        distances = brute_force(gallery, query)
+        expected = np.argsort(distances)[:2]
+        assert [n for n, _ in result] == [names[j] for j in expected]
+        assert abs(result[0][1] - distances[expected[0]]) < 1e-3
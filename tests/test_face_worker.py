@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+import numpy as np
+from motion_detector.face_worker import FaceRecognitionWorker
+
+
+class FakeRecognizer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.shapes = []
+
+    def recognize(self, frame):
+        time.sleep(self.delay)
+        self.shapes.append(frame.shape[:2])
+        return [{'name': 'alice', 'box': (1, 2, 3, 4)}]
+
+
+def wait_result(worker, frame, boxes):
+    done = threading.Event()
+    out = {}
+
+    def on_result(matches, status):
+        out['matches'], out['status'] = matches, status
+        done.set()
+
+    worker.submit(frame, boxes, on_result)
+    assert done.wait(5)
+    return out['matches'], out['status']
+
+
+def test_recognizes_person_crops_with_frame_coordinates():
+    recog = FakeRecognizer()
+    worker = FaceRecognitionWorker(recog, padding=0.0)
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    matches, status = wait_result(worker, frame, [(50, 20, 90, 80, 0.9, 'person')])
+    assert status == 'ok'
+    assert recog.shapes == [(60, 40)]
+    assert matches == [{'name': 'alice', 'box': (51, 22, 53, 24)}]
+    assert worker.latest() == matches
+
+
+def test_timeout_alerts_without_names_and_busy_is_rejected():
+    worker = FaceRecognitionWorker(FakeRecognizer(delay=0.3), max_pending=1, timeout=0.05)
+    frame = np.zeros((50, 50, 3), dtype=np.uint8)
+    matches, status = wait_result(worker, frame, [])
+    assert (matches, status) == ([], 'timeout')
+    matches, status = wait_result(worker, frame, [])
+    assert status == 'busy'
+    time.sleep(0.4)
+    # The late result still reaches the overlay
+    assert worker.latest()[0]['name'] == 'alice'
+    assert worker.get_stats()['late'] == 1
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import numpy as np
+import cv2
+from motion_detector.frame_grabber import FrameGrabber
+
+
+def write_video(path, n_frames=20):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for i in range(n_frames):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def read_all(grabber, delay=0.0):
+    frames = 0
+    while True:
+        ok, frame, ts = grabber.read()
+        if not ok:
+            if grabber.ended:
+                return frames
+            continue
+        assert ts <= time.time()
+        frames += 1
+        time.sleep(delay)
+
+
+def test_no_drop_mode_returns_every_frame(tmp_path):
+    video = tmp_path / 'clip.avi'
+    write_video(video)
+    grabber = FrameGrabber(str(video), buffer_size=2, drop_frames=False)
+    assert grabber.start()
+    assert read_all(grabber) == 20
+    grabber.stop()
+    assert grabber.get_stats()['dropped'] == 0
+
+
+def test_slow_consumer_drops_oldest_frames(tmp_path):
+    video = tmp_path / 'clip.avi'
+    write_video(video)
+    grabber = FrameGrabber(str(video), buffer_size=2, drop_frames=True)
+    assert grabber.start()
+    consumed = read_all(grabber, delay=0.02)
+    grabber.stop()
+    stats = grabber.get_stats()
+    assert stats['captured'] == 20
+    assert stats['dropped'] > 0
+    assert consumed + stats['dropped'] == stats['captured']
+
+
+def test_unopenable_source(tmp_path):
+    grabber = FrameGrabber(str(tmp_path / 'missing.avi'))
+    assert grabber.start() is False
@@ -0,0 +1,163 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+
+import socket
+import threading
+import time
+import numpy as np
+import cv2
+from motion_detector.live_feed import LiveFeedManager
+
+
+def make_feed():
+    feed = LiveFeedManager()
+    feed.active = True  # streaming logic only, no HTTP server
+    return feed
+
+
+def test_no_encoding_without_viewers():
+    feed = make_feed()
+    for _ in range(5):
+        feed.update_frame(np.zeros((20, 20, 3), dtype=np.uint8), 'Cam')
+    assert feed.get_stats() == {'published': 5, 'encoded': 0, 'viewers': 0, 'server': {}}
+    assert feed.cameras() == ['Cam']
+
+
+def read_until(sock, marker):
+    data = bytearray()
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+        if marker in data[-(len(chunk) + len(marker)):]:
+            break
+    return bytes(data)
+
+
+def open_stream(port, path):
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    sock.sendall(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    return sock
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_peek_and_encoded_jpeg_encode_each_version_once():
+    feed = make_feed()
+    feed.update_frame(np.full((20, 20, 3), 128, dtype=np.uint8), 'Cam')
+    version, source, source_version, jpeg = feed.peek('Cam')
+    assert (source, source_version, jpeg) == ('Cam', 1, None)  # Not encoded until a viewer asks
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(feed.encoded_jpeg('Cam'))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert feed.get_stats()['encoded'] == 1 and len(set(results)) == 1
+    assert feed.peek('Cam')[3] == results[0]
+    assert cv2.imdecode(np.frombuffer(results[0], dtype=np.uint8), cv2.IMREAD_COLOR).shape == (20, 20, 3)
+    # Pre-encoded frames from process workers are served as-is
+    feed.update_jpeg(b'jpeg', 'Other')
+    assert feed.peek(None)[1:] == ('Other', 1, b'jpeg')
+
+
+def test_two_viewers_share_one_encode_per_frame():
+    feed = LiveFeedManager()
+    feed.start(host='127.0.0.1', port=0)
+    try:
+        viewers = [open_stream(feed.server.port, '/video_feed/Cam') for _ in range(2)]
+        assert wait_for(lambda: feed.get_stats()['viewers'] == 2)
+        for i in range(3):
+            feed.update_frame(np.full((20, 20, 3), 60 * i, dtype=np.uint8), 'Cam')
+            jpeg = feed.encoded_jpeg('Cam')  # The bytes the server sends (cached once encoded)
+            for sock in viewers:
+                assert jpeg in read_until(sock, jpeg)
+        assert feed.get_stats()['encoded'] == 3
+        for sock in viewers:
+            sock.close()
+    finally:
+        feed.stop()
+
+
+def test_new_frame_wakes_waiting_viewer_and_follows_latest_camera():
+    feed = LiveFeedManager()
+    feed.start(host='127.0.0.1', port=0)
+    try:
+        sock = open_stream(feed.server.port, '/video_feed')
+        assert wait_for(lambda: feed.get_stats()['viewers'] == 1)
+        time.sleep(0.1)  # Viewer is now waiting for a first frame
+        for camera, jpeg in (('A', b'JPEG-A'), ('B', b'JPEG-B')):
+            published = time.time()
+            feed.update_jpeg(jpeg, camera)
+            assert jpeg in read_until(sock, jpeg)
+            # Woken by the publish, not by the server's 1 s frame_timeout poll
+            assert time.time() - published < 0.5
+        assert feed.get_stats()['encoded'] == 0
+        sock.close()
+    finally:
+        feed.stop()
+
+
+def test_async_server_streams_and_restarts_on_same_port():
+    feed = LiveFeedManager()
+    feed.start(host='127.0.0.1', port=0)
+    port = feed.server.port
+    try:
+        feed.update_jpeg(b'JPEG-1', 'Cam')
+        sock = open_stream(port, '/video_feed/Cam')
+        data = read_until(sock, b'JPEG-1')
+        assert b'multipart/x-mixed-replace; boundary=frame' in data
+        assert b'Content-Length: 6' in data
+        feed.update_jpeg(b'JPEG-2', 'Cam')
+        assert b'JPEG-2' in read_until(sock, b'JPEG-2')
+        assert feed.get_stats()['viewers'] == 1
+
+        index = open_stream(port, '/')
+        assert b'/video_feed/Cam' in read_until(index, b'</html>')
+        index.close()
+    finally:
+        feed.stop()
+    # Viewers are disconnected and the port is released
+    assert read_until(sock, b'never') is not None
+    sock.close()
+    assert feed.get_stats()['viewers'] == 0
+    assert not feed.is_running()
+
+    feed.start(host='127.0.0.1', port=port)
+    try:
+        assert feed.is_running() and feed.server.port == port
+        feed.update_jpeg(b'JPEG-3', 'Cam')
+        sock = open_stream(port, '/video_feed')
+        assert b'JPEG-3' in read_until(sock, b'JPEG-3')
+        sock.close()
+    finally:
+        feed.stop()
+
+
+def test_slow_client_skips_to_newest_frame():
+    feed = LiveFeedManager()
+    feed.start(host='127.0.0.1', port=0)
+    try:
+        sock = open_stream(feed.server.port, '/video_feed/Cam')
+        # The client does not read while frames are published, so its socket buffers fill up
+        payload = b'x' * 1000000
+        for i in range(30):
+            feed.update_jpeg(payload + str(i).encode(), 'Cam')
+            time.sleep(0.01)
+        data = read_until(sock, b'x29\r\n')
+        # Far fewer than 30 frames reached the client; the rest were skipped, not buffered
+        assert data.count(b'--frame') < 30
+        assert feed.get_stats()['server']['frames_dropped'] > 0
+        sock.close()
+    finally:
+        feed.stop()
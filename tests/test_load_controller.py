@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from motion_detector.load_controller import LoadController, DEFAULT_LEVELS
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.latency = {'FrontDoor': 100.0}
+        self.applied = {}
+
+    def get_stats(self):
+        return {'cameras': {name: {'latency_ms': ms} for name, ms in self.latency.items()}}
+
+    def apply_quality(self, camera, settings):
+        self.applied[camera] = settings
+
+
+class FakeLiveFeed:
+    def __init__(self):
+        self.quality = {}
+
+    def set_quality(self, camera, quality):
+        self.quality[camera] = quality
+
+
+class FakeMonitor:
+    def __init__(self):
+        self.status = {'cpu': 20, 'memory': 30}
+
+    def get_status(self):
+        return dict(self.status)
+
+
+def test_degrades_on_latency_and_recovers():
+    orch, feed = FakeOrchestrator(), FakeLiveFeed()
+    ctrl = LoadController(orch, feed, FakeMonitor(), latency_budget_ms=500, recover_after=2, start_level=1)
+    ctrl.step()
+    assert orch.applied['FrontDoor'] == DEFAULT_LEVELS[1]
+    orch.latency['FrontDoor'] = 1200.0
+    ctrl.step()
+    ctrl.step()
+    assert ctrl.get_decisions()['cameras']['FrontDoor']['level'] == 3
+    assert feed.quality['FrontDoor'] == DEFAULT_LEVELS[3]['jpeg_quality']
+    orch.latency['FrontDoor'] = 50.0
+    ctrl.step()
+    ctrl.step()
+    decision = ctrl.get_decisions()['cameras']['FrontDoor']
+    assert decision['level'] == 2
+    assert decision['reason'] == 'load dropped'
+
+
+def test_system_overload_degrades_every_camera():
+    orch, feed, monitor = FakeOrchestrator(), FakeLiveFeed(), FakeMonitor()
+    orch.latency['Garage'] = 10.0
+    ctrl = LoadController(orch, feed, monitor, start_level=0)
+    monitor.status['cpu'] = 99
+    ctrl.step()
+    cameras = ctrl.get_decisions()['cameras']
+    assert cameras['FrontDoor']['level'] == 1
+    assert cameras['Garage']['level'] == 1
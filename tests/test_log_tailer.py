@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from motion_detector.log_tailer import LogTailer
+
+
+def test_follows_new_lines_from_end(tmp_path):
+    log = tmp_path / 'notification_log.txt'
+    log.write_text('old 1\nold 2\n')
+    tailer = LogTailer({'notification': str(log)}, history=10)
+    sub = tailer.subscribe()
+    assert tailer.history('notification') == ['old 1', 'old 2']
+    with open(log, 'a') as f:
+        f.write('new 1\nnew ')  # Second line not complete yet
+    tailer.poll()
+    assert sub.get(0) == [('notification', 'new 1')]
+    with open(log, 'a') as f:
+        f.write('2\n')
+    tailer.poll()
+    assert sub.get(0) == [('notification', 'new 2')]
+    # Only the appended bytes were read, not the existing file
+    assert tailer.get_stats()['bytes_read'] == len('new 1\nnew 2\n')
+
+
+def test_rotation_truncation_and_filter(tmp_path):
+    log = tmp_path / 'camera_log.txt'
+    log.write_text('first\n')
+    tailer = LogTailer({'detection': str(log)})
+    sub = tailer.subscribe(match=lambda name, line: 'person' in line)
+    # Rotated: renamed away and recreated
+    log.rename(tmp_path / 'camera_log.txt.1')
+    log.write_text('person at door\ncar in drive\n')
+    tailer.poll()
+    assert sub.get(0) == [('detection', 'person at door')]
+    # Truncated in place (dashboard "Clear")
+    log.write_text('')
+    tailer.poll()
+    assert tailer.history('detection') == []
+    with open(log, 'a') as f:
+        f.write('person again\n')
+    tailer.poll()
+    assert sub.get(0) == [('detection', 'person again')]
+    assert tailer.get_stats()['rotations'] == 2
+
+
+def test_slow_subscriber_drops_oldest(tmp_path):
+    log = tmp_path / 'ftp_upload.log'
+    log.write_text('')
+    tailer = LogTailer({'upload': str(log)})
+    slow = tailer.subscribe(maxlen=3)
+    with open(log, 'a') as f:
+        f.writelines(f'line {i}\n' for i in range(5))
+    tailer.poll()
+    assert [line for _, line in slow.get(0)] == ['line 2', 'line 3', 'line 4']
+    assert tailer.get_stats()['dropped'] == 2
+    tailer.unsubscribe(slow)
+    assert tailer.get_stats()['subscribers'] == 0
+
+
+def test_log_made_of_several_files(tmp_path):
+    alerts, front, garage = (tmp_path / name for name in ('motiondetection.log', 'front.txt', 'garage.txt'))
+    alerts.write_text('[10:00] ALERT: Person Detected - Front\n')
+    front.write_text('')
+    tailer = LogTailer({'detection': [str(alerts), str(front), str(garage), str(front)]})
+    sub = tailer.subscribe()
+    assert tailer.history('detection') == ['[10:00] ALERT: Person Detected - Front']
+    with open(front, 'a') as f:
+        f.write('Front: person\n')
+    garage.write_text('Garage: person\n')  # Created after the tailer started
+    tailer.poll()
+    assert sorted(sub.get(0)) == [('detection', 'Front: person'), ('detection', 'Garage: person')]
@@ -35,3 +35,19 @@ def test_process_frame_with_motion():
     assert out_frame is not None
     assert dilated is not None
     assert frame_delta is not None
+
+def test_process_frame_downscaled_maps_boxes_to_full_res():
+    detector = MotionDetector(2000, 50, True, 0, dummy_logger(), analysis_scale=0.25)
+    frame1 = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    frame2 = frame1.copy()
+    cv2.rectangle(frame2, (400, 400), (800, 800), (255, 255, 255), -1)
+    detector.process_frame(frame1)
+    detected, out_frame, dilated, frame_delta = detector.process_frame(frame2)
+    assert detected is True
+    assert out_frame.shape == (1080, 1920, 3)
+    assert dilated.shape == (270, 480)
+    assert detector.avg_frame.dtype == np.float32
+    x1, y1, x2, y2 = detector.last_boxes[0]
+    # Box covers the square in full-res coordinates (dilation grows it slightly)
+    assert x1 <= 400 and y1 <= 400 and x2 >= 800 and y2 >= 800
+    assert x2 - x1 < 500 and y2 - y1 < 500
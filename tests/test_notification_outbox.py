@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sqlite3
+import threading
+import time
+from motion_detector.notification_outbox import NotificationOutbox, outbox_summary
+
+
+class FlakySender:
+    """Fails the first ``failures`` calls, optionally blocks until released, and records payloads."""
+    def __init__(self, failures=0, block=False):
+        self.failures = failures
+        self.delivered = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, payload):
+        self.release.wait(5)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError('provider down')
+        self.delivered.append(payload)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_retry_with_backoff(tmp_path):
+    sender = FlakySender(failures=2)
+    outbox = NotificationOutbox(str(tmp_path / 'o.db'), {'discord': sender}, backoff_base=0.01)
+    outbox.start()
+    try:
+        outbox.enqueue('discord', {'message': 'person'})
+        assert wait_for(lambda: sender.delivered)
+    finally:
+        outbox.stop()
+    stats = outbox.get_stats()['discord']
+    assert stats['sent'] == 1 and stats['retries'] == 2 and stats['pending'] == 0
+
+
+def test_dead_letter(tmp_path):
+    db = str(tmp_path / 'o.db')
+    dead = []
+    outbox = NotificationOutbox(db, {'email': FlakySender(failures=100)}, max_attempts=3, backoff_base=0.01,
+                                on_dead=lambda channel, payload, error: dead.append((channel, error)))
+    outbox.start()
+    try:
+        outbox.enqueue('email', {'message': 'person'})
+        assert wait_for(lambda: dead)
+    finally:
+        outbox.stop()
+    assert dead == [('email', 'provider down')]
+    summary = outbox_summary(db)['email']
+    assert summary['dead'] == 1 and summary['pending'] == 0
+
+
+def test_pending_messages_delivered_after_restart(tmp_path):
+    db = str(tmp_path / 'o.db')
+    outbox = NotificationOutbox(db, {'telegram': FlakySender()}, owner='FrontDoor')
+    # Not started: the process "crashes" with the messages only on disk
+    outbox.enqueue('telegram', {'message': 'one'})
+    outbox.enqueue('telegram', {'message': 'two'})
+    assert outbox_summary(db)['telegram']['pending'] == 2
+    outbox.stop()
+
+    # Another owner sharing the file does not pick them up
+    other = FlakySender()
+    NotificationOutbox(db, {'telegram': other}, owner='Garage').stop()
+    sender = FlakySender()
+    outbox = NotificationOutbox(db, {'telegram': sender}, owner='FrontDoor')
+    outbox.start()
+    try:
+        assert wait_for(lambda: len(sender.delivered) == 2)
+    finally:
+        outbox.stop()
+    assert [p['message'] for p in sender.delivered] == ['one', 'two']
+    assert not other.delivered
+    assert outbox_summary(db)['telegram']['sent_recent'] == 2
+
+
+def test_backpressure_and_channel_isolation(tmp_path):
+    slow = FlakySender(block=True)
+    fast = FlakySender()
+    outbox = NotificationOutbox(str(tmp_path / 'o.db'), {'email': slow, 'discord': fast}, max_pending=2)
+    outbox.start()
+    try:
+        assert outbox.enqueue('email', {'n': 1}) is not None
+        assert outbox.enqueue('email', {'n': 2}) is not None
+        assert outbox.enqueue('email', {'n': 3}) is None  # full, rejected at once
+        # A stuck provider does not delay the other channels
+        outbox.enqueue('discord', {'n': 1})
+        assert wait_for(lambda: fast.delivered)
+        threading.Timer(0.2, slow.release.set).start()
+        assert outbox.enqueue('email', {'n': 3}, timeout=5) is not None  # waits for room
+        assert wait_for(lambda: len(slow.delivered) == 3)
+    finally:
+        outbox.stop()
+    assert outbox.get_stats()['email']['rejected'] == 1
+    with sqlite3.connect(str(tmp_path / 'o.db')) as db:
+        assert db.execute("SELECT COUNT(*) FROM outbox WHERE state = 'sent'").fetchone()[0] == 4
@@ -1,6 +1,63 @@
+import os
+import socketserver
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from motion_detector.notifier import Notifier
 
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append((self.path, self.headers.get('Content-Type', ''), body))
+        status = self.server.status
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib; the first ``drop`` messages cut the connection after DATA."""
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 test\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.split(b' ')[0].strip().upper()
+            if cmd == b'EHLO':
+                self.wfile.write(b'250-test\r\n250 AUTH PLAIN\r\n')
+            elif cmd == b'AUTH':
+                self.wfile.write(b'235 ok\r\n')
+            elif cmd == b'DATA':
+                self.wfile.write(b'354 go\r\n')
+                data = []
+                while data[-1:] not in ([b'.\r\n'], [b'']):
+                    data.append(self.rfile.readline())
+                self.server.last_data = b''.join(data)
+                if self.server.drop:
+                    self.server.drop -= 1
+                    return
+                self.server.messages += 1
+                self.wfile.write(b'250 queued\r\n')
+            elif cmd == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 ok\r\n')
+
 class DummyConfig:
     def get(self, key, default=None):
         return default
@@ -27,5 +84,110 @@ class TestNotifier(unittest.TestCase):
     def test_send_discord_disabled(self):
         self.notifier.send_discord('Test')
 
+
+class TestNotifierTransports(unittest.TestCase):
+    def setUp(self):
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.http.connections = 0
+        self.http.status = 200
+        self.http.requests = []
+        self.smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPHandler)
+        self.smtp.connections = self.smtp.messages = self.smtp.drop = 0
+        for server in (self.http, self.smtp):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.log = tempfile.NamedTemporaryFile(delete=False)
+        self.log.close()
+        self.notifier = Notifier({
+            'email': {'enabled': True, 'from': 'a@example.com', 'to': 'b@example.com', 'smtp_server': '127.0.0.1',
+                      'smtp_port': self.smtp.server_address[1], 'smtp_ssl': False, 'username': 'u', 'password': 'p'},
+            'discord': {'enabled': True, 'webhook_url': f'http://127.0.0.1:{self.http.server_address[1]}/hook'},
+        }, log_file=self.log.name)
+        self.notifier.rate_limit_seconds = 0
+
+    def tearDown(self):
+        self.notifier.close()
+        for server in (self.http, self.smtp):
+            server.shutdown()
+            server.server_close()
+        os.remove(self.log.name)
+
+    def test_http_connection_reused(self):
+        for _ in range(5):
+            self.notifier.send_discord('Test')
+        self.assertEqual(self.http.connections, 1)
+        stats = self.notifier.get_stats()['discord']
+        self.assertEqual(stats['sent'], 5)
+        self.assertIsNotNone(stats['p95_ms'])
+
+    def test_http_error_counts_as_failed(self):
+        self.http.status = 500
+        self.notifier.send_discord('Test')
+        self.assertEqual(self.notifier.get_stats()['discord']['failed'], 1)
+        with open(self.log.name) as f:
+            self.assertIn('FAILED', f.read())
+
+    def test_smtp_connection_reused_and_reconnected(self):
+        for _ in range(3):
+            self.notifier.send_email('Test', 'Body')
+        self.assertEqual((self.smtp.connections, self.smtp.messages), (1, 3))
+        # The server drops the session: the email is resent on a new connection
+        self.smtp.drop = 1
+        self.notifier.send_email('Test', 'Body')
+        self.assertEqual((self.smtp.connections, self.smtp.messages), (2, 4))
+        self.assertEqual(self.notifier.get_stats()['email']['sent'], 4)
+
+    def test_notify_all_without_rate_limit(self):
+        self.notifier.rate_limit_seconds = 30
+        self.notifier.notify_all('Person', 'Front door')
+        self.notifier.notify_all('Digest', 'Front door, Garage')
+        self.notifier.notify_all('Digest', 'Garage', rate_limited=False)
+        deadline = time.time() + 5
+        while time.time() < deadline and self.notifier.get_stats().get('discord', {}).get('sent', 0) < 2:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        # The second rate-limited call is dropped, the digest is not
+        self.assertEqual(self.notifier.get_stats()['discord']['sent'], 2)
+
+    def test_snapshot_attached_by_media_channels(self):
+        image = b'\xff\xd8' + os.urandom(2000) + b'\xff\xd9'
+        self.notifier.telegram_cfg = {'enabled': True, 'bot_token': 'T', 'chat_id': 1,
+                                      'api_url': f'http://127.0.0.1:{self.http.server_address[1]}'}
+        self.notifier.send_discord('Person', image=image)
+        self.notifier.send_telegram('Person', image=image)
+        self.notifier.send_email('Person', 'Front door', image=image)
+        (discord_path, discord_type, discord_body), (telegram_path, _, telegram_body) = self.http.requests
+        self.assertTrue(discord_type.startswith('multipart/form-data'))
+        self.assertIn(image, discord_body)
+        self.assertIn(b'payload_json', discord_body)
+        self.assertEqual(telegram_path, '/botT/sendPhoto')
+        self.assertIn(image, telegram_body)
+        self.assertIn(b'Content-Type: image/jpeg', self.smtp.last_data)
+        stats = self.notifier.get_stats()
+        for channel in ('discord', 'telegram', 'email'):
+            self.assertEqual((stats[channel]['attachments'], stats[channel]['attachment_bytes']), (1, len(image)))
+
+    def test_notify_all_through_outbox(self):
+        db = self.log.name + '.db'
+        notifier = Notifier({'discord': self.notifier.discord_cfg}, log_file=self.log.name,
+                            outbox_cfg={'enabled': True, 'path': db, 'backoff_base': 0.01})
+        notifier.rate_limit_seconds = 0
+        self.http.status = 503
+        notifier.notify_all('Person', 'Front door', image=b'\xff\xd8snapshot')
+        deadline = time.time() + 5
+        while time.time() < deadline and notifier.get_stats().get('discord', {}).get('failed', 0) < 1:
+            time.sleep(0.01)
+        self.http.status = 200
+        while time.time() < deadline and notifier.get_stats()['discord']['outbox']['sent'] < 1:
+            time.sleep(0.01)
+        notifier.close()
+        stats = notifier.get_stats()['discord']
+        self.assertEqual((stats['sent'], stats['outbox']['sent']), (1, 1))
+        # The retried message still carries the snapshot, referenced by key in the stored payload
+        self.assertEqual(stats['attachment_bytes'], 10)
+        self.assertGreaterEqual(stats['outbox']['retries'], 1)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db + suffix):
+                os.remove(db + suffix)
+
 if __name__ == '__main__':
     unittest.main()
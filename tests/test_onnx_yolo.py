@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from motion_detector.onnx_yolo import ONNXYOLODetector, letterbox, decode_yolo_output
+
+
+def test_letterbox_keeps_aspect_ratio():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    image, scale, pad = letterbox(frame, 320)
+    assert image.shape == (320, 320, 3)
+    assert scale == 0.5
+    assert pad == (0, 70)
+
+
+def test_decode_yolov5_layout():
+    # (1, N, 5 + C): one confident 'car' box, one low-objectness box, empty rows
+    out = np.zeros((1, 10, 7), dtype=np.float32)
+    out[0, 0] = [160, 160, 40, 20, 0.9, 0.1, 1.0]
+    out[0, 1] = [50, 50, 10, 10, 0.1, 1.0, 0.0]
+    dets = decode_yolo_output(out, (640, 640), 0.5, (0, 0), ['person', 'car'], 0.5, 0.45)
+    assert len(dets) == 1
+    x1, y1, x2, y2, conf, name = dets[0]
+    assert (x1, y1, x2, y2) == (280, 300, 360, 340)
+    assert name == 'car'
+    assert abs(conf - 0.9) < 1e-6
+
+
+def test_decode_yolov8_layout_and_target_filter():
+    # (1, 4 + C, N): channels first, no objectness
+    out = np.zeros((1, 6, 10), dtype=np.float32)
+    out[0, :, 0] = [100, 100, 20, 20, 0.8, 0.0]
+    out[0, :, 1] = [200, 200, 20, 20, 0.0, 0.7]
+    dets = decode_yolo_output(out, (320, 320), 1.0, (0, 0), ['person', 'car'], 0.5, 0.45,
+                              target_classes={'person'})
+    assert [d[5] for d in dets] == ['person']
+
+
+def test_quantize_requires_onnxruntime_backend():
+    # OpenCV DNN cannot load the ConvInteger/MatMulInteger ops of a dynamically quantized model
+    with pytest.raises(ValueError, match='onnxruntime'):
+        ONNXYOLODetector(model_path='models/missing.onnx', quantize=True)
+    with pytest.raises(ValueError, match='onnxruntime'):
+        ONNXYOLODetector(model_path='models/missing.onnx', quantize=True, backend='opencv')
@@ -0,0 +1,149 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+
+import importlib.util
+import threading
+import logging
+import numpy as np
+import cv2
+import pytest
+from motion_detector.motion import MotionDetector
+from camera_pipeline import CameraPipeline
+from orchestrator import MultiCameraOrchestrator
+
+
+class DummyLiveFeed:
+    def __init__(self):
+        self.frames = {}
+        self.running = False
+
+    def start(self, host='0.0.0.0', port=3000):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def is_running(self):
+        return self.running
+
+    def update_frame(self, frame, camera=None):
+        self.frames[camera] = frame
+
+    def update_jpeg(self, jpeg, camera=None):
+        self.frames[camera] = jpeg
+
+    def clear_frame(self, camera):
+        self.frames.pop(camera, None)
+
+    def cameras(self):
+        return sorted(self.frames)
+
+
+class BoxDetector:
+    def detect(self, frame):
+        return [(10, 10, 50, 50, 0.9, 'person')]
+
+
+def write_video(path, n_frames=12):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for i in range(n_frames):
+        frame = np.full((48, 64, 3), i * 10, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def test_publish_frame_shares_one_live_feed():
+    live_feed = DummyLiveFeed()
+    config = {'cameras': [{'name': 'FrontDoor'}, {'name': 'Garage'}]}
+    orch = MultiCameraOrchestrator(config, live_feed)
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    orch.publish_frame('FrontDoor', frame)
+    orch.publish_frame('Garage', frame)
+    assert live_feed.is_running()
+    assert live_feed.cameras() == ['FrontDoor', 'Garage']
+    orch.publish_frame('FrontDoor', None)
+    assert live_feed.is_running()
+    orch.publish_frame('Garage', None)
+    assert not live_feed.is_running()
+
+    # Process workers hand over JPEG bytes, which are passed through untouched
+    orch.publish_frame('Garage', b'jpeg')
+    assert live_feed.frames['Garage'] == b'jpeg'
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        MultiCameraOrchestrator({'cameras': []}, DummyLiveFeed(), mode='fibers')
+
+
+def test_pipeline_runs_video_and_publishes(tmp_path):
+    video = tmp_path / 'clip.avi'
+    write_video(video)
+    published = []
+    cam_cfg = {'name': 'TestCam', 'live_feed_timeout': 0}
+    pipeline = CameraPipeline(cam_cfg, {'headless': True}, threading.Event(),
+                              lambda cam, frame: published.append((cam, frame is not None)),
+                              video_path=str(video))
+    pipeline.detector = MotionDetector(800, 100, True, 0, logging.getLogger('dummy'))
+    pipeline.detector.on_person_detected = lambda frame=None, persons=None: None
+    pipeline.person_detector = BoxDetector()
+    pipeline.run()
+    stats = pipeline.get_stats()
+    assert stats['frames'] > 0
+    assert stats['persons'] == stats['frames']
+    assert published[0] == ('TestCam', True)
+    assert published[-1] == ('TestCam', False)
+
+
+def test_apply_config_updates_running_pipeline():
+    config = {'cameras': [{'name': 'FrontDoor', 'sensitivity': 800}]}
+    orch = MultiCameraOrchestrator(config, DummyLiveFeed())
+    pipeline = CameraPipeline(config['cameras'][0], config, orch.stop_flag, orch.publish_frame)
+    pipeline.detector = MotionDetector(800, 100, True, 0, logging.getLogger('dummy'))
+    pipeline.person_detector = BoxDetector()
+    pipeline.person_detector.conf_threshold = 0.5
+    orch.pipelines['FrontDoor'] = pipeline
+    orch.apply_config({'cameras': [{'name': 'FrontDoor', 'sensitivity': 300, 'threshold': 40,
+                                    'detector': {'conf_threshold': 0.7}},
+                                   {'name': 'Garage'}]})
+    assert (pipeline.detector.sensitivity, pipeline.detector.threshold) == (300, 40)
+    assert pipeline.person_detector.conf_threshold == 0.7
+    assert 'Garage' not in orch.pipelines  # New cameras need a restart
+
+
+def test_thread_mode_hands_display_frames_to_main_thread(tmp_path, monkeypatch):
+    video = tmp_path / 'clip.avi'
+    write_video(video)
+    orch = MultiCameraOrchestrator({'cameras': [{'name': 'TestCam', 'live_feed_timeout': 0}]}, DummyLiveFeed())
+    pipeline = CameraPipeline(orch.cameras[0], {}, orch.stop_flag, orch.publish_frame, video_path=str(video),
+                              show_frame=orch.show_frame)
+    pipeline.detector = MotionDetector(800, 100, True, 0, logging.getLogger('dummy'))
+    pipeline.detector.on_person_detected = lambda frame=None, persons=None: None
+    pipeline.person_detector = BoxDetector()
+    calls = []
+    for fn in ('namedWindow', 'imshow', 'destroyWindow', 'waitKey'):
+        monkeypatch.setattr(cv2, fn, lambda *args, fn=fn: calls.append((fn, threading.current_thread())) or -1)
+    worker = threading.Thread(target=pipeline.run)
+    worker.start()
+    worker.join()
+    assert calls == []  # The camera thread never touched HighGUI
+    assert orch.display == {'TestCam': None}
+    orch.show_frame('TestCam', np.zeros((48, 64, 3), dtype=np.uint8))
+    assert orch.update_windows()
+    orch.show_frame('TestCam', None)
+    assert not orch.update_windows()
+    assert [fn for fn, _ in calls] == ['namedWindow', 'imshow', 'waitKey', 'destroyWindow']
+    assert {thread for _, thread in calls} == {threading.main_thread()}
+
+
+def test_enroll_face_checks_before_encoding():
+    orch = MultiCameraOrchestrator({'cameras': []}, DummyLiveFeed())
+    # Rejected before the (missing) image is decoded or encoded
+    if importlib.util.find_spec('face_recognition') is None:
+        with pytest.raises(RuntimeError):
+            orch.enroll_face('Alice', None)
+    else:
+        with pytest.raises(ValueError):
+            orch.enroll_face('../etc/passwd', None)
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+from motion_detector.snapshot import SnapshotEncoder
+
+
+def test_encode_scales_and_annotates_without_touching_frame():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    encoder = SnapshotEncoder(max_width=320, quality=70)
+    data = encoder.encode(frame, [(100, 100, 400, 600, 0.9, 'person')])
+    assert not frame.any()  # Boxes are drawn on the thumbnail only
+    thumb = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert thumb.shape == (180, 320, 3)
+    # Box scaled by 0.25: its left edge is red
+    assert thumb[80, 25, 2] > 200 and thumb[80, 25, 0] < 50
+    stats = encoder.get_stats()
+    assert stats['encoded'] == 1 and stats['last_bytes'] == len(data) == stats['avg_bytes']
+
+
+def test_small_frame_not_enlarged():
+    frame = np.full((120, 160, 3), 127, dtype=np.uint8)
+    data = SnapshotEncoder(max_width=640).encode(frame)
+    assert cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (120, 160, 3)
@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from motion_detector.tracker import MultiObjectTracker, iou_matrix
+
+
+def test_iou_matrix():
+    ious = iou_matrix([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 30, 30)])
+    assert np.allclose(ious, [[1.0, 1 / 3, 0.0]])
+
+
+def test_ids_are_stable_and_boxes_propagate():
+    tracker = MultiObjectTracker(max_age=2.0)
+    tracks = []
+    # Object moving right 5 px per frame, detector runs every 3rd frame
+    for frame in range(12):
+        box = (100 + 5 * frame, 100, 150 + 5 * frame, 200)
+        if frame % 3 == 0:
+            tracks = tracker.update([box + (0.9, 'person')], now=frame * 0.1)
+        else:
+            tracks = tracker.predict(now=frame * 0.1)
+        assert len(tracks) == 1
+    assert tracks[0].id == 1
+    x1, y1, x2, y2 = tracks[0].box()
+    assert abs(x1 - 155) <= 6 and abs(x2 - 205) <= 6
+    assert abs(tracks[0].dwell(now=1.1) - 1.1) < 1e-9
+
+
+def test_classes_do_not_match_and_stale_tracks_expire():
+    tracker = MultiObjectTracker(max_age=1.0)
+    tracker.update([(0, 0, 50, 50, 0.9, 'person')], now=0.0)
+    tracks = tracker.update([(0, 0, 50, 50, 0.8, 'car')], now=0.5)
+    assert sorted(t.label for t in tracks) == ['car', 'person']
+    tracks = tracker.update([(0, 0, 50, 50, 0.8, 'car')], now=1.2)
+    assert [t.label for t in tracks] == ['car']
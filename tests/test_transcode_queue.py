@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+
+import threading
+import time
+from transcode_queue import TranscodeQueue
+
+
+class FakeTranscoder:
+    """Records the order jobs run in; blocks until released so the queue can fill up."""
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.order = []
+        self.release = threading.Event()
+
+    def __call__(self, input_path, output_path, **kwargs):
+        self.release.wait(5)
+        kwargs['on_progress'](0.5, '2.0')
+        self.order.append(input_path)
+        return self.ok
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_priorities_and_metrics(tmp_path):
+    fake = FakeTranscoder()
+    q = TranscodeQueue(str(tmp_path / 'queue.json'), transcode_fn=fake)
+    q.start()
+    try:
+        first = q.submit('busy.avi', priority='archive')
+        assert wait_for(lambda: q.get_stats()['running'] == 1)
+        q.submit('archive.avi', priority='archive')
+        q.submit('event.avi', priority='event')
+        stats = q.get_stats()
+        assert stats['queued'] == 2
+        assert [j['input'] for j in stats['jobs']] == ['busy.avi', 'event.avi', 'archive.avi']
+        fake.release.set()
+        assert wait_for(lambda: q.get_stats()['done'] == 3)
+    finally:
+        q.stop()
+    assert fake.order == ['busy.avi', 'event.avi', 'archive.avi']
+    job = q.get_job(first)
+    assert job['state'] == 'done' and job['progress'] == 1.0 and job['speed'] == '2.0'
+    assert job['encode_seconds'] >= 0 and job['output'] == 'busy_x264.mp4'
+
+
+def test_pending_jobs_survive_restart(tmp_path):
+    state = str(tmp_path / 'queue.json')
+    q = TranscodeQueue(state, transcode_fn=FakeTranscoder())
+    job_id = q.submit('clip.avi', priority='event')
+    cancelled = q.submit('other.avi')
+    assert q.cancel(cancelled)
+    # Never started: a new queue (process restart) picks the job up
+    fake = FakeTranscoder()
+    fake.release.set()
+    q2 = TranscodeQueue(state, transcode_fn=fake)
+    assert q2.get_job(job_id)['requeued'] == 1
+    assert q2.get_job(cancelled) is None
+    q2.start()
+    try:
+        assert wait_for(lambda: q2.get_stats()['done'] == 1)
+    finally:
+        q2.stop()
+    assert fake.order == ['clip.avi']
+    assert TranscodeQueue(state).get_stats()['queued'] == 0
+
+
+def test_failed_job_is_reported(tmp_path):
+    fake = FakeTranscoder(ok=False)
+    fake.release.set()
+    q = TranscodeQueue(str(tmp_path / 'queue.json'), transcode_fn=fake)
+    q.start()
+    try:
+        job_id = q.submit('broken.avi')
+        assert wait_for(lambda: q.get_stats()['failed'] == 1)
+    finally:
+        q.stop()
+    assert q.get_job(job_id)['state'] == 'failed'
+
+
+def test_api_only_transcodes_clips_inside_clip_dirs(tmp_path):
+    from api import APIServer
+    clips = tmp_path / 'clips'
+    clips.mkdir()
+    (clips / 'Cam_1.mp4').write_bytes(b'clip')
+    secret = tmp_path / 'secret.txt'
+    secret.write_text('keep me')
+    submitted = []
+
+    class Transcoder:
+        def submit(self, input_path, output_path=None, priority='normal', crf=None):
+            submitted.append((input_path, output_path, priority, crf))
+            return 'job1'
+
+    api = APIServer(None, None, None, threading.Event(), transcoder=Transcoder(), clip_dirs=[str(clips)])
+    client = api.app.test_client()
+    assert client.post('/transcode', json={'input': str(secret)}).status_code == 400
+    assert client.post('/transcode', json={'input': str(clips / '..' / 'secret.txt')}).status_code == 400
+    assert client.post('/transcode', json={'input': str(clips / 'missing.mp4')}).status_code == 400
+    assert client.post('/transcode', json={'input': str(clips / 'Cam_1.mp4'), 'priority': 'urgent'}).status_code == 400
+    assert client.post('/transcode', json={'input': str(clips / 'Cam_1.mp4'), 'crf': 'fast'}).status_code == 400
+    assert client.post('/transcode', json={'input': str(clips / 'Cam_1.mp4'), 'crf': 99}).status_code == 400
+    assert submitted == []
+    # A client-supplied output is ignored: the server always writes <input>_x264.mp4
+    resp = client.post('/transcode', json={'input': str(clips / 'Cam_1.mp4'), 'output': str(secret), 'crf': 30})
+    assert resp.status_code == 200 and resp.get_json()['id'] == 'job1'
+    assert submitted == [(os.path.realpath(clips / 'Cam_1.mp4'), None, 'archive', 30)]
@@ -0,0 +1,187 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'motion_detector')))
+
+import json
+import threading
+from upload_service import ConnectionPool, UploadService
+
+
+class FakeConnection:
+    """In-memory upload target; ``server`` holds the shared failure switches and received files."""
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+        with server['lock']:
+            server['opened'] += 1
+
+    def size(self, remote_name):
+        data = self.server['files'].get(remote_name)
+        return None if data is None else len(data)
+
+    def upload(self, local_path, remote_name, offset=0, callback=None, blocksize=65536):
+        with self.server['lock']:
+            if self.server['fail'] > 0:
+                self.server['fail'] -= 1
+                raise ConnectionError('connection reset')
+        self.server['offsets'].append(offset)
+        data = self.server['files'].get(remote_name, b'')[:offset]
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                block = f.read(blocksize)
+                if not block:
+                    break
+                if self.server['cut_at'] is not None and len(data) + len(block) > self.server['cut_at']:
+                    # The link drops mid-transfer: the server keeps what it received
+                    self.server['files'][remote_name] = data
+                    self.server['cut_at'] = None
+                    raise ConnectionError('link dropped')
+                data += block
+                if callback:
+                    callback(block)
+        self.server['files'][remote_name] = data
+
+    def check(self):
+        if self.server['dead']:
+            raise ConnectionError('gone')
+
+    def close(self):
+        self.closed = True
+
+
+def fake_server(fail=0):
+    return {'lock': threading.Lock(), 'opened': 0, 'fail': fail, 'dead': False, 'files': {}, 'offsets': [],
+            'cut_at': None}
+
+
+def make_files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f'clip_{i}.mp4'
+        path.write_bytes(b'x' * (i + 1))
+        paths.append(str(path))
+    return paths
+
+
+def test_connections_are_reused(tmp_path):
+    server = fake_server()
+    service = UploadService({}, str(tmp_path / 'q.json'), workers=2,
+                            connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        for path in make_files(tmp_path, 20):
+            service.submit(path)
+        assert service.join(5)
+    finally:
+        service.stop()
+    stats = service.get_stats()
+    assert stats['uploaded'] == 20 and stats['pending'] == 0
+    assert len(server['files']) == 20
+    assert server['opened'] <= 2
+    assert stats['pool']['reused'] >= 18
+
+
+def test_retry_with_backoff_then_success(tmp_path):
+    server = fake_server(fail=2)
+    service = UploadService({}, str(tmp_path / 'q.json'), workers=1, backoff_base=0.01,
+                            connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        service.submit(make_files(tmp_path, 1)[0], 'remote.mp4')
+        assert service.join(5)
+    finally:
+        service.stop()
+    stats = service.get_stats()
+    assert stats['uploaded'] == 1 and stats['retries'] == 2
+    # Each failure discards its connection
+    assert server['opened'] == 3
+    assert 'remote.mp4' in server['files']
+
+
+def test_failed_queue_is_durable(tmp_path):
+    state = str(tmp_path / 'q.json')
+    server = fake_server(fail=100)
+    service = UploadService({}, state, workers=1, max_retries=1, backoff_base=0.01,
+                            connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        service.submit(make_files(tmp_path, 1)[0])
+        assert service.join(5)
+    finally:
+        service.stop()
+    assert service.get_stats()['failed'] == 1
+    with open(state) as f:
+        assert len(json.load(f)['failed']) == 1
+
+    # A new service picks the failed file up again once the server is back
+    server['fail'] = 0
+    service = UploadService({}, state, workers=1, connection_factory=lambda: FakeConnection(server))
+    assert len(service.get_stats()['failed_queue']) == 1
+    service.start()
+    try:
+        assert service.retry_failed() == 1
+        assert service.join(5)
+    finally:
+        service.stop()
+    assert service.get_stats()['uploaded'] == 1
+    assert server['files']
+
+
+def test_pool_replaces_unhealthy_idle_connection():
+    server = fake_server()
+    pool = ConnectionPool(lambda: FakeConnection(server), size=1, check_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    server['dead'] = True
+    replacement = pool.acquire()
+    assert conn.closed and replacement is not conn
+    assert pool.get_stats()['check_failures'] == 1
+
+
+def test_resume_after_dropped_link(tmp_path):
+    path = tmp_path / 'big.mp4'
+    path.write_bytes(os.urandom(100 * 1024))
+    server = fake_server()
+    server['cut_at'] = 40 * 1024
+    service = UploadService({}, str(tmp_path / 'q.json'), workers=1, backoff_base=0.01, blocksize=8192,
+                            checkpoint_bytes=8192, connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        service.submit(str(path))
+        assert service.join(5)
+    finally:
+        service.stop()
+    stats = service.get_stats()
+    assert server['files']['big.mp4'] == path.read_bytes()
+    assert server['offsets'] == [0, 40 * 1024]
+    assert stats['resumed'] == 1 and stats['bytes_resumed'] == 40 * 1024
+    assert stats['bytes'] == 100 * 1024
+
+
+def test_checkpoint_survives_restart(tmp_path):
+    path = tmp_path / 'big.mp4'
+    path.write_bytes(os.urandom(64 * 1024))
+    state = str(tmp_path / 'q.json')
+    server = fake_server()
+    server['cut_at'] = 16 * 1024
+    service = UploadService({}, state, workers=1, backoff_base=30, blocksize=4096, checkpoint_bytes=4096,
+                            connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        service.submit(str(path))
+        assert service.join(0.5) is False  # first attempt failed, retry is 15-30 s away
+    finally:
+        service.stop()
+    with open(state) as f:
+        assert json.load(f)['pending'][0]['offset'] == 16 * 1024
+
+    service = UploadService({}, state, workers=1, connection_factory=lambda: FakeConnection(server))
+    service.start()
+    try:
+        assert service.join(5)
+    finally:
+        service.stop()
+    assert server['files']['big.mp4'] == path.read_bytes()
+    assert server['offsets'][-1] == 16 * 1024
@@ -40,3 +40,9 @@ def test_setup_logger(tmp_path):
             handler.flush()
     assert log_file.exists()
     assert "test message" in log_file.read_text()
+
+def test_tail_lines(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_text(''.join(f'line {i}\n' for i in range(5000)))
+    assert utils.tail_lines(str(path), 3, block_size=64) == ['line 4997\n', 'line 4998\n', 'line 4999\n']
+    assert len(utils.tail_lines(str(path), 10000)) == 5000
@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from motion_detector.yolo_person_detector import YoloPersonDetector
+from motion_detector.yolo_person_detector import YoloPersonDetector, decode_person_detections
 
 class TestYoloPersonDetector(unittest.TestCase):
     def setUp(self):
@@ -14,5 +14,28 @@ class TestYoloPersonDetector(unittest.TestCase):
         self.assertIsInstance(results, list)
         self.assertEqual(len(results), 0)
 
+class TestDecodePersonDetections(unittest.TestCase):
+    def test_decode_filters_and_scales(self):
+        out = np.zeros((4, 85), dtype=np.float32)
+        # Person centred in the frame, 20% x 40% of its size
+        out[0, :4] = [0.5, 0.5, 0.2, 0.4]
+        out[0, 5] = 0.9
+        # Person score high but another class wins the argmax
+        out[1, :4] = [0.2, 0.2, 0.1, 0.1]
+        out[1, 5] = 0.6
+        out[1, 6] = 0.8
+        # Below threshold
+        out[2, :4] = [0.7, 0.7, 0.1, 0.1]
+        out[2, 5] = 0.3
+        results = decode_person_detections([out[:2], out[2:]], (100, 200), 0, 0.5, 0.3)
+        self.assertEqual(len(results), 1)
+        x1, y1, x2, y2, conf = results[0]
+        self.assertEqual((x1, y1, x2, y2), (80, 30, 120, 70))
+        self.assertAlmostEqual(conf, 0.9, places=5)
+
+    def test_decode_empty(self):
+        out = np.zeros((10, 85), dtype=np.float32)
+        self.assertEqual(decode_person_detections([out], (416, 416), 0, 0.5, 0.3), [])
+
 if __name__ == '__main__':
     unittest.main()